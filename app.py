@@ -1,61 +1,293 @@
-from collections import defaultdict
+import base64
+import io
+from collections import OrderedDict, defaultdict
 from fileinput import filename
 import os
 import string
-from flask import Flask, render_template, request
+import threading
+import uuid
+from flask import Flask, Request, jsonify, make_response, render_template, request, send_from_directory, url_for
 from werkzeug.utils import secure_filename
 from extractPDF import ExtractPDF
+from extractPDF.JobQueue import JOB_DONE, JobQueue, QueueFullError, extract_to_cache
+from extractPDF.ResultCache import ResultCache, evict_files, hash_bytes, make_key
 
 dirname = os.path.dirname(__file__)
 UPLOAD_FOLDER = os.path.join(dirname, 'uploads')
+RESULT_CACHE_FOLDER = os.path.join(dirname, 'cache')
+TRACE_FOLDER = os.path.join(dirname, 'traces')
+
+class MemoryRequest(Request):
+   """Request keeping uploaded files in memory, werkzeug writes the large ones to a temporary file"""
+
+   def _get_file_stream(self, total_content_length, content_type, filename = None, content_length = None):
+      return io.BytesIO()
 
 app = Flask(__name__,template_folder='templates')
+app.request_class = MemoryRequest
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+# uploads are extracted from memory, set to True to keep a copy of them in the upload folder
+app.config['ARCHIVE_UPLOADS'] = False
+# uploads are held in memory, larger requests are refused (413)
+app.config['MAX_CONTENT_LENGTH'] = 64 * 1024 ** 2
+app.config['RESULT_CACHE_FOLDER'] = RESULT_CACHE_FOLDER
+app.config['RESULT_CACHE_MAX_BYTES'] = 2 * 1024 ** 3
+# Chrome traces of extractions posted with ?trace=1, only when TRACE_ENABLED is set: a trace extracts the pdf again even
+# if its result is cached. The oldest traces are deleted when the folder grows over TRACE_MAX_BYTES
+app.config['TRACE_ENABLED'] = False
+app.config['TRACE_FOLDER'] = TRACE_FOLDER
+app.config['TRACE_MAX_BYTES'] = 256 * 1024 ** 2
+# options given to extract_pdf, part of the key of cached results
+app.config['EXTRACT_OPTIONS'] = {}
+# number of worker processes running extractions and maximum number of queued and running extractions
+app.config['JOB_WORKERS'] = max(1, (os.cpu_count() or 2) // 2)
+app.config['JOB_QUEUE_SIZE'] = 16
 
-@app.route('/', methods = ['GET', 'POST'])
-def main():
+# number of results kept in memory to serve their images, and lifetime of images in the browser's cache (s)
+app.config['RESULTS_IN_MEMORY'] = 4
+app.config['IMAGE_MAX_AGE'] = 365 * 24 * 3600
+
+# data uri of an image of a result, from the kind of image, the question and the index of the image
+IMAGE_GETTERS = {
+   'title': lambda data, name, index: data["titles"][name][4],
+   'question': lambda data, name, index: data["questions"][name][index]["coor"][4],
+   'answer-title': lambda data, name, index: data["answers"][name]["options"][index][4],
+   'answer-content': lambda data, name, index: data["answers"][name]["options"][index][9],
+   'explain': lambda data, name, index: data["explains"][name][index][4],
+}
+
+result_cache = ResultCache(app.config['RESULT_CACHE_FOLDER'], app.config['RESULT_CACHE_MAX_BYTES'])
+results_in_memory = OrderedDict()
+results_lock = threading.Lock()
+job_queue = JobQueue(app.config['JOB_WORKERS'], app.config['JOB_QUEUE_SIZE'])
+
+def read_upload(f):
+   """Read the upload in memory, it is saved in the upload folder only when ARCHIVE_UPLOADS is set
+
+   Args:
+      f (FileStorage): uploaded file
+
+   Returns:
+      tuple: content of the pdf and key of its result in the result cache
+   """
+   pdf = f.read()
+   if app.config['ARCHIVE_UPLOADS']:
+      os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok = True)
+      with open(os.path.join(app.config['UPLOAD_FOLDER'], secure_filename(f.filename)), 'wb') as output:
+         output.write(pdf)
+
+   return pdf, make_key(hash_bytes(pdf), ExtractPDF.__version__, app.config['EXTRACT_OPTIONS'])
+
+def new_trace():
+   """Get a new file for the trace of an extraction, when the request asks for it with ?trace=1 and TRACE_ENABLED is set
+
+   Returns:
+      tuple: link to the file and its url, (None, None) if no trace is asked or traces are disabled
+   """
+   if not app.config['TRACE_ENABLED'] or request.args.get('trace') not in ('1', 'true'):
+      return None, None
+
+   os.makedirs(app.config['TRACE_FOLDER'], exist_ok = True)
+   # room for the new trace
+   evict_files(app.config['TRACE_FOLDER'], app.config['TRACE_MAX_BYTES'])
+   name = f"{uuid.uuid4().hex}.json"
+   return os.path.join(app.config['TRACE_FOLDER'], name), url_for('get_trace', name = name)
+
+def get_extraction(f, trace = None):
+   """Read the upload and get its extraction, from the result cache when the same pdf was already extracted
+
+   Args:
+      f (FileStorage): uploaded file
+      trace (str, optional): link to the file receiving the trace of the extraction. Defaults to None, no trace.
+         With a trace, the pdf is extracted even if its result is cached.
+
+   Returns:
+      tuple: key of the result in the result cache, result of extract_pdf and True if it was served from the cache
+   """
+   pdf, key = read_upload(f)
+   data = load_result(key) if trace is None else None
+   if data is not None:
+      return key, data, True
+
+   data = ExtractPDF.extract_pdf(pdf, "", trace = trace, **app.config['EXTRACT_OPTIONS'])
+   result_cache.set(key, data)
+   return key, data, False
+
+def load_result(key):
+   """Get a result of the result cache, the last used results are kept in memory for the requests of their images
+
+   Args:
+      key (str): key of the result
+
+   Returns:
+      dict: result of extract_pdf, None if the key is not in the result cache
+   """
+   with results_lock:
+      if key in results_in_memory:
+         results_in_memory.move_to_end(key)
+         return results_in_memory[key]
+
+   data = result_cache.get(key)
+   if data is not None:
+      with results_lock:
+         results_in_memory[key] = data
+         while len(results_in_memory) > app.config['RESULTS_IN_MEMORY']:
+            results_in_memory.popitem(last = False)
+   return data
+
+def image_url(key, kind, name, index = 0):
+   return url_for('result_image', key = key, kind = kind, name = name, index = index)
+
+def render_result(key = None, data = None, cache_hit = None, trace_url = None):
+   """Render the page of an extraction, its images are referenced by the url of the image endpoint
+
+   Args:
+      key (str, optional): key of the result in the result cache. Defaults to None.
+      data (dict, optional): result of extract_pdf. Defaults to None, only the upload form is shown.
+      cache_hit (bool, optional): True if the result was served from the cache. Defaults to None.
+      trace_url (str, optional): url of the trace of the extraction. Defaults to None.
+
+   Returns:
+      Response: html page
+   """
    question_title = defaultdict(list)
    question_content = defaultdict(list)
    answer_title = defaultdict(list)
    answer_content = defaultdict(list)
    explain_list = defaultdict(list)
    correct_answers = ['blank']
-   filename = ""
-   if request.method == 'POST':
-      f = request.files['file']
-      path = os.path.join(app.config['UPLOAD_FOLDER'], secure_filename(f.filename))
-      f.save(path)
-
-      data = ExtractPDF.extract_pdf(path, "")
-      
+   if data is not None:
       titles =  data["titles"]
-      for key in titles:
-         question_title[key].append(titles[key][4])
+      for name in titles:
+         question_title[name].append(image_url(key, 'title', name))
          
       questions = data["questions"]
-      for key in questions:
-         question = questions[key]
-         for q in question:
-            question_content[key].append(q["coor"][4])
+      for name in questions:
+         question = questions[name]
+         for index in range(len(question)):
+            question_content[name].append(image_url(key, 'question', name, index))
          
       answers = data["answers"]
-      for key in answers:
-         options = answers[key]["options"]
-         for option in options:
-            answer_title[key].append(option[4])
-            answer_content[key].append(option[9])
+      for name in answers:
+         options = answers[name]["options"]
+         for index in range(len(options)):
+            answer_title[name].append(image_url(key, 'answer-title', name, index))
+            answer_content[name].append(image_url(key, 'answer-content', name, index))
       
       explains = data["explains"]
-      for key in explains:
-         explain = explains[key]
-         for e in explain:
-            explain_list[key].append(e[4])
+      for name in explains:
+         explain = explains[name]
+         for index in range(len(explain)):
+            explain_list[name].append(image_url(key, 'explain', name, index))
       
       correct_list = data["correct_options"]
-      for key in correct_list:
-         correct_answers.append(correct_list[key])
+      for name in correct_list:
+         correct_answers.append(correct_list[name])
+
+   response = make_response(render_template('index.html', question_title = question_title, question_content = question_content, answer_title=answer_title, answer_content = answer_content, explain_list = explain_list, correct_answers = correct_answers, cache_hit = cache_hit, trace_url = trace_url))
+   if cache_hit is not None:
+      response.headers['X-Cache'] = 'HIT' if cache_hit else 'MISS'
+   return response
+
+@app.route('/', methods = ['GET', 'POST'])
+def main():
+   if request.method == 'POST':
+      trace, trace_url = new_trace()
+      key, data, cache_hit = get_extraction(request.files['file'], trace)
+      response = render_result(key, data, cache_hit, trace_url)
+      if trace_url is not None:
+         response.headers['X-Trace'] = trace_url
+      return response
+
+   return render_result()
+
+@app.route('/jobs', methods = ['POST'])
+def submit_job():
+   pdf, key = read_upload(request.files['file'])
+   trace, trace_url = new_trace()
+   if trace is None and result_cache.contains(key):
+      job_id = job_queue.add_done(key, cache_hit = True)
+   else:
+      options = dict(app.config['EXTRACT_OPTIONS'])
+      info = {"cache_hit": False}
+      if trace is not None:
+         options['trace'] = trace
+         info['trace'] = trace_url
+      try:
+         job_id = job_queue.submit(extract_to_cache, pdf, key, options,
+            app.config['RESULT_CACHE_FOLDER'], app.config['RESULT_CACHE_MAX_BYTES'], **info)
+      except QueueFullError as e:
+         return jsonify({"error": str(e)}), 429
+
+   return jsonify(job_queue.status(job_id)), 202
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+   status = job_queue.status(job_id)
+   if status is None:
+      return jsonify({"error": "unknown job"}), 404
+   return jsonify(status)
+
+def get_job_result(job_id):
+   """Get the result of a finished job from the result cache
+
+   Args:
+      job_id (str): id of the job
+
+   Returns:
+      tuple: key of the result, result of extract_pdf (None if not available) and status of the job
+   """
+   status = job_queue.status(job_id)
+   if status is None or status["status"] != JOB_DONE:
+      return None, None, status
+   key = job_queue.result(job_id)
+   return key, load_result(key), status
+
+@app.route('/jobs/<job_id>/result')
+def job_result(job_id):
+   _, data, status = get_job_result(job_id)
+   if status is None:
+      return jsonify({"error": "unknown job"}), 404
+   if data is None:
+      return jsonify(status), 409
+   return jsonify(data)
+
+@app.route('/jobs/<job_id>/view')
+def job_view(job_id):
+   key, data, status = get_job_result(job_id)
+   if status is None:
+      return jsonify({"error": "unknown job"}), 404
+   if data is None:
+      return jsonify(status), 409
+   return render_result(key, data, status["cache_hit"], status.get("trace"))
+
+@app.route('/traces/<name>')
+def get_trace(name):
+   return send_from_directory(app.config['TRACE_FOLDER'], name, mimetype = 'application/json', as_attachment = True)
+
+@app.route('/results/<key>/images/<kind>/<name>/<int:index>')
+def result_image(key, kind, name, index):
+   # results are keyed on the content of the pdf, so an image of a key never changes
+   etag = f"{key}-{kind}-{name}-{index}"
+   if etag in request.if_none_match:
+      response = make_response('', 304)
+   else:
+      data = load_result(key)
+      try:
+         data_uri = IMAGE_GETTERS[kind](data, name, index) if data is not None else ''
+      except (KeyError, IndexError):
+         data_uri = ''
+      if not data_uri:
+         return jsonify({"error": "unknown image"}), 404
+      header, base64_data = data_uri.split(',', 1)
+      response = make_response(base64.b64decode(base64_data))
+      response.mimetype = header[len('data:'):].split(';')[0]
 
-   return render_template('index.html', question_title = question_title, question_content = question_content, answer_title=answer_title, answer_content = answer_content, explain_list = explain_list, correct_answers = correct_answers)
+   response.set_etag(etag)
+   response.cache_control.public = True
+   response.cache_control.max_age = app.config['IMAGE_MAX_AGE']
+   response.cache_control.immutable = True
+   return response
    
 if __name__ == '__main__':
    app.run(debug = True)
\ No newline at end of file
@@ -0,0 +1,81 @@
+"""Benchmark the traversal of answer-key pages with 500 entries and more (ExtractPDF.process_stop_questions)
+
+A page starts with the end marker and the answer key ("BẢNG ĐÁP ÁN"), followed by the explanation section (one
+"Câu n." per entry). The answer key is written in the two formats read by the extractor: "1.A" entries 10 per block, or
+one block per entry with the number and the letter on two lines. The blocks are built as in page.get_text("dict"), no pdf
+is needed. The time per entry is printed for every size and the blocks are checked to be unchanged by the traversal.
+
+Usage:
+    python benchmarks/bench_answer_key.py [--entries 500 1000 2000 4000] [--repeat 3]
+"""
+import argparse
+import copy
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from extractPDF import ExtractPDF
+from synthetic_exam import ANSWER_KEY_MARKER, END_MARKER, EXPLAIN_MARKER
+
+BOLD = 16
+
+def make_span(text, bbox, flags=0):
+    return {"text": text, "bbox": bbox, "flags": flags, "ascender": 0.9, "descender": -0.2, "color": 0, "size": 11,
+            "font": "Serif", "origin": bbox[:2]}
+
+def make_line(spans):
+    return {"bbox": [spans[0]["bbox"][0], spans[0]["bbox"][1], spans[-1]["bbox"][2], spans[-1]["bbox"][3]],
+            "spans": spans, "wmode": 0, "dir": (1, 0)}
+
+def make_block(lines):
+    return {"type": 0, "lines": lines,
+            "bbox": [min(line["bbox"][0] for line in lines), min(line["bbox"][1] for line in lines),
+                     max(line["bbox"][2] for line in lines), max(line["bbox"][3] for line in lines)]}
+
+def make_page(n_entries, key_format):
+    """Get the blocks of an answer-key page
+
+    Returns:
+        list: blocks of the page
+    """
+    blocks = [make_block([make_line([make_span(END_MARKER, [250, 50, 350, 62], BOLD)])]),
+              make_block([make_line([make_span(ANSWER_KEY_MARKER, [250, 70, 350, 82], BOLD)])])]
+    for i in range(n_entries):
+        x, y, letter = 50 + (i % 10) * 48, 90 + i * 0.1, 'ABCD'[i % 4]
+        if key_format == 1:
+            line = make_line([make_span(f"{i + 1}.{letter}", [x, y, x + 30, y + 12])])
+            if i % 10 == 0:
+                blocks.append(make_block([line]))
+            else:
+                blocks[-1]["lines"].append(line)
+        else:
+            blocks.append(make_block([make_line([make_span(f"{i + 1}", [x, y, x + 15, y + 12])]),
+                                      make_line([make_span(letter, [x, y + 13, x + 10, y + 25])])]))
+    blocks.append(make_block([make_line([make_span(EXPLAIN_MARKER, [50, 700, 100, 712], BOLD)])]))
+    for i in range(n_entries):
+        blocks.append(make_block([make_line([make_span(f"Câu {i + 1}.", [50, 720, 90, 732], BOLD)]),
+                                  make_line([make_span("Chọn A", [50, 734, 90, 746])])]))
+
+    return blocks
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--entries', type=int, nargs='+', default=[500, 1000, 2000, 4000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    for key_format in (1, 2):
+        for n_entries in args.entries:
+            pages = [make_page(n_entries, key_format) for _ in range(args.repeat)]
+            reference = copy.deepcopy(pages[0])
+            start = time.perf_counter()
+            for page in pages:
+                data = ExtractPDF.process_stop_questions(ExtractPDF.BlockCursor(page))
+            elapsed = (time.perf_counter() - start) / args.repeat
+            assert len(data[3]) == n_entries, (key_format, n_entries, len(data[3]))
+            print(f"format {key_format}, {n_entries} entries: {elapsed * 1e3:.1f} ms, "
+                  f"{elapsed / n_entries * 1e6:.1f} us/entry, blocks unchanged: {pages[0] == reference}")
+
+if __name__ == '__main__':
+    main()
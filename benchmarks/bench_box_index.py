@@ -0,0 +1,96 @@
+"""Benchmark finding the question a line or an image read out of order belongs to (Geometry.BoxIndex)
+
+Dense pages of questions on two columns are generated (the right column is read after the left one, so its lines are
+above the last question). Lines and images are assigned to the first question containing their middle, and the question
+grows to cover them, as in compare_question_outside and compare_image_outside. The scan of every question of the page
+(as before BoxIndex) and BoxIndex.find are timed on the same lookups and their results are checked to be identical.
+
+Usage:
+    python benchmarks/bench_box_index.py [--questions 20 100 500] [--lookups 20000] [--seed 0]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from extractPDF.Geometry import Box, BoxIndex
+
+PAGE_HEIGHT = 842
+TOP = 40
+
+def scan(boxes, y, above_first=False):
+    """Find the box containing y by going through all boxes, as before BoxIndex"""
+    key_first = list(boxes.keys())[0]
+    for key in boxes:
+        if boxes[key][1] < y < boxes[key][3] or (above_first and key_first == key and y < boxes[key][3]):
+            return key
+    return None
+
+def make_page(rng, n_questions):
+    """Get the boxes of the questions of a page on two columns and the lines read out of order
+
+    Returns:
+        tuple: boxes of the questions by key and list of lines' coordinates
+    """
+    boxes = {}
+    per_column = (n_questions + 1) // 2
+    height = (PAGE_HEIGHT - 2 * TOP) / per_column
+    for i in range(n_questions):
+        column, row = divmod(i, per_column)
+        x0, y0 = 40 + column * 270, TOP + row * height
+        boxes[f'question_{i + 1}'] = [x0, y0, x0 + 250, y0 + height * rng.uniform(0.3, 0.9)]
+    lines = []
+    for _ in range(n_questions * 4):
+        y = rng.uniform(0, PAGE_HEIGHT - 12)
+        x = rng.choice((40, 310))
+        lines.append([x, y, x + rng.uniform(20, 250), y + rng.uniform(8, 14)])
+
+    return boxes, lines
+
+def assign(boxes, lines, find):
+    """Assign every line to the box containing its middle and grow the box
+
+    Returns:
+        list: key found for every line
+    """
+    keys = []
+    for n, line in enumerate(lines):
+        key = find(boxes, (line[1] + line[3]) / 2, n % 2 == 0)
+        if key is not None:
+            if isinstance(boxes, BoxIndex):
+                boxes.merge(key, line)
+            else:
+                boxes[key].merge(line)
+        keys.append(key)
+    return keys
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--questions', type=int, nargs='+', default=[20, 100, 500])
+    parser.add_argument('--lookups', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    for n_questions in args.questions:
+        pages = []
+        while sum(len(lines) for _, lines in pages) < args.lookups:
+            pages.append(make_page(rng, n_questions))
+        n_lookups = sum(len(lines) for _, lines in pages)
+
+        start = time.perf_counter()
+        scanned = [assign({key: Box(box) for key, box in boxes.items()}, lines, scan) for boxes, lines in pages]
+        before = time.perf_counter() - start
+        start = time.perf_counter()
+        indexed = [assign(BoxIndex({key: Box(box) for key, box in boxes.items()}), lines, BoxIndex.find)
+                   for boxes, lines in pages]
+        after = time.perf_counter() - start
+
+        print(f"{n_questions} questions/page, {n_lookups} lookups: scan {before / n_lookups * 1e6:.2f} us, "
+              f"BoxIndex {after / n_lookups * 1e6:.2f} us (boxes built and grown included), "
+              f"identical: {scanned == indexed}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Benchmark page's layout on an image heavy pdf with and without image's data
+
+"payload" reads the blocks with page.get_text("dict"), MuPDF copies the data of every image (converted to png),
+"geometry" reads the text without images and the boxes of the images with page.get_image_info (ExtractPDF.get_page_layout).
+Without a pdf, a synthetic exam with an image in every question is written.
+Every mode runs in its own process so that the peak RSS of one mode does not hide the other.
+
+Usage:
+    python benchmarks/bench_image_blocks.py [pdf] [--pages 30]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import fitz
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from extractPDF import ExtractPDF
+from synthetic_exam import make_exam
+
+MODES = {
+    "json": lambda page: json.loads(page.get_text("json"))['blocks'],
+    "payload": lambda page: ExtractPDF.get_page_layout(page, image_payload=True),
+    "geometry": lambda page: ExtractPDF.get_page_layout(page),
+}
+
+def run_mode(file, mode, repeat=5):
+    """Parse every page of the pdf and report latency and memory
+
+    Args:
+        file (str): link to the file
+        mode (str): key of MODES
+        repeat (int, optional): number of timed passes over the document. Defaults to 5.
+
+    Returns:
+        dict: per page latency (ms), peak of python allocations (MB) and peak RSS (MB)
+    """
+    doc = fitz.open(file)
+    parse = MODES[mode]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for page in doc:
+            blocks = parse(page)
+            del blocks
+    elapsed = time.perf_counter() - start
+    # allocations are traced on another pass, tracing slows down the python objects of the blocks
+    tracemalloc.start()
+    for page in doc:
+        blocks = parse(page)
+        del blocks
+    peak_alloc = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    n_page = doc.page_count
+    doc.close()
+    return {
+        "ms_per_page": elapsed * 1000 / (n_page * repeat),
+        "peak_alloc_mb": peak_alloc / 2**20,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+def main(file):
+    for mode in MODES:
+        output = subprocess.run([sys.executable, __file__, "--mode", mode, file],
+                                capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.splitlines()[-1])
+        print(f"{mode:>8}: {result['ms_per_page']:.2f} ms/page, "
+              f"peak alloc {result['peak_alloc_mb']:.1f} MB, peak RSS {result['peak_rss_mb']:.1f} MB")
+
+if __name__ == '__main__':
+    if len(sys.argv) > 3 and sys.argv[1] == "--mode":
+        print(json.dumps(run_mode(sys.argv[3], sys.argv[2])))
+    else:
+        parser = argparse.ArgumentParser()
+        parser.add_argument('pdf', nargs='?')
+        parser.add_argument('--pages', type=int, default=30)
+        args = parser.parse_args()
+        if args.pdf is not None:
+            main(args.pdf)
+        else:
+            with tempfile.TemporaryDirectory() as tmp:
+                file = os.path.join(tmp, 'exam.pdf')
+                info = make_exam(file, args.pages, image_every=1)
+                print(f"synthetic exam: {info['pages']} pages, {info['questions']} questions, an image in every question")
+                main(file)
@@ -0,0 +1,56 @@
+"""Benchmark bytes per crop and encode time per image format
+
+The crops are the boxes of questions and answer options found by extract_pdf.
+
+Usage:
+    python benchmarks/bench_image_encoder.py [pdf ...]
+"""
+import base64
+import os
+import sys
+import time
+
+import fitz
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from extractPDF import ExtractPDF
+from bench_page_raster import DEFAULT_FILES, get_crops
+
+ENCODERS = {
+    "png (mupdf)": ExtractPDF.ImageEncoder("png"),
+    "png level 1": ExtractPDF.ImageEncoder("png", compress_level=1),
+    "png level 9": ExtractPDF.ImageEncoder("png", compress_level=9),
+    "webp lossless": ExtractPDF.ImageEncoder("webp", quality=100),
+    "webp q80": ExtractPDF.ImageEncoder("webp", quality=80),
+    "jpeg q85": ExtractPDF.ImageEncoder("jpeg", quality=85),
+}
+
+def to_data_uri_pillow(pix):
+    """Previous encoding: PNG through pil_tobytes and the repr of bytes"""
+    data = f'data:image/png;base64,{base64.b64encode(pix.pil_tobytes("png"))}'
+    return data.replace("data:image/png;base64,b'", "data:image/png;base64,").replace("'", "")
+
+def measure(pixmaps, to_data_uri):
+    start = time.perf_counter()
+    total = sum(len(to_data_uri(pix)) for pix in pixmaps)
+    elapsed = time.perf_counter() - start
+    
+    return total / len(pixmaps), elapsed * 1000 / len(pixmaps)
+
+def main(files):
+    pixmaps = []
+    for file in files:
+        doc = fitz.open(file)
+        renderer = ExtractPDF.CropRenderer()
+        pixmaps += [renderer.get_pixmap(doc[n_page], crop_box) for n_page, crop_box in get_crops(file)]
+        doc.close()
+
+    print(f"{len(pixmaps)} crops")
+    results = {"png (pil_tobytes)": measure(pixmaps, to_data_uri_pillow)}
+    for name, encoder in ENCODERS.items():
+        results[name] = measure(pixmaps, encoder.to_data_uri)
+    for name, (size, ms) in results.items():
+        print(f"{name:>18}: {size / 1024:7.1f} KB/crop (base 64), {ms:6.2f} ms/crop")
+
+if __name__ == '__main__':
+    main(sys.argv[1:] or DEFAULT_FILES)
@@ -0,0 +1,83 @@
+"""Microbenchmark of line classification over the lines of real exams
+
+Compares the previous classification (one re.search with an inline pattern and a strip per check)
+with LineClassifier, which strips the line once and uses precompiled patterns.
+
+Usage:
+    python benchmarks/bench_line_classifier.py [pdf ...]
+"""
+import os
+import re
+import sys
+import time
+
+import fitz
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from extractPDF import ExtractPDF
+
+dirname = os.path.dirname(__file__)
+DEFAULT_FILES = [
+    os.path.join(dirname, '..', 'pdf-example', name)
+    for name in ('English Test.pdf', 'Math Test.pdf', 'Physics Test.pdf')
+]
+
+def get_corpus(files):
+    """Get every text line of the given pdfs
+
+    Args:
+        files (list): links to the files
+
+    Returns:
+        list: list of (text of line, line)
+    """
+    corpus = []
+    for file in files:
+        doc = fitz.open(file)
+        for page in doc:
+            for block in ExtractPDF.get_page_layout(page):
+                for line in block.get('lines', []):
+                    corpus.append((ExtractPDF.get_text_spans(line), line))
+        doc.close()
+    return corpus
+
+def classify_inline(text_spans, line):
+    """Classify a line the way the check_* functions used to: inline pattern and strip per check"""
+    tags = 0
+    if re.search(ExtractPDF.END_PATTERN.pattern, text_spans.strip()):
+        tags |= ExtractPDF.LINE_END
+    if re.search(ExtractPDF.CORRECT_ANSWER_PATTERN.pattern, text_spans.strip()):
+        tags |= ExtractPDF.LINE_CORRECT_ANSWER
+    if re.search(ExtractPDF.READING_PASSAGE_PATTERN.pattern, text_spans.strip()):
+        tags |= ExtractPDF.LINE_READING_PASSAGE
+    if re.search(ExtractPDF.QUESTION_TITLE_PATTERN.pattern, text_spans.strip()) or re.search(ExtractPDF.QUESTION_NUMBER_PATTERN.pattern, text_spans.strip()) and line["spans"][0]["flags"] >= 16:
+        tags |= ExtractPDF.LINE_QUESTION_TITLE
+    if re.search(ExtractPDF.NOT_MULTIPLE_CHOICE_PATTERN.pattern, text_spans.strip()) and re.search(ExtractPDF.ESSAY_PATTERN.pattern, text_spans.strip()):
+        tags |= ExtractPDF.LINE_ESSAY
+    if re.search(ExtractPDF.EXPLAIN_PATTERN.pattern, text_spans.strip()):
+        tags |= ExtractPDF.LINE_EXPLAIN
+    if re.search(ExtractPDF.EXAM_MULTIPLE_PATTERN.pattern, text_spans.strip()):
+        tags |= ExtractPDF.LINE_EXAM_MULTIPLE
+    if re.search(ExtractPDF.ANSWER_OPTION_PATTERN.pattern, text_spans):
+        tags |= ExtractPDF.LINE_ANSWER_OPTION
+    return tags
+
+def lines_per_second(corpus, classify, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text_spans, line in corpus:
+            classify(text_spans, line)
+    return len(corpus) * repeat / (time.perf_counter() - start)
+
+def main(files):
+    corpus = get_corpus(files)
+    classifier = ExtractPDF.line_classifier
+    mismatch = sum(classify_inline(text, line) != classifier.classify(text, line) for text, line in corpus)
+    before = lines_per_second(corpus, classify_inline)
+    after = lines_per_second(corpus, classifier.classify)
+    print(f"{len(corpus)} lines, {mismatch} mismatches")
+    print(f"inline patterns: {before:,.0f} lines/s")
+    print(f"LineClassifier:  {after:,.0f} lines/s, x{after / before:.2f}")
+
+if __name__ == '__main__':
+    main(sys.argv[1:] or DEFAULT_FILES)
@@ -0,0 +1,92 @@
+"""Measure the memory of the boxes collected by the 1st phase of extract_pdf and the peak memory of an extraction
+
+The boxes of questions, explanations and answer options found by the 1st phase are kept until the 2nd phase creates the
+images. Their number of objects and bytes (sys.getsizeof of every container, number and string they hold) are counted
+when the 2nd phase starts, then the peak memory traced by tracemalloc during the whole extraction. Sizes are given per
+1000 questions.
+
+Usage:
+    python benchmarks/bench_memory.py [--pages 100] [--language vi]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from extractPDF import ExtractPDF
+from synthetic_exam import make_exam
+
+def get_deep_size(obj, seen):
+    """Get the number of objects and bytes of an object and of the objects it holds
+
+    Returns:
+        tuple: number of objects and bytes
+    """
+    if id(obj) in seen:
+        return 0, 0
+    seen.add(id(obj))
+    count, size = 1, sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        children = list(obj.keys()) + list(obj.values())
+    elif isinstance(obj, (list, tuple)):
+        children = obj
+    elif hasattr(obj, '__slots__'):
+        children = [getattr(obj, name) for cls in type(obj).__mro__ for name in getattr(cls, '__slots__', ())]
+    else:
+        children = []
+    for child in children:
+        child_count, child_size = get_deep_size(child, seen)
+        count += child_count
+        size += child_size
+
+    return count, size
+
+def measure_records(file):
+    """Extract a pdf and count the objects of the boxes of the 1st phase when the 2nd phase starts
+
+    Returns:
+        dict: objects, bytes of the boxes, traced peak memory (bytes) and time (s) of the extraction
+    """
+    records = {}
+    process_question_and_answers = ExtractPDF.process_question_and_answers
+
+    def measured(questions, *args, **kwargs):
+        records["objects"], records["bytes"] = get_deep_size(questions, set())
+        return process_question_and_answers(questions, *args, **kwargs)
+
+    ExtractPDF.process_question_and_answers = measured
+    try:
+        tracemalloc.start()
+        start = time.perf_counter()
+        data = ExtractPDF.extract_pdf(file, "", render_images=False)
+        records["seconds"] = time.perf_counter() - start
+        records["peak"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    finally:
+        ExtractPDF.process_question_and_answers = process_question_and_answers
+    records["questions"] = len(data["questions"])
+
+    return records
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, default=100)
+    parser.add_argument('--language', choices=('vi', 'en'), default='vi')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        file = os.path.join(tmp, 'exam.pdf')
+        make_exam(file, args.pages, language=args.language)
+        records = measure_records(file)
+
+    per_1000 = 1000 / records["questions"]
+    print(f"{records['questions']} questions, extracted in {records['seconds']:.2f} s (traced)")
+    print(f"boxes of the 1st phase: {records['objects'] * per_1000:.0f} objects, "
+          f"{records['bytes'] * per_1000 / 1024:.0f} KB per 1000 questions")
+    print(f"peak traced memory: {records['peak'] * per_1000 / 1024 ** 2:.1f} MB per 1000 questions")
+
+if __name__ == '__main__':
+    main()
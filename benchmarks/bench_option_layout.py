@@ -0,0 +1,72 @@
+"""Benchmark laying out the answer options of a large batch of questions with OptionLayout.layout_options
+
+Questions of 2 to 6 options (A. to F.) are generated on 1 column, 2 columns and 1 row, the time per question of every
+case is printed and the layout found is checked against the generated one.
+
+Usage:
+    python benchmarks/bench_option_layout.py [--questions 100000] [--seed 0]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from extractPDF.OptionLayout import LAYOUT_COLUMN, LAYOUT_GRID, LAYOUT_ROW, OPTION_LETTERS, get_layout_type, get_option_rows, layout_options
+
+PAGE_WIDTH = 595
+LEFT = 50
+WIDTH = 500
+LINE_HEIGHT = 15
+
+def make_question(rng, n_options, columns):
+    """Get the boxes of the options of a question laid out on columns
+
+    Returns:
+        tuple: titles, contents and question's coordinates
+    """
+    y = rng.uniform(50, 600)
+    titles = []
+    contents = []
+    for i in range(n_options):
+        row, column = divmod(i, columns)
+        x = LEFT + column * WIDTH / columns
+        top = y + row * LINE_HEIGHT
+        titles.append([x, top, x + 14, top + 12, f"{OPTION_LETTERS[i]}."])
+        contents.append([x, top, x + rng.uniform(20, WIDTH / columns - 20), top + 12])
+
+    return titles, contents, [LEFT - 10, y - 40, LEFT + WIDTH + 10, y + 200]
+
+def expected_layout(n_options, columns):
+    if columns == 1:
+        return LAYOUT_COLUMN
+    return LAYOUT_ROW if columns >= n_options else LAYOUT_GRID
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--questions', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    cases = [(n_options, columns) for n_options in (2, 3, 4, 6) for columns in sorted({1, 2, n_options})]
+    total = 0.0
+    for n_options, columns in cases:
+        batch = [make_question(rng, n_options, columns) for _ in range(args.questions // len(cases))]
+        for titles, contents, question_box in batch[:100]:
+            layout = get_layout_type(get_option_rows(titles))
+            assert layout == expected_layout(n_options, columns), (n_options, columns, layout)
+
+        start = time.perf_counter()
+        for titles, contents, question_box in batch:
+            layout_options(titles, contents, question_box, PAGE_WIDTH)
+        elapsed = time.perf_counter() - start
+        total += elapsed
+        print(f"{n_options} options {columns} columns ({expected_layout(n_options, columns)}): "
+              f"{elapsed / len(batch) * 1e6:.2f} us/question")
+
+    print(f"{args.questions // len(cases) * len(cases)} questions: {total:.3f} s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Benchmark finding the style of the answer option's titles over the whole document against question 1 only
+
+Synthetic exams on mixed layouts (options on 4, 2 and 1 columns) are extracted as they are and with question 1's option
+titles written in another style (exp: an example question). The style of question 1 was used to tell the option titles
+from the other ones in every question, the style of most titles of the document is used now
+(ExtractPDF.get_document_option_style). The share of questions whose four options are found and the time of the
+statistics are printed for both.
+
+Usage:
+    python benchmarks/bench_option_style.py [--pages 20 100] [--seed 0]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from extractPDF import ExtractPDF
+from synthetic_exam import make_exam
+
+# style (bold, color) of question 1's option titles
+FIRST_OPTION_STYLES = {
+    "same as the others": None,
+    "regular, red": (False, (1, 0, 0)),
+    "regular, black": (False, (0, 0, 0)),
+    "bold, black": (True, (0, 0, 0)),
+}
+
+def extract(file, document_style):
+    """Extract a pdf with the style of the document or of question 1
+
+    Returns:
+        tuple: share of questions with four options found, time (s) of the statistics
+    """
+    get_document_option_style = ExtractPDF.get_document_option_style
+    elapsed = 0.0
+
+    def measured(questions, default=None):
+        nonlocal elapsed
+        start = time.perf_counter()
+        style = get_document_option_style(questions, default)
+        elapsed += time.perf_counter() - start
+        return style if document_style else default
+
+    ExtractPDF.get_document_option_style = measured
+    try:
+        data = ExtractPDF.extract_pdf(file, "", render_images=False)
+    finally:
+        ExtractPDF.get_document_option_style = get_document_option_style
+    found = sum(1 for answer in data["answers"].values() if len(answer["options"]) == 4)
+
+    return found / len(data["questions"]), elapsed
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, nargs='+', default=[20, 100])
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            for name, first_option_style in FIRST_OPTION_STYLES.items():
+                file = os.path.join(tmp, 'exam.pdf')
+                info = make_exam(file, pages, seed=args.seed, first_option_style=first_option_style)
+                first, _ = extract(file, False)
+                document, elapsed = extract(file, True)
+                print(f"{info['pages']} pages, {info['questions']} questions, question 1 {name}: four options found "
+                      f"{first * 100:.1f}% (question 1's style), {document * 100:.1f}% (document's style), "
+                      f"statistics {elapsed * 1e3:.2f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""Benchmark parsing page's blocks: json round trip vs native dict layout
+
+Usage:
+    python benchmarks/bench_page_layout.py [pdf ...]
+"""
+import json
+import os
+import sys
+import time
+
+import fitz
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from extractPDF import ExtractPDF
+
+dirname = os.path.dirname(__file__)
+DEFAULT_FILES = [
+    os.path.join(dirname, '..', 'pdf-example', name)
+    for name in ('English Test.pdf', 'Math Test.pdf', 'Physics Test.pdf')
+]
+
+def parse_json(page):
+    return json.loads(page.get_text("json"))['blocks']
+
+def pages_per_second(doc, parse, repeat=5):
+    """Parse every page of the document several times
+
+    Args:
+        doc (fitz.Document): document to parse
+        parse (function): function parsing one page
+        repeat (int, optional): number of passes over the document. Defaults to 5.
+
+    Returns:
+        float: number of pages parsed per second
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for page in doc:
+            parse(page)
+    return doc.page_count * repeat / (time.perf_counter() - start)
+
+def main(files):
+    for file in files:
+        doc = fitz.open(file)
+        before = pages_per_second(doc, parse_json)
+        after = pages_per_second(doc, ExtractPDF.get_page_layout)
+        print(f"{os.path.basename(file)}: json {before:.1f} pages/s, dict {after:.1f} pages/s, x{after / before:.2f}")
+        doc.close()
+
+if __name__ == '__main__':
+    main(sys.argv[1:] or DEFAULT_FILES)
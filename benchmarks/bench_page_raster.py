@@ -0,0 +1,63 @@
+"""Benchmark crops rendered per second: cropped page vs cached page's display list
+
+The crops are the boxes of titles, questions, answer options and explanations found by extract_pdf.
+
+Usage:
+    python benchmarks/bench_page_raster.py [pdf ...]
+"""
+import os
+import sys
+import time
+
+import fitz
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from extractPDF import ExtractPDF
+
+dirname = os.path.dirname(__file__)
+DEFAULT_FILES = [
+    os.path.join(dirname, '..', 'pdf-example', name)
+    for name in ('English Test.pdf', 'Math Test.pdf', 'Physics Test.pdf')
+]
+
+def get_crops(file):
+    """Get the crops of a pdf ordered by page
+
+    Args:
+        file (str): link to the file
+
+    Returns:
+        list: list of (page's number, fitz.Rect)
+    """
+    data = ExtractPDF.extract_pdf(file, "")
+    crops = []
+    for key in data["questions"]:
+        for question in data["questions"][key]:
+            crops.append((question["page"], question["coor"][:4]))
+    for key in data["answers"]:
+        for option in data["answers"][key]["options"]:
+            crops.append((option[10], option[0:4]))
+            crops.append((option[10], option[5:9]))
+    crops = [(n_page, fitz.Rect(coor)) for n_page, coor in crops]
+    
+    return sorted([crop for crop in crops if not crop[1].is_empty], key=lambda crop: crop[0])
+
+def render(doc, crops, raster_cache=None):
+    start = time.perf_counter()
+    pixmaps = [ExtractPDF.get_crop_pixmap(doc[n_page], crop_box, raster_cache) for n_page, crop_box in crops]
+    
+    return pixmaps, len(crops) / (time.perf_counter() - start)
+
+def main(files):
+    for file in files:
+        crops = get_crops(file)
+        doc = fitz.open(file)
+        before, before_rate = render(doc, crops)
+        after, after_rate = render(doc, crops, ExtractPDF.PageRasterCache())
+        identical = sum(a.irect == b.irect and a.samples == b.samples for a, b in zip(before, after))
+        print(f"{os.path.basename(file)}: {len(crops)} crops, {identical} pixel-identical, "
+              f"cropped page {before_rate:.0f} crops/s, display list {after_rate:.0f} crops/s, x{after_rate / before_rate:.1f}")
+        doc.close()
+
+if __name__ == '__main__':
+    main(sys.argv[1:] or DEFAULT_FILES)
@@ -0,0 +1,73 @@
+"""Benchmark extract_pdf in a single process vs with worker processes reading pages (scan_workers, 1st phase)
+and rendering images (render_workers, 2nd phase)
+
+The exam is repeated to get a long document (Math Test.pdf 4 times: 100 pages).
+The results of every number of workers are checked to be identical to the single process ones.
+
+Usage:
+    python benchmarks/bench_parallel_extract.py [--repeat N] [--workers 2 4 8] [pdf]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import fitz
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from extractPDF import ExtractPDF
+
+dirname = os.path.dirname(__file__)
+DEFAULT_FILE = os.path.join(dirname, '..', 'pdf-example', 'Math Test.pdf')
+
+def make_long_pdf(file, repeat, output):
+    """Write the pdf repeated several times
+
+    Args:
+        file (str): link to the file
+        repeat (int): number of copies
+        output (str): link to the output's file
+
+    Returns:
+        int: number of pages
+    """
+    src = fitz.open(file)
+    doc = fitz.open()
+    for _ in range(repeat):
+        doc.insert_pdf(src)
+    doc.save(output)
+    n_page = doc.page_count
+    doc.close()
+    src.close()
+
+    return n_page
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('file', nargs='?', default=DEFAULT_FILE)
+    parser.add_argument('--repeat', type=int, default=4)
+    parser.add_argument('--workers', type=int, nargs='+', default=[2, 4, 8])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        file = os.path.join(tmp, 'long.pdf')
+        n_page = make_long_pdf(args.file, args.repeat, file)
+        print(f"{os.path.basename(args.file)} x{args.repeat}: {n_page} pages, {os.cpu_count()} cpus")
+
+        start = time.perf_counter()
+        reference = ExtractPDF.extract_pdf(file, "")
+        serial = time.perf_counter() - start
+        print(f"{'mode':>8} {'workers':>8} {'s':>8} {'speedup':>8} {'identical':>10}")
+        print(f"{'serial':>8} {1:>8} {serial:>8.2f} {1:>8.2f} {'-':>10}")
+
+        for workers in args.workers:
+            for mode, options in (('render', {'render_workers': workers}), ('scan', {'scan_workers': workers}),
+                                  ('both', {'render_workers': workers, 'scan_workers': workers})):
+                start = time.perf_counter()
+                data = ExtractPDF.extract_pdf(file, "", **options)
+                elapsed = time.perf_counter() - start
+                print(f"{mode:>8} {workers:>8} {elapsed:>8.2f} {serial / elapsed:>8.2f} {str(data == reference):>10}")
+
+if __name__ == '__main__':
+    main()
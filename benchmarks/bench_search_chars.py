@@ -0,0 +1,81 @@
+"""Benchmark finding the boxes of question titles and answer options on option-dense pages
+
+The exam is a synthetic one whose titles and options are inside the spans of text ("Câu 1. ..." and
+"A. ... B. ... C. ... D. ..." on one line), so the extraction searches their boxes in every question.
+Compares page.search_for (the page is read again at every search) with PageChars (the characters of a page are
+read once from rawdict). The results of both are checked to be identical.
+
+Usage:
+    python benchmarks/bench_search_chars.py [--pages 20] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import fitz
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from extractPDF import ExtractPDF
+from synthetic_exam import make_exam
+
+class SearchForChars:
+    """Search with page.search_for, as before PageChars"""
+
+    def __init__(self, page):
+        self.page = page
+
+    def search_for(self, needle, clip):
+        return self.page.search_for(needle, clip=fitz.Rect(clip[:4]))
+
+def count_searches(file):
+    searches = 0
+    original = ExtractPDF.PageChars.search_for
+
+    def search_for(self, needle, clip):
+        nonlocal searches
+        searches += 1
+        return original(self, needle, clip)
+
+    ExtractPDF.PageChars.search_for = search_for
+    try:
+        ExtractPDF.extract_pdf(file, "", render_images=False)
+    finally:
+        ExtractPDF.PageChars.search_for = original
+
+    return searches
+
+def time_extraction(file, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        data = ExtractPDF.extract_pdf(file, "", render_images=False)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, data
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        file = os.path.join(tmp, 'inline.pdf')
+        info = make_exam(file, args.pages, inline=True, explanations=False)
+        print(f"{info['pages']} pages, {info['questions']} questions, {count_searches(file)} searches")
+
+        get_page_chars = ExtractPDF.get_page_chars
+        ExtractPDF.get_page_chars = SearchForChars
+        try:
+            before, reference = time_extraction(file, args.repeat)
+        finally:
+            ExtractPDF.get_page_chars = get_page_chars
+        after, data = time_extraction(file, args.repeat)
+
+    print(f"page.search_for: {before:.3f} s")
+    print(f"PageChars:       {after:.3f} s, x{before / after:.2f}, identical: {data == reference}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+"""Benchmark extract_pdf on synthetic exams of several sizes and compare with a saved baseline
+
+Every size is generated with synthetic_exam.py and extracted --repeat times in a fresh process, with metrics=True.
+The median wall time of every phase (see ExtractionMetrics), pages per second and the peak memory of the process
+are recorded. Results can be saved as a json baseline and later runs compared with it, the command fails when a phase
+got slower than the threshold.
+
+Usage:
+    python benchmarks/bench_suite.py [--sizes 5 20 100 1000] [--no-images] [--options '{"render_workers": 4}']
+    python benchmarks/bench_suite.py --save benchmarks/baselines/baseline.json
+    python benchmarks/bench_suite.py --compare benchmarks/baselines/baseline.json [--threshold 0.1]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import fitz
+
+try:
+    import resource
+except ImportError:  # windows
+    resource = None
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from extractPDF import ExtractPDF
+from synthetic_exam import make_exam
+
+DEFAULT_SIZES = [5, 20, 100]
+# phases shorter than this (s) in the baseline are not compared, their time is mostly noise
+MIN_SECONDS = 0.05
+
+def get_peak_memory():
+    """Get the peak resident memory of the process
+
+    Returns:
+        float: peak memory (MB), None if it is not available
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, KB elsewhere
+    return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+
+def run_child(file, options):
+    """Extract a pdf in this process and print its metrics and peak memory as json
+    """
+    data = ExtractPDF.extract_pdf(file, "", metrics=True, **options)
+    metrics = data["metrics"]
+    print(json.dumps({"total": metrics["total"], "phases": metrics["phases"], "counts": metrics["counts"],
+                      "peak_memory_mb": get_peak_memory()}))
+
+def extract_in_process(file, options):
+    """Extract a pdf in a fresh process, so that the peak memory and the caches of a run do not leak into the next one
+
+    Args:
+        file (str): link to the file
+        options (dict): options given to extract_pdf
+
+    Returns:
+        dict: metrics of the extraction and peak memory of the process
+    """
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', file, json.dumps(options)],
+                            check=True, capture_output=True, text=True)
+
+    return json.loads(output.stdout.splitlines()[-1])
+
+def bench_size(directory, pages, language, repeat, options):
+    """Generate an exam and extract it several times
+
+    Returns:
+        dict: pages, questions and median times of the runs
+    """
+    file = os.path.join(directory, f"exam-{pages}.pdf")
+    start = time.perf_counter()
+    info = make_exam(file, pages, language=language)
+    generation = time.perf_counter() - start
+
+    runs = [extract_in_process(file, options) for _ in range(repeat)]
+    phases = sorted({name for run in runs for name in run["phases"]})
+    total = statistics.median(run["total"] for run in runs)
+    peak_memory = [run["peak_memory_mb"] for run in runs if run["peak_memory_mb"] is not None]
+
+    return {
+        "pages": info["pages"],
+        "questions": info["questions"],
+        "generation": generation,
+        "total": total,
+        "pages_per_second": info["pages"] / total if total else 0.0,
+        "phases": {name: statistics.median(run["phases"].get(name, 0.0) for run in runs) for name in phases},
+        "counts": runs[0]["counts"],
+        "peak_memory_mb": max(peak_memory) if peak_memory else None,
+    }
+
+def get_environment():
+    return {
+        "python": platform.python_version(),
+        "pymupdf": fitz.VersionBind,
+        "extractor": ExtractPDF.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+def run_suite(sizes, language="vi", repeat=3, options=None):
+    """Benchmark every size
+
+    Args:
+        sizes (list): numbers of pages
+        language (str, optional): language of the exams. Defaults to "vi".
+        repeat (int, optional): extractions of every size, the median is kept. Defaults to 3.
+        options (dict, optional): options given to extract_pdf. Defaults to None.
+
+    Returns:
+        dict: environment, options and results by number of pages
+    """
+    options = options or {}
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in sizes:
+            result = bench_size(tmp, pages, language, repeat, options)
+            results[str(pages)] = result
+            print_result(pages, result)
+
+    return {"environment": get_environment(), "language": language, "repeat": repeat, "options": options,
+            "results": results}
+
+def print_result(pages, result):
+    phases = " ".join(f"{name}={seconds:.3f}" for name, seconds in result["phases"].items())
+    memory = f"{result['peak_memory_mb']:.0f} MB" if result["peak_memory_mb"] is not None else "-"
+    print(f"{pages:>5} pages {result['questions']:>4} questions: {result['total']:>7.2f} s "
+          f"{result['pages_per_second']:>7.1f} pages/s, peak {memory}, {phases}")
+
+def compare(suite, baseline, threshold=0.1):
+    """Compare the times and peak memory of a run with a baseline
+
+    Args:
+        suite (dict): result of run_suite
+        baseline (dict): saved result of run_suite
+        threshold (float, optional): ratio over which a slower time is a regression. Defaults to 0.1 (10%).
+
+    Returns:
+        list: regressions, (pages, measure, baseline, new value)
+    """
+    if suite["options"] != baseline.get("options") or suite["environment"]["cpus"] != baseline["environment"]["cpus"]:
+        print("warning: the baseline was run with other options or on another machine", file=sys.stderr)
+
+    regressions = []
+    print(f"{'pages':>5} {'measure':>22} {'baseline':>10} {'new':>10} {'ratio':>7}")
+    for pages, result in suite["results"].items():
+        old = baseline["results"].get(pages)
+        if old is None:
+            continue
+        measures = [("total", old["total"], result["total"])]
+        measures += [(name, seconds, result["phases"].get(name, 0.0)) for name, seconds in old["phases"].items()]
+        if old.get("peak_memory_mb") and result["peak_memory_mb"]:
+            measures.append(("peak_memory_mb", old["peak_memory_mb"], result["peak_memory_mb"]))
+        for name, old_value, new_value in measures:
+            if name != "peak_memory_mb" and old_value < MIN_SECONDS:
+                continue
+            ratio = new_value / old_value
+            regressed = ratio > 1 + threshold
+            if regressed:
+                regressions.append((pages, name, old_value, new_value))
+            print(f"{pages:>5} {name:>22} {old_value:>10.3f} {new_value:>10.3f} {ratio:>7.2f}{' REGRESSION' if regressed else ''}")
+
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark extract_pdf on synthetic exams")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="numbers of pages (default: 5 20 100)")
+    parser.add_argument('--language', choices=('vi', 'en'), default='vi')
+    parser.add_argument('--repeat', type=int, default=3, help="extractions of every size, the median is kept (default: 3)")
+    parser.add_argument('--no-images', action='store_true', help="only extract coordinates")
+    parser.add_argument('--options', type=json.loads, default={}, help="options of extract_pdf as json")
+    parser.add_argument('--save', help="write the results to this json file")
+    parser.add_argument('--compare', help="json file of a baseline to compare with")
+    parser.add_argument('--threshold', type=float, default=0.1, help="slowdown ratio that fails the comparison (default: 0.1)")
+    parser.add_argument('--child', nargs=2, metavar=('FILE', 'OPTIONS'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child[0], json.loads(args.child[1]))
+        return 0
+
+    options = dict(args.options)
+    if args.no_images:
+        options['render_images'] = False
+    print(f"{os.cpu_count()} cpus, PyMuPDF {fitz.VersionBind}, extractor {ExtractPDF.__version__}, options {options}")
+    suite = run_suite(args.sizes, args.language, args.repeat, options)
+
+    if args.save:
+        os.makedirs(os.path.dirname(args.save) or '.', exist_ok=True)
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(suite, f, indent=4)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(suite, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regressions over {args.threshold:.0%}")
+            return 1
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""Benchmark the bytes saved per crop by trimming the white margins of crops (ImageEncoder(trim_margins=True))
+
+The crops are the boxes of questions and answer options found by extract_pdf. Every crop is encoded as it is and
+trimmed, the pixels, bytes (base 64) and time per crop are printed per image format.
+
+Usage:
+    python benchmarks/bench_trim_margins.py [pdf ...]
+"""
+import os
+import sys
+import time
+
+import fitz
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from extractPDF import ExtractPDF
+from bench_page_raster import DEFAULT_FILES, get_crops
+
+FORMATS = {
+    "png (mupdf)": {"image_format": "png"},
+    "webp q80": {"image_format": "webp", "quality": 80},
+    "jpeg q85": {"image_format": "jpeg", "quality": 85},
+}
+
+def measure(pixmaps, renderer):
+    """Clean and encode every pixmap
+
+    Returns:
+        tuple: pixels, bytes and ms per crop
+    """
+    start = time.perf_counter()
+    pixels = size = 0
+    for pix in pixmaps:
+        pix = renderer.clean(pix)
+        pixels += pix.width * pix.height
+        size += len(renderer.image_encoder.to_data_uri(pix))
+    elapsed = time.perf_counter() - start
+
+    return pixels / len(pixmaps), size / len(pixmaps), elapsed * 1000 / len(pixmaps)
+
+def main(files):
+    pixmaps = []
+    for file in files:
+        doc = fitz.open(file)
+        renderer = ExtractPDF.CropRenderer()
+        pixmaps += [renderer.get_pixmap(doc[n_page], crop_box) for n_page, crop_box in get_crops(file)]
+        doc.close()
+
+    print(f"{len(pixmaps)} crops")
+    for name, options in FORMATS.items():
+        pixels, size, ms = measure(pixmaps, ExtractPDF.CropRenderer(ExtractPDF.ImageEncoder(**options)))
+        trimmed_pixels, trimmed_size, trimmed_ms = measure(pixmaps, ExtractPDF.CropRenderer(ExtractPDF.ImageEncoder(**options, trim_margins=True)))
+        print(f"{name:>12}: {size / 1024:6.1f} KB/crop, {ms:5.2f} ms/crop | trimmed: {trimmed_size / 1024:6.1f} KB/crop "
+              f"({(size - trimmed_size) / 1024:+5.2f} KB saved), {trimmed_ms:5.2f} ms/crop, "
+              f"pixels {(1 - trimmed_pixels / pixels) * 100:.1f}% fewer")
+
+if __name__ == '__main__':
+    main(sys.argv[1:] or DEFAULT_FILES)
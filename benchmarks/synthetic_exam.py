@@ -0,0 +1,308 @@
+"""Generate synthetic exams in the format recognised by ExtractPDF
+
+An exam has numbered questions ("Câu 1." or "Question 1:") with four answer options laid out on 1, 2 or 4 columns
+and optional images, the end marker "HẾT", an answer key table ("BẢNG ĐÁP ÁN") and an explanation section
+("LỜI GIẢI CHI TIẾT", one "Lời giải" per question). The text is random but reproducible (seed).
+
+A unicode TrueType font is needed for the Vietnamese markers, common system fonts are searched (see FONT_CANDIDATES).
+
+Usage:
+    python benchmarks/synthetic_exam.py output.pdf --pages 100 [--questions 50] [--language en] [--layouts 4 2 1] [--seed 0]
+"""
+import argparse
+import os
+import random
+
+import fitz
+
+# regular and bold fonts searched in this order
+FONT_CANDIDATES = [
+    ("/usr/share/fonts/truetype/dejavu/DejaVuSerif.ttf", "/usr/share/fonts/truetype/dejavu/DejaVuSerif-Bold.ttf"),
+    ("/usr/share/fonts/TTF/DejaVuSerif.ttf", "/usr/share/fonts/TTF/DejaVuSerif-Bold.ttf"),
+    ("/usr/share/fonts/truetype/liberation/LiberationSerif-Regular.ttf", "/usr/share/fonts/truetype/liberation/LiberationSerif-Bold.ttf"),
+    ("/Library/Fonts/Times New Roman.ttf", "/Library/Fonts/Times New Roman Bold.ttf"),
+    ("C:/Windows/Fonts/times.ttf", "C:/Windows/Fonts/timesbd.ttf"),
+]
+
+WORDS = {
+    "vi": ("hàm số đồ thị phương trình nghiệm tập hợp giá trị lớn nhất nhỏ nhất của trên khoảng đoạn "
+           "biết rằng tính diện tích hình nón trụ cầu bán kính chiều cao đường thẳng mặt phẳng điểm "
+           "vectơ tọa độ số phức môđun xác suất cấp số cộng nhân công sai đạo hàm nguyên hàm tích phân").split(),
+    "en": ("the student teacher school library decided would have been because although however which "
+           "environment technology energy science history museum garden weather holiday friendly "
+           "important necessary finish improve discover protect describe suggest remember").split(),
+}
+
+MARKERS = {
+    "vi": {"title": "KỲ THI THỬ TỐT NGHIỆP THPT", "subject": "Bài thi: TOÁN", "question": "Câu {}.",
+           "page": "Trang {}/{}"},
+    "en": {"title": "KỲ THI THỬ TỐT NGHIỆP THPT", "subject": "MÔN: TIẾNG ANH", "question": "Question {}:",
+           "page": "Trang {}/{}"},
+}
+END_MARKER = "------ HẾT ------"
+ANSWER_KEY_MARKER = "BẢNG ĐÁP ÁN"
+EXPLAIN_SECTION_MARKER = "LỜI GIẢI CHI TIẾT"
+EXPLAIN_MARKER = "Lời giải"
+OPTIONS = "ABCD"
+# the answer key of more questions would not fit on one page, the extraction reads it on a single page
+MAX_QUESTIONS = 200
+
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+MARGIN = 50
+FONT_SIZE = 11
+LINE_HEIGHT = 16
+OPTION_COLOR = (0, 0, 1)
+# bold and color of the titles of answer options
+OPTION_STYLE = (True, OPTION_COLOR)
+
+def find_fonts():
+    """Find a regular and a bold unicode font
+
+    Returns:
+        tuple: links to the regular and bold fonts
+    """
+    for regular, bold in FONT_CANDIDATES:
+        if os.path.exists(regular) and os.path.exists(bold):
+            return regular, bold
+    raise FileNotFoundError("no unicode font found, give --font and --bold-font")
+
+class ExamWriter:
+    """Write lines of text from top to bottom, starting a new page when the page is full
+    """
+
+    def __init__(self, doc, font, bold_font):
+        self.doc = doc
+        self.font = font
+        self.bold_font = bold_font
+        self.fonts = {False: fitz.Font(fontfile=font), True: fitz.Font(fontfile=bold_font)}
+        self.page = None
+        # text written with the same color, written to the page at once (much faster than page.insert_text)
+        self.text_writer = None
+        self.color = None
+        self.y = 0
+        self.image_xref = 0
+
+    def new_page(self):
+        self.flush()
+        self.page = self.doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        self.y = MARGIN + 30
+
+    def flush(self):
+        """Write the pending text to the current page, the order of text in the page is kept for the extraction
+        """
+        if self.text_writer is not None:
+            self.text_writer.write_text(self.page, color=self.color)
+        self.text_writer = None
+
+    def ensure_space(self, height):
+        if self.page is None or self.y + height > PAGE_HEIGHT - MARGIN:
+            self.new_page()
+
+    def text_width(self, text, bold=False):
+        return self.fonts[bold].text_length(text, FONT_SIZE)
+
+    def write(self, x, text, bold=False, color=(0, 0, 0)):
+        """Write text at x on the current line
+
+        Returns:
+            float: x at the end of text
+        """
+        if self.text_writer is None or color != self.color:
+            self.flush()
+            self.text_writer = fitz.TextWriter(self.page.rect)
+            self.color = color
+        _, end = self.text_writer.append((x, self.y), text, font=self.fonts[bold], fontsize=FONT_SIZE)
+
+        return end.x
+
+    def next_line(self, n=1):
+        self.y += LINE_HEIGHT * n
+
+    def paragraph(self, words, x=MARGIN, first_x=None):
+        """Write words wrapped to the width of page, the first line starting at first_x
+        """
+        x_line = first_x if first_x is not None else x
+        line = ""
+        for word in words:
+            candidate = f"{line} {word}" if line else word
+            if x_line + self.text_width(candidate) > PAGE_WIDTH - MARGIN:
+                self.write(x_line, line)
+                self.next_line()
+                self.ensure_space(LINE_HEIGHT)
+                x_line = x
+                line = word
+            else:
+                line = candidate
+        if line:
+            self.write(x_line, line)
+        self.next_line()
+
+    def image(self, height=60):
+        """Insert an image (a gradient) under the current line, the image is stored once in the document
+        """
+        self.ensure_space(height + LINE_HEIGHT)
+        rect = fitz.Rect(MARGIN + 40, self.y - FONT_SIZE + 4, MARGIN + 40 + height * 2, self.y - FONT_SIZE + 4 + height)
+        if self.image_xref == 0:
+            samples = bytes(value for y in range(60) for x in range(120) for value in (2 * x, 4 * y, 128))
+            pix = fitz.Pixmap(fitz.csRGB, 120, 60, samples, False)
+            self.image_xref = self.page.insert_image(rect, pixmap=pix)
+        else:
+            self.page.insert_image(rect, xref=self.image_xref)
+        self.y += height + 4
+
+def write_question(writer, rng, words, label, layout, with_image, inline=False, option_style=OPTION_STYLE):
+    """Write a question: title, text, optional image and four answer options on layout columns
+
+    Inline questions have their title in the text's span and the four options in a single span on one line
+    ("A. ... B. ... C. ... D. ..."), the extraction finds the boxes of titles and options inside the spans.
+
+    Returns:
+        str: letter of the correct option
+    """
+    writer.ensure_space(LINE_HEIGHT * 4)
+    if inline:
+        writer.paragraph([label] + rng.choices(words, k=rng.randint(8, 30)))
+    else:
+        x = writer.write(MARGIN, label, bold=True)
+        writer.paragraph(rng.choices(words, k=rng.randint(8, 30)), first_x=x + 4)
+    if with_image:
+        writer.image()
+
+    if inline:
+        writer.ensure_space(LINE_HEIGHT)
+        writer.write(MARGIN + 20, "   ".join(f"{letter}. {rng.choice(words)}" for letter in OPTIONS))
+        writer.next_line()
+        return rng.choice(OPTIONS)
+
+    per_line = layout
+    column_width = (PAGE_WIDTH - 2 * MARGIN - 20) / per_line
+    writer.ensure_space(LINE_HEIGHT * (4 // per_line))
+    for i, letter in enumerate(OPTIONS):
+        column = i % per_line
+        x = writer.write(MARGIN + 20 + column * column_width, f"{letter}. ", bold=option_style[0], color=option_style[1])
+        writer.write(x, " ".join(rng.choices(words, k=rng.randint(1, 3 if per_line == 4 else 6))))
+        if column == per_line - 1:
+            writer.next_line()
+
+    return rng.choice(OPTIONS)
+
+def make_exam(path, pages=5, questions=None, language="vi", layouts=(4, 2, 1), image_every=5, answer_key=True,
+              explanations=True, seed=0, font=None, bold_font=None, inline=False, first_option_style=None):
+    """Write a synthetic exam
+
+    Args:
+        path (str): link to the output's file
+        pages (int, optional): number of pages, the explanations are lengthened to fill them. Defaults to 5.
+        questions (int, optional): number of questions. Defaults to None, 3 per page up to MAX_QUESTIONS.
+        language (str, optional): "vi" or "en", language of the question titles and text. Defaults to "vi".
+        layouts (tuple, optional): columns of answer options (1, 2 or 4), used in turn by questions. Defaults to (4, 2, 1).
+        image_every (int, optional): one question out of image_every has an image, 0 for none. Defaults to 5.
+        answer_key (bool, optional): write the answer key table. Defaults to True.
+        explanations (bool, optional): write the explanation section. Defaults to True.
+        seed (int, optional): seed of the random text. Defaults to 0.
+        font (str, optional): link to a regular unicode font. Defaults to None, see find_fonts.
+        bold_font (str, optional): link to a bold unicode font. Defaults to None, see find_fonts.
+        inline (bool, optional): write titles and options inside the text's spans (see write_question). Defaults to False.
+        first_option_style (tuple, optional): bold and color of the option titles of question 1 (exp: an example question
+            written differently). Defaults to None, OPTION_STYLE like the other questions.
+
+    Returns:
+        dict: number of pages and questions, correct options
+    """
+    if font is None or bold_font is None:
+        font, bold_font = find_fonts()
+    rng = random.Random(seed)
+    words = WORDS[language]
+    markers = MARKERS[language]
+    doc = fitz.open()
+    writer = ExamWriter(doc, font, bold_font)
+
+    writer.new_page()
+    writer.write(MARGIN + 120, markers["title"], bold=True)
+    writer.next_line()
+    writer.write(MARGIN + 170, markers["subject"], bold=True)
+    writer.next_line(2)
+
+    if questions is None:
+        questions = min(MAX_QUESTIONS, max(5, 3 * pages))
+    correct_options = []
+    for num_q in range(1, questions + 1):
+        layout = layouts[(num_q - 1) % len(layouts)]
+        with_image = image_every > 0 and num_q % image_every == 0
+        option_style = first_option_style if num_q == 1 and first_option_style is not None else OPTION_STYLE
+        correct_options.append(write_question(writer, rng, words, markers["question"].format(num_q), layout, with_image, inline, option_style))
+    writer.ensure_space(LINE_HEIGHT * 2)
+    writer.write(PAGE_WIDTH / 2 - 50, END_MARKER, bold=True)
+    writer.next_line()
+
+    if answer_key:
+        writer.new_page()
+        writer.write(PAGE_WIDTH / 2 - 40, ANSWER_KEY_MARKER, bold=True)
+        writer.next_line(2)
+        for i, letter in enumerate(correct_options):
+            if i % 10 == 0 and i > 0:
+                writer.next_line()
+                writer.ensure_space(LINE_HEIGHT)
+            writer.write(MARGIN + (i % 10) * 48, f"{i + 1}.{letter}")
+        writer.next_line(2)
+
+    if explanations:
+        writer.ensure_space(LINE_HEIGHT * 6)
+        writer.write(PAGE_WIDTH / 2 - 60, EXPLAIN_SECTION_MARKER, bold=True)
+        writer.next_line()
+        lines_per_page = (PAGE_HEIGHT - 2 * MARGIN - 30) // LINE_HEIGHT
+        for i, letter in enumerate(correct_options):
+            # lines of explanation to fill the remaining pages, shared by the remaining questions
+            remaining_lines = (pages - len(doc)) * lines_per_page + (PAGE_HEIGHT - MARGIN - writer.y) // LINE_HEIGHT
+            # (5 lines of title, marker and choice, 1 blank line every 4 lines)
+            explain_lines = max(1, int((remaining_lines // (len(correct_options) - i) - 5) * 4 / 5))
+            writer.ensure_space(LINE_HEIGHT * 4)
+            x = writer.write(MARGIN, markers["question"].format(i + 1), bold=True)
+            writer.paragraph(rng.choices(words, k=rng.randint(6, 12)), first_x=x + 4)
+            writer.write(MARGIN + 200, EXPLAIN_MARKER, bold=True)
+            writer.next_line()
+            writer.write(MARGIN, f"Chọn {letter}", bold=True)
+            writer.next_line()
+            for j in range(explain_lines):
+                writer.ensure_space(LINE_HEIGHT)
+                writer.write(MARGIN, " ".join(rng.choices(words, k=12)))
+                # paragraphs of a few lines, a page holding a single block of text ends the extraction
+                writer.next_line(2 if j % 4 == 3 else 1)
+
+    writer.flush()
+    # header with the page number, removed as a header by the extraction
+    for i, page in enumerate(doc):
+        text_writer = fitz.TextWriter(page.rect)
+        text_writer.append((PAGE_WIDTH - MARGIN - 60, MARGIN - 10), markers["page"].format(i + 1, len(doc)),
+                           font=writer.fonts[False], fontsize=9)
+        text_writer.write_text(page)
+
+    n_page = len(doc)
+    doc.save(path, garbage=3, deflate=True)
+    doc.close()
+
+    return {"pages": n_page, "questions": len(correct_options), "correct_options": correct_options}
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic exam")
+    parser.add_argument("output")
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--questions", type=int, default=None)
+    parser.add_argument("--language", choices=sorted(WORDS), default="vi")
+    parser.add_argument("--layouts", type=int, nargs="+", choices=(1, 2, 4), default=[4, 2, 1])
+    parser.add_argument("--image-every", type=int, default=5)
+    parser.add_argument("--no-answer-key", action="store_true")
+    parser.add_argument("--no-explanations", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--font")
+    parser.add_argument("--bold-font")
+    parser.add_argument("--inline", action="store_true", help="titles and options inside the text's spans")
+    args = parser.parse_args()
+
+    info = make_exam(args.output, args.pages, args.questions, args.language, tuple(args.layouts), args.image_every,
+                     not args.no_answer_key, not args.no_explanations, args.seed, args.font, args.bold_font, args.inline)
+    print(f"{args.output}: {info['pages']} pages, {info['questions']} questions")
+
+if __name__ == "__main__":
+    main()
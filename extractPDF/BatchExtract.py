@@ -0,0 +1,248 @@
+"""Extract every pdf of a directory or glob on a pool of worker processes.
+
+    python -m extractPDF.BatchExtract pdf-example -o output --workers 4
+    python -m extractPDF.BatchExtract "exams/**/*.pdf" -o output --format jsonl
+
+Each pdf gets one result file in the output folder, at the same relative path with the extension
+.json (result of extract_pdf) or .jsonl (one line per question), and a .meta file next to it with the
+version of the extractor and the options of the result. Files whose result is newer than the pdf and was
+extracted by the same version with the same options are skipped, so an interrupted run resumes where it stopped.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import fitz
+
+from extractPDF import ExtractPDF
+
+OUTPUT_FORMATS = ("json", "jsonl")
+
+def find_pdfs(source):
+    """Find the pdfs of a directory (searched recursively) or a glob
+
+    Args:
+        source (str): directory or glob
+
+    Returns:
+        list: links to the pdfs, sorted
+    """
+    if os.path.isdir(source):
+        source = os.path.join(source, "**", "*.pdf")
+    files = glob.glob(source, recursive=True)
+
+    return sorted(f for f in files if os.path.isfile(f) and f.lower().endswith(".pdf"))
+
+def get_page_count(file):
+    """Get the number of pages of a pdf
+
+    Args:
+        file (str): link to the pdf
+
+    Returns:
+        int: number of pages, 0 if the pdf cannot be opened
+    """
+    try:
+        with fitz.open(file) as doc:
+            return doc.page_count
+    except Exception:
+        return 0
+
+def get_output_path(file, base, output_dir, output_format):
+    relative = os.path.relpath(file, base)
+    return os.path.join(output_dir, os.path.splitext(relative)[0] + "." + output_format)
+
+def get_meta_path(output):
+    return output + ".meta"
+
+def get_meta(image_format=None, render_images=True):
+    """Get the version of the extractor and the options a result is extracted with
+
+    Args:
+        image_format (str, optional): format of images (see ImageEncoder). Defaults to None, PNG.
+        render_images (bool, optional): create images. Defaults to True.
+
+    Returns:
+        dict: version and options, as written in the .meta file of a result
+    """
+    return {"version": ExtractPDF.__version__, "options": {"image_format": image_format, "render_images": render_images}}
+
+def is_up_to_date(file, output, meta):
+    """Tell whether the result of a pdf is newer than the pdf and was extracted by the same version with the same options
+
+    Args:
+        file (str): link to the pdf
+        output (str): link to the result's file
+        meta (dict): version and options of the run (see get_meta)
+
+    Returns:
+        bool: True if the result can be kept
+    """
+    meta_path = get_meta_path(output)
+    if not os.path.exists(output) or not os.path.exists(meta_path) or os.path.getmtime(output) < os.path.getmtime(file):
+        return False
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            return json.load(f) == meta
+    except (OSError, ValueError):
+        return False
+
+def get_question_records(data):
+    """Group the result of extract_pdf by question
+
+    Args:
+        data (dict): result of extract_pdf
+
+    Returns:
+        list: one dict per question with its title, content, answer options, correct option and explanation
+    """
+    records = []
+    for name in data["questions"]:
+        records.append({
+            "question": name,
+            "title": data["titles"].get(name),
+            "content": data["questions"][name],
+            "options": data["answers"].get(name, {}).get("options", []),
+            "correct_option": data["correct_options"].get(name),
+            "explain": data["explains"].get(name, []),
+        })
+
+    return records
+
+def write_file(output, write):
+    """Write a file through a temporary file, so that an interrupted write leaves the previous file
+
+    Args:
+        output (str): link to the file
+        write (function): writes the content to the opened file
+    """
+    output_tmp = f"{output}.{os.getpid()}.tmp"
+    with open(output_tmp, "w", encoding="utf-8") as f:
+        write(f)
+    os.replace(output_tmp, output)
+
+def write_result(data, output, output_format, meta):
+    """Write a result then its .meta file, so that an interrupted write never looks up to date
+
+    Args:
+        data (dict): result of extract_pdf
+        output (str): link to the result's file
+        output_format (str): json or jsonl
+        meta (dict): version and options of the result (see get_meta)
+    """
+    def write_data(f):
+        if output_format == "jsonl":
+            for record in get_question_records(data):
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        else:
+            json.dump(data, f, ensure_ascii=False)
+
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    # a result written without its .meta file is extracted again by the next run
+    meta_path = get_meta_path(output)
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+    write_file(output, write_data)
+    write_file(meta_path, lambda f: json.dump(meta, f))
+
+def extract_file(file, output, output_format, image_format=None, render_images=True):
+    """Extract a pdf in a worker process and write its result
+
+    Args:
+        file (str): link to the pdf
+        output (str): link to the result's file
+        output_format (str): json or jsonl
+        image_format (str, optional): format of images (see ImageEncoder). Defaults to None, PNG.
+        render_images (bool, optional): create images. Defaults to True.
+
+    Returns:
+        float: time of the extraction (s)
+    """
+    start = time.perf_counter()
+    image_encoder = ExtractPDF.ImageEncoder(image_format) if image_format else None
+    data = ExtractPDF.extract_pdf(file, "", image_encoder, render_images)
+    write_result(data, output, output_format, get_meta(image_format, render_images))
+
+    return time.perf_counter() - start
+
+def run_batch(source, output_dir, workers=None, output_format="json", image_format=None, render_images=True, force=False):
+    """Extract the pdfs of a directory or glob, the largest files first
+
+    Args:
+        source (str): directory or glob
+        output_dir (str): folder of the results
+        workers (int, optional): number of worker processes. Defaults to None, the number of cpus.
+        output_format (str, optional): json or jsonl. Defaults to "json".
+        image_format (str, optional): format of images (see ImageEncoder). Defaults to None, PNG.
+        render_images (bool, optional): create images. Defaults to True.
+        force (bool, optional): extract files whose result is up to date (see is_up_to_date). Defaults to False.
+
+    Returns:
+        dict: summary of the run
+    """
+    start = time.perf_counter()
+    files = find_pdfs(source)
+    # results keep the path of the pdfs relative to the folder holding all of them
+    base = os.path.commonpath([os.path.dirname(os.path.abspath(f)) for f in files]) if files else ""
+
+    meta = get_meta(image_format, render_images)
+    jobs = []
+    skipped = 0
+    for file in files:
+        output = get_output_path(os.path.abspath(file), base, output_dir, output_format)
+        if not force and is_up_to_date(file, output, meta):
+            skipped += 1
+            continue
+        jobs.append((get_page_count(file), file, output))
+    # the largest files first, so that a long file does not start last and keep a single worker busy
+    jobs.sort(key=lambda job: -job[0])
+
+    summary = {"documents": 0, "pages": 0, "skipped": skipped, "failures": []}
+    if jobs:
+        with ProcessPoolExecutor(workers) as executor:
+            futures = {executor.submit(extract_file, file, output, output_format, image_format, render_images): (pages, file)
+                       for pages, file, output in jobs}
+            for future in as_completed(futures):
+                pages, file = futures[future]
+                try:
+                    seconds = future.result()
+                except Exception as e:
+                    summary["failures"].append({"file": file, "error": repr(e)})
+                    print(f"FAILED {file}: {e!r}", file=sys.stderr)
+                    continue
+                summary["documents"] += 1
+                summary["pages"] += pages
+                print(f"{file}: {pages} pages in {seconds:.2f} s")
+
+    elapsed = time.perf_counter() - start
+    summary["seconds"] = elapsed
+    summary["documents_per_second"] = summary["documents"] / elapsed if elapsed else 0.0
+    summary["pages_per_second"] = summary["pages"] / elapsed if elapsed else 0.0
+
+    return summary
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract every pdf of a directory or glob on a pool of worker processes")
+    parser.add_argument("source", help="directory (searched recursively) or glob of pdfs")
+    parser.add_argument("-o", "--output", default="output", help="folder of the results (default: output)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="number of worker processes (default: number of cpus)")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="json",
+                        help="json: result of extract_pdf, jsonl: one line per question (default: json)")
+    parser.add_argument("--image-format", choices=sorted(ExtractPDF.IMAGE_FORMATS), default=None, help="format of images (default: png)")
+    parser.add_argument("--no-images", action="store_true", help="only extract coordinates")
+    parser.add_argument("--force", action="store_true", help="extract files whose result is up to date")
+    args = parser.parse_args(argv)
+
+    summary = run_batch(args.source, args.output, args.workers, args.format, args.image_format, not args.no_images, args.force)
+    print(f"{summary['documents']} documents, {summary['pages']} pages in {summary['seconds']:.2f} s "
+          f"({summary['documents_per_second']:.2f} docs/s, {summary['pages_per_second']:.2f} pages/s), "
+          f"{summary['skipped']} up to date, {len(summary['failures'])} failures")
+
+    return 1 if summary["failures"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,23 +1,100 @@
-from collections import defaultdict
+from collections import Counter, defaultdict
 import fitz
 import json
 import re
-import copy
 import os
 import base64
+import io
+import math
+import time
+import weakref
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-def extract_pdf(file, path_root_output):
+from extractPDF.Geometry import Box, BoxIndex, Span
+from extractPDF.Instrumentation import ExtractionMetrics, ExtractionTrace, current_metrics, current_trace, measure, trace_span, traced
+from extractPDF.OptionLayout import OPTION_LETTERS, layout_options
+
+# version of the extraction. Change it whenever the extracted result changes, cached results are keyed on it
+__version__ = "1.4.5"
+
+def extract_pdf(file, path_root_output, image_encoder=None, render_images=True, render_workers=None, scan_workers=None, metrics=False, trace=None):
     """Main function to extract pdf
 
     Args:
-        file (str): link to the file
+        file (str, bytes or file): link to the file, content of the pdf or stream of the pdf (exp: an upload, read once)
         path_root_output (str): link to the output's file
+        image_encoder (ImageEncoder, optional): encoder of images (format and compression). Defaults to None, PNG.
+        render_images (bool, optional): create base 64 images. Defaults to True. If False, only coordinates are returned and the images are left empty (see render_crop).
+        render_workers (int, optional): number of worker processes rendering images, by page. Defaults to None, images are rendered in this process.
+        scan_workers (int, optional): number of worker processes reading the layout of pages and tagging their lines before the 1st phase. Defaults to None, pages are read in this process during the 1st phase.
+        metrics (bool, optional): add a "metrics" section with the wall time of phases and pages and the counts of crops rendered,
+            bytes encoded and lines classified (see ExtractionMetrics). Defaults to False.
+        trace (str, optional): link to a Chrome trace-event json file receiving the spans of the extraction (see ExtractionTrace). Defaults to None.
 
     Returns:
         list: list containing coordinates and base 64 image of questions's content, answer options, question titles, page, and correct_options
     """
-    doc = fitz.open(file)
+    # a stream is read once, worker processes are given its content
+    if hasattr(file, "read"):
+        file = file.read()
+    if not metrics and trace is None:
+        return extract_pdf_phases(file, path_root_output, image_encoder, render_images, render_workers, scan_workers)
+
+    extraction_metrics = ExtractionMetrics() if metrics else None
+    extraction_trace = ExtractionTrace(str(file) if isinstance(file, (str, Path)) else "pdf") if trace is not None else None
+    metrics_token = current_metrics.set(extraction_metrics)
+    trace_token = current_trace.set(extraction_trace)
+    try:
+        with trace_span("extract_pdf"):
+            result = extract_pdf_phases(file, path_root_output, image_encoder, render_images, render_workers, scan_workers)
+    finally:
+        current_metrics.reset(metrics_token)
+        current_trace.reset(trace_token)
+        if extraction_trace is not None:
+            extraction_trace.write(trace)
+    if extraction_metrics is not None:
+        result["metrics"] = extraction_metrics.to_dict()
+
+    return result
+
+def open_pdf(file):
+    """Open a pdf from a link or from memory
+
+    Args:
+        file (str or bytes): link to the file or content of the pdf
+
+    Returns:
+        Document: opened pdf
+    """
+    if isinstance(file, (bytes, bytearray)):
+        return fitz.open(stream=file, filetype="pdf")
+
+    return fitz.open(file)
+
+# document of a worker process of the pools reading or rendering pages (see open_worker_pdf)
+worker_doc = None
+
+def open_worker_pdf(file):
+    """Open the pdf of a worker process when it starts, as the initializer of a pool: the pdf (its link or its content)
+    is sent once to every worker instead of with every task
+
+    Args:
+        file (str or bytes): link to the file or content of the pdf
+    """
+    global worker_doc
+    worker_doc = open_pdf(file)
+
+def extract_pdf_phases(file, path_root_output, image_encoder=None, render_images=True, render_workers=None, scan_workers=None):
+    """Run the two phases of extract_pdf (see extract_pdf for the arguments)
+
+    Returns:
+        dict: questions, answers, titles, correct_options and explains
+    """
+    metrics = current_metrics.get()
+    trace = current_trace.get()
+    with measure("open"):
+        doc = open_pdf(file)
     n_page = doc.page_count
     num_q = 1
     questions = []
@@ -32,8 +109,16 @@ def extract_pdf(file, path_root_output):
     # --- 4: explain
     # --- 99: end of processing questions and answers
     
+    # pages are read once and shared by the passes below, until the 1st phase is done with them
+    session = LayoutSession(doc)
+
+    # headers and footers repeated in the document, found on a sample of pages
+    with measure("header_footer"):
+        header_footer = HeaderFooterIndex((session.get(i_page) for i_page in sample_pages(n_page)), doc[0].rect.height)
+
     # check first question to get ascender_descender_option
-    answers_options = get_question_0(doc[0])
+    with measure("question_0"):
+        answers_options = get_question_0(doc[0], header_footer, session.get(0))
 
     # -- get ascender_descender_option
     # use ascender_descender_option to identify the correct answer option title 
@@ -55,8 +140,23 @@ def extract_pdf(file, path_root_output):
     # 2nd phase: from the information in 1st part, check if information is correct and create images
     
     # 1st phase: go through all pages and find all information
+    # with workers, the layout and line's tags of pages are found in parallel first (they do not depend on the state below),
+    # then the pages are gone through in order
+    scanned = scan_workers is not None and scan_workers > 1
+    if scanned:
+        with measure("scan_workers"):
+            layouts = scan_page_layouts(file, n_page, scan_workers, header_footer)
+        session.add_layouts(enumerate(layouts))
+        if metrics is not None:
+            metrics.count("line_classifications", sum(1 for layout in layouts for block in layout for line in block.get("lines", []) if "tags" in line))
+        del layouts
+
+    phase_start = time.perf_counter()
     for i_page in range(n_page):    
-        blocks = get_json_page(doc[i_page], type_flag, i_page)
+        page_start = time.perf_counter()
+        blocks = get_json_page(doc[i_page], type_flag, i_page, session.get(i_page), header_footer)
+        # the 1st phase is the last pass over the layouts
+        session.release(i_page)
         if len(blocks) == 0:
             break
 
@@ -70,7 +170,7 @@ def extract_pdf(file, path_root_output):
             explains.append([i_page, data[2]])
         # --- case correct answer ---------------------------
         elif type_flag == 99:
-            data = process_correct_answer(blocks)
+            data = process_correct_answer(BlockCursor(blocks))
 
         # order of list's returning values 
         # -- 0: questions
@@ -97,30 +197,60 @@ def extract_pdf(file, path_root_output):
                 type_flag = data[5]
             if len(data) > 6:
                 append_reading = data[6]
+
+        if metrics is not None:
+            metrics.add_page_time(i_page, "phase_1", time.perf_counter() - page_start)
+        if trace is not None:
+            trace.add_span("page", page_start, time.perf_counter(), {"page": i_page, "type_flag": type_flag})
+    if metrics is not None:
+        metrics.add_phase_time("phase_1", time.perf_counter() - phase_start)
     
+    # the style of question 1 only decides whether the document has answer options,
+    # answer option's titles are told from the other ones with the style found over all questions
+    if len(ascender_descender_option) > 0:
+        with measure("option_style"):
+            ascender_descender_option = get_document_option_style(questions, ascender_descender_option)
+
     coor_x = [1000, 0]
+
+    # with workers, crops are only collected here and rendered by page in worker processes
+    renderer = None
+    if render_images and render_workers is not None and render_workers > 1:
+        renderer = DeferredCropRenderer(image_encoder)
     
     coor_explains_result = {}
     if len(explains) > 0: # pdf has explanation
-        coor_explains_result = process_explain_base64(explains, coor_x, doc, path_root_output)
+        with measure("explains"):
+            coor_explains_result = process_explain_base64(explains, coor_x, doc, path_root_output, image_encoder, render_images, renderer)
     
     # question 0 includes extra information (date, name of test, etc) before question 1 is found
     # no need to create image of question 0
     questions[0][1].pop('question_0', None)
     
     # 2nd phase: process information after collecting it from 1st phase
-    data_question = process_question_and_answers(questions, doc, coor_x, ascender_descender_option)
+    with measure("questions_and_answers"):
+        data_question = process_question_and_answers(questions, doc, coor_x, ascender_descender_option, image_encoder, render_images, renderer)
 
     doc.close()
 
-    return {
+    result = {
         "questions": data_question[0],
         "answers": data_question[1],
         "titles": data_question[2],
         "correct_options": correct_answers,
         "explains": coor_explains_result
     }
+    if isinstance(renderer, DeferredCropRenderer):
+        with measure("render_workers"):
+            images = render_deferred_crops(file, renderer.crops, image_encoder, renderer.scale, render_workers)
+        result = fill_deferred_images(result, images)
+        if metrics is not None:
+            metrics.count("crops_rendered", len(images))
+            metrics.count("bytes_encoded", sum(get_data_uri_size(image) for image, _ in images))
+
+    return result
 
+@traced
 def perform_traversal_questions_set(page, blocks, num_q, explain_previous, append_reading):
     """Collect information of questions 
 
@@ -135,11 +265,11 @@ def perform_traversal_questions_set(page, blocks, num_q, explain_previous, appen
         list: list containing returning type, questions, number of questions, explanation and answer options
     """
     # -- params question --
-    questions = {}
+    questions = BoxIndex()
     # -- params answer --
     answers_options = {}
     # -- params explanation --
-    explains = {}
+    explains = BoxIndex()
 
     flag_explain_in_question = False
     len_explains = len(explain_previous)
@@ -150,7 +280,7 @@ def perform_traversal_questions_set(page, blocks, num_q, explain_previous, appen
     first_essay = False
     type_flag = 0
 
-    for block in blocks:                    
+    for i_block, block in enumerate(blocks):                    
         # --- mediabox out of rect ----
         if check_mediabox_block(block) or check_mediabox_height(block, page_height):    
             continue
@@ -163,9 +293,10 @@ def perform_traversal_questions_set(page, blocks, num_q, explain_previous, appen
                 # -------Omit the line is empty -----------------------
                 if text_spans.strip() == "" and line['bbox'][2] - line['bbox'][0] < 4:
                     continue
+                line_tags = line_classifier.classify(text_spans, line)
                 # ---------------------- END OF PROCESSING QUESTION ---------------------------------
-                if check_end_text(text_spans) or check_correct_answer_text(text_spans):
-                    data = process_stop_questions(remove_item_in_blocks(blocks, block, line, True))
+                if line_tags & (LINE_END | LINE_CORRECT_ANSWER):
+                    data = process_stop_questions(BlockCursor(blocks, i_block))
                     data[0] = questions
                     data[1] = answers_options
                     if len(data[2]) > 0:
@@ -174,7 +305,7 @@ def perform_traversal_questions_set(page, blocks, num_q, explain_previous, appen
                     return data 
                     
                 # ---------------------- QUESTION TITLE ---------------------------------
-                if check_question_title(text_spans, line):
+                if line_tags & LINE_QUESTION_TITLE:
                     
                     # the reading passage is attached to the question.
                     # num_q already adds one when the reading passage is found
@@ -183,21 +314,19 @@ def perform_traversal_questions_set(page, blocks, num_q, explain_previous, appen
                         num_q -= 1
                         append_reading = False
                         
-                    if check_reading_passage(text_spans):
+                    if line_tags & LINE_READING_PASSAGE:
                         append_reading = True
                     
                     # --- case Question 1: A.
                     answers_options = check_question_contain_title_answer(answers_options, text_spans, line, num_q, page)
                     
                     if f'question_{num_q}' not in questions:
-                        questions[f'question_{num_q}'] = line['bbox'] + [text_spans]
+                        questions[f'question_{num_q}'] = Box(line['bbox'], text_spans)
                     else:
-                        questions[f'question_{num_q}'] = compare_coors_with_text(questions[f'question_{num_q}'][:5], line['bbox'] + [text_spans])
+                        questions.merge(f'question_{num_q}', line['bbox'], text_spans)
 
                     # -- get title question --
-                    if not append_reading:
-                        questions[f'question_{num_q}'].append(
-                            get_title_question(line, page)) 
+                    questions[f'question_{num_q}'].title = get_title_question(line, page) if not append_reading else None
 
                     num_q += 1
                     flag_explain_in_question = False                    
@@ -205,12 +334,12 @@ def perform_traversal_questions_set(page, blocks, num_q, explain_previous, appen
                     continue
 
                 # ---------------------- ESSAY ---------------------------------
-                elif check_essay_text(text_spans) or first_essay:
+                elif line_tags & LINE_ESSAY or first_essay:
                     if text_spans.isspace() :
                         continue
                     
                     # skip line with essay text
-                    if check_essay_text(text_spans):
+                    if line_tags & LINE_ESSAY:
                         first_essay = True
                         type_flag = 2
                         continue 
@@ -218,20 +347,19 @@ def perform_traversal_questions_set(page, blocks, num_q, explain_previous, appen
                     first_essay = False
                     num_q += 1
 
-                    questions[f'question_{num_q - 1}'] = line['bbox'] + [text_spans]
+                    questions[f'question_{num_q - 1}'] = Box(line['bbox'], text_spans)
                     continue
 
                 # ---------------------- EXPLAIN IN QUESTION ---------------------------------
-                if check_explain_text(text_spans):
+                if line_tags & LINE_EXPLAIN:
                     flag_explain_in_question = True
-                    explains[f'question_{num_q - 1}'] = line['bbox'] + \
-                        [text_spans]
+                    explains[f'question_{num_q - 1}'] = Box(line['bbox'], text_spans)
                     continue
 
                 # --------------------- OPTION ANSWERS ---------------------------------------
                 if not append_reading and type_flag != 2:
                     answers_options = check_answer_option(page,
-                        num_q, flag_explain_in_question, line, text_spans, answers_options)
+                        num_q, flag_explain_in_question, line, text_spans, answers_options, line_tags)
                 
                 # --------------------- QUESTIONS ---------------------------------------
                 if flag_explain_in_question == False:
@@ -263,7 +391,7 @@ def perform_traversal_questions_set(page, blocks, num_q, explain_previous, appen
     return [questions, answers_options, explains, {}, num_q, 0, append_reading]
 
 
-def process_question_and_answers(questions, doc, coor_x, ascender_descender_option):
+def process_question_and_answers(questions, doc, coor_x, ascender_descender_option, image_encoder=None, render_images=True, renderer=None):
     """Process answer option. Create image of questions and answers after gathering information previously
 
     Args:
@@ -271,6 +399,9 @@ def process_question_and_answers(questions, doc, coor_x, ascender_descender_opti
         doc (fitz.doc): information of doc
         coor_x (list): list of explanation's max width
         ascender_descender_option (list): list containing ascender, descender and flag of answer option
+        image_encoder (ImageEncoder, optional): encoder of images. Defaults to None, PNG.
+        render_images (bool, optional): create images. Defaults to True.
+        renderer (CropRenderer, optional): renderer of crops. Defaults to None, a renderer is created from image_encoder and render_images.
 
     Returns:
         list: list containing coordinates and base 64 image of questions's content, answer options, question titles,
@@ -279,6 +410,8 @@ def process_question_and_answers(questions, doc, coor_x, ascender_descender_opti
     coor_questions_result = {}
     coor_answers_result = {}
     key_previous = ""
+    if renderer is None:
+        renderer = CropRenderer(image_encoder, render_images=render_images)
     for arr_question in questions:
         # arr_question[0] = page number
         # arr_question[1] = questions' overall coordinates and questions' titles coordinates
@@ -292,87 +425,78 @@ def process_question_and_answers(questions, doc, coor_x, ascender_descender_opti
         question = arr_question[1]
         
         for key in question:
-            if len(question[key]) < 5:
-                continue
+            with trace_span("question", question=key, page=n_page):
+                if question[key].text is None:
+                    continue
 
-            # get question number. starting from index of "_" till the end (exp:question_42)
-            num_q = int(key[key.find("_") + 1:])
-            # -- image --
-            data_title = create_title_question(question[key], doc[n_page])
-            if len(data_title) > 0:
-                coor_titles[key] = data_title
+                # get question number. starting from index of "_" till the end (exp:question_42)
+                num_q = int(key[key.find("_") + 1:])
+                # -- image --
+                data_title = create_title_question(question[key], doc[n_page], renderer)
+                if len(data_title) > 0:
+                    coor_titles[key] = data_title
+                # the whole title is set to white in the question's image, even if the title's image was trimmed
+                title_box = question[key].title.to_list() if question[key].title is not None else []
 
-            # ---- parse answers -----------------
-            coor_answer_cover = []
+                # ---- parse answers -----------------
+                coor_answer_cover = []
 
-            # check if question overlaps next question
-            if f'question_{num_q + 1}' in question and question[f'question_{num_q}'][3] >= question[f'question_{num_q + 1}'][1]:
-                question[f'question_{num_q}'][3] = question[f'question_{num_q + 1}'][1] - 0.5
+                # check if question overlaps next question
+                if f'question_{num_q + 1}' in question and question[f'question_{num_q}'][3] >= question[f'question_{num_q + 1}'][1]:
+                    question[f'question_{num_q}'][3] = question[f'question_{num_q + 1}'][1] - 0.5
 
-            if f"{key}" in answers and len(ascender_descender_option) > 0:
-                if not answers[key]:
-                    coor_answers_result[key] = {"options": []}
-                else:
-                    # --- get key title answer ---
-                    if f"{key}" not in coor_answers_result:
+                if f"{key}" in answers and len(ascender_descender_option) > 0:
+                    if not answers[key]:
                         coor_answers_result[key] = {"options": []}
-                    # --- search key title max ---  
-                    answer_key = process_answer_titles(answers[key], ascender_descender_option)
+                    else:
+                        # --- get key title answer ---
+                        if f"{key}" not in coor_answers_result:
+                            coor_answers_result[key] = {"options": []}
+                        # --- search key title max ---  
+                        answer_key = process_answer_titles(answers[key], ascender_descender_option)
                     
-                    if check_answer_without_value(answer_key):
-                        answers[key] = []
-                    total_option = len(answers[key])
+                        if check_answer_without_value(answer_key):
+                            answers[key] = []
+                        total_option = len(answers[key])
                     
-                    if total_option != 0:
-                        arr_key_title= []
-                        for answer in answer_key:
-                            arr_key_title.append(answer[0])
+                        if total_option != 0:
+                            arr_key_title= []
+                            for answer in answer_key:
+                                arr_key_title.append(answer[0])
                         
-                        # --- Process answer options --- 
-                        if total_option == 4 and re.search(r"^(\s+)?D", arr_key_title[3][4]):
-                            data_answer = check_column_and_get_answer_cover_four_options(
-                                answers[key], doc[n_page], key, arr_key_title, n_page, question)
-                        # Case total_option < 4: answer options are on two pages
-                        elif total_option == 2:
-                            data_answer = check_column_and_get_answer_cover_two_options(
-                                answers[key], doc[n_page], key, arr_key_title, n_page, question)
-                        elif total_option == 3:
-                            data_answer = check_column_and_get_answer_cover_three_options(
-                                answers[key], doc[n_page], key, arr_key_title, n_page, question)
-                        elif total_option == 1 and len(answers[key]) != 0:
-                            data_answer = get_ans_coor_one_and_two_options_one_column(
-                                    answers[key], doc[n_page], key, arr_key_title, n_page, question)
-                        else:
-                            #if can not find answer option, set answer option to [] to avoid getting value from previous option
-                            data_answer = [] 
-
-                        if len(data_answer) > 0:
-                            coor_answer_cover = data_answer[0]
-                            if key in coor_answers_result:
-                                coor_answers_result[key]['options'] += data_answer[1]
-                            else:
-                                coor_answers_result[key]['options'] = data_answer[1]       
-
-                            # set end of question's height to start of answer coor cover's height   
-                            if coor_answer_cover[1]  > question[f"{key}"][1]: # check same page
-                                question[f"{key}"][3] =  coor_answer_cover[1]             
-
-            if coor_x[0] > question[f"{key}"][0]:
-                coor_x[0] = question[f"{key}"][0]
-            else:
-                question[f"{key}"][0] = coor_x[0]
+                            # --- Process answer options --- 
+                            data_answer = get_answer_layout(
+                                answers[key], doc[n_page], key, arr_key_title, n_page, question, renderer)
+
+                            if len(data_answer) > 0:
+                                coor_answer_cover = data_answer[0]
+                                if key in coor_answers_result:
+                                    coor_answers_result[key]['options'] += data_answer[1]
+                                else:
+                                    coor_answers_result[key]['options'] = data_answer[1]       
+
+                                # set end of question's height to start of answer coor cover's height   
+                                if coor_answer_cover[1]  > question[f"{key}"][1]: # check same page
+                                    question[f"{key}"][3] =  coor_answer_cover[1]             
+
+                if coor_x[0] > question[f"{key}"][0]:
+                    coor_x[0] = question[f"{key}"][0]
+                else:
+                    question[f"{key}"][0] = coor_x[0]
                         
-            if question[f"{key}"][4] == "":
-                # --- case line is empty ---
-                continue
-            # ----- case question in two page ----
-            if key_previous != key:
-                key_previous = key
-                coor_questions_result[key] = [{"page": n_page, "coor": get_base64_question(
-                    doc[n_page], question[f"{key}"], coor_answer_cover, data_title)}]
-            else:
-                coor_questions_result[key].append({"page": n_page, "coor": get_base64_question(
-                    doc[n_page], question[f"{key}"], coor_answer_cover, data_title)})
+                if question[f"{key}"].text == "":
+                    # --- case line is empty ---
+                    continue
+                # ----- case question in two page ----
+                if key_previous != key:
+                    key_previous = key
+                    coor_questions_result[key] = [get_question_image(
+                        doc[n_page], question[f"{key}"], coor_answer_cover, title_box, renderer)]
+                else:
+                    coor_questions_result[key].append(get_question_image(
+                        doc[n_page], question[f"{key}"], coor_answer_cover, title_box, renderer))
+    
+    renderer.release()
     
     return [coor_questions_result, coor_answers_result, coor_titles]
 
@@ -452,14 +576,14 @@ def get_ascender_descender_option(answers_options):
 
     for answers_option in answers_options["question_1"]:
         item = answers_option[0]
-        option_text = item[4].replace(" ", "").replace(".", "")
+        option_text = item.text.replace(" ", "").replace(".", "")
         if len(arr_compare) == 0:
-            arr_compare[option_text] = [1, item[4], item[5], item[6], item[7]]
+            arr_compare[option_text] = [1, item.text, item.ascender, item.color, item.flags]
         else:
             if option_text in arr_compare:
                 arr_compare[option_text][0] += 1
             else:
-                arr_compare[option_text] = [1, item[4], item[5], item[6], item[7]]
+                arr_compare[option_text] = [1, item.text, item.ascender, item.color, item.flags]
     
     for key in arr_compare:
         if arr_compare[key][0] == 1:
@@ -469,401 +593,671 @@ def get_ascender_descender_option(answers_options):
     
     return ascender_descender_option
 
-def get_base64_title(page, coors):
-    """Get coordinates and base 64 image
+def get_option_style_counts(questions):
+    """Count the styles of answer option's titles over all questions of the document
+
+    Only the titles whose text is found once in their question are counted, as in get_ascender_descender_option: a title
+    found twice (exp: "A." in the question's content) may not be an answer option.
 
     Args:
-        page (fitz.Page): information of page
-        coors (list): coordinates of x0, y0, x1, and y1
+        questions (list): list of page's number, questions and answer options of every page (1st phase of extract_pdf)
 
     Returns:
-        list: list containing coordinates and base 64 image
+        Counter: number of titles of every style (ascender, color, flags)
     """
-    data = ''
-    # check coordinates are within page mediabox
-    coors[2] = min(coors[2], page.mediabox[2])
-    coors[3] = min(coors[3], page.mediabox[3])
+    counts = Counter()
+    for arr_question in questions:
+        if len(arr_question) < 3:
+            continue
+        for answers_option in arr_question[2].values():
+            titles = [answer_option[0] for answer_option in answers_option]
+            option_texts = [title.text.replace(" ", "").replace(".", "") for title in titles]
+            n_texts = Counter(option_texts)
+            counts.update((title.ascender, title.color, title.flags) for title, option_text in zip(titles, option_texts) if n_texts[option_text] == 1)
 
-    crop_box = fitz.Rect(coors[0], coors[1], coors[2], coors[3])
-    if crop_box.isEmpty == False and crop_box.isInfinite == False:
-        page.set_cropbox(crop_box)
-        
-        scale = 1.5
-        zoom_x = scale # horizontal zoom
-        zoom_y = scale  # vertical zoom
-        mat = fitz.Matrix(zoom_x, zoom_y)  # zoom factor 1.5 in each dimension
-        pix = page.get_pixmap(matrix=mat) 
+    return counts
 
-        # pix = page.get_pixmap()
-        data = ToDataBase64Image(pix)
-        pix = None
+def get_document_option_style(questions, default=None):
+    """Get the style of most answer option's titles of the document
 
-    return coors + [data]
+    Args:
+        questions (list): list of page's number, questions and answer options of every page (1st phase of extract_pdf)
+        default (list, optional): style used when no title is found. Defaults to None, [].
 
-def DataBase64Image(base64Data):
-    dataBase64 = f'data:image/png;base64,{base64Data}'
-    dataBase64 = dataBase64.replace(
-        "data:image/png;base64,b'", "data:image/png;base64,").replace("'", "")
-    return dataBase64
+    Returns:
+        list: list containing ascender, color and flag of answer options
+    """
+    counts = get_option_style_counts(questions)
+    if len(counts) == 0:
+        return default if default is not None else []
 
-def ToDataBase64Image(fitz_pix):
-    base64Data = base64.b64encode(fitz_pix.pil_tobytes("png"))
-    return DataBase64Image(base64Data)
+    return list(counts.most_common(1)[0][0])
 
-def get_base64_question(page, coors, coor_answer_cover, data_title):
-    """Get base 64 image of question. Set answer and question's title to white 
+# zoom factor of images in each dimension
+IMAGE_SCALE = 1.5
+
+def get_data_uri_size(data_uri):
+    """Get the number of bytes of the image of a base 64 data URI
 
     Args:
-        page (fitz.Page): information of page
-        coors (list): coordinates of entire questions
-        coor_answer_cover (list, optional): list containing the smallest x0 and y0, and largest x1 and y1 of answers. 
-        data_title (list, optional): list containing the coordinates of question title. 
+        data_uri (str): base 64 data URI
 
     Returns:
-        list: list containing base 64 image of question
-    """ 
-    data = ''
-    # guarantee coordinates are within page mediabox
-    coors[2] = min(coors[2], page.mediabox[2])
-    coors[3] = min(coors[3], page.mediabox[3])
+        int: number of bytes, 0 if the data URI is empty
+    """
+    data = data_uri.split(",", 1)[-1] if data_uri else ""
 
-    crop_box = fitz.Rect(coors[0], coors[1], coors[2], coors[3])
-    if crop_box.isEmpty == False and crop_box.isInfinite == False:
-        page.set_cropbox(crop_box)
+    return len(data) * 3 // 4 - data[-2:].count("=")
+
+class PageRasterCache:
+    """Keep the display list of the page being cropped.
+
+    The page's content is interpreted once and every crop of the page is rasterized from the display list.
+    Only the current page is kept: moving to another page releases the previous one.
+
+    Crops are not all pixel-identical to rendering the cropped page (page.set_cropbox then page.get_pixmap): the display list
+    keeps the page's matrices already multiplied, in float32, and they are multiplied by the crop's matrix in another order.
+    On the three pdf-example files, 1333 of the 1352 images are identical, 18 differ in 3 to 348 antialiased edge pixels
+    (mostly explanations of Math Test.pdf) and one crop less than 1 pt high is 577x1 pix instead of 2x2.
+    See benchmarks/bench_page_raster.py.
+    """
+
+    def __init__(self, scale=IMAGE_SCALE):
+        """
+        Args:
+            scale (float, optional): zoom factor of images. Defaults to IMAGE_SCALE.
+        """
+        self.matrix = fitz.Matrix(scale, scale)
+        self.n_page = None
+        self.display_list = None
 
-        scale = 1.5
-        zoom_x = scale # horizontal zoom
-        zoom_y = scale # vertical zoom
-        mat = fitz.Matrix(zoom_x, zoom_y)  
-        pix = page.get_pixmap(matrix=mat)  # use 'mat' instead of the identity matrix
+    def get_pixmap(self, page, crop_box):
+        """Get the pixmap of the given box of page
 
-        # case question 1: A. 
-        # delete all question
-        if len(coor_answer_cover) > 0 and coor_answer_cover[1] == coors[1]:
-            pix = delete_white_coor_section(pix, coors, scale)
+        Args:
+            page (fitz.Page): information of page
+            crop_box (fitz.Rect): box to render
 
-        # pix = delete_white_coor(pix, coor_answer_cover, coors, scale)
-        # set question title to white
-        pix = delete_white_coor(pix, data_title, coors, scale)
+        Returns:
+            fitz.Pixmap: pixmap of the box, as page.get_pixmap() after page.set_cropbox(crop_box) but for antialiased edges
+        """
+        if self.n_page != page.number:
+            self.release()
+            page.set_cropbox(page.mediabox)
+            self.display_list = page.get_displaylist()
+            self.n_page = page.number
+
+        # the page's cropbox gives the box exactly as a cropped page would be rendered
+        page.set_cropbox(crop_box)
+        crop_box = page.cropbox
+        translate = fitz.Matrix(1, 0, 0, 1, -crop_box.x0, -crop_box.y0)
         
-        data = ToDataBase64Image(pix)
-        pix = None
-    
-    coors[4] = data
-    if len(coors) == 6:
-        del coors[5]
-    
-    return coors
+        return self.display_list.get_pixmap(matrix=translate * self.matrix, clip=crop_box)
+
+    def release(self):
+        """Release the display list of the current page
+        """
+        self.display_list = None
+        self.n_page = None
 
-def delete_white_coor_section(pix, coor, scale):
-    """Set color or given coordinates to white
+def get_crop_pixmap(page, crop_box, raster_cache=None):
+    """Get the pixmap of the given box of page at IMAGE_SCALE
 
     Args:
-        pix (fitz.Pixmap): pix 
-        coor (list): coordinates of x0, y0, x1, and y1 of outer part
-        scale (int): scale number
+        page (fitz.Page): information of page
+        crop_box (fitz.Rect): box to render
+        raster_cache (PageRasterCache, optional): cache of page's display list. Defaults to None, page is rendered again.
+
     Returns:
-        pix: pix
-    """
-    if coor:
-        pix.set_rect(
-                fitz.Rect(
-                    0,
-                    0,
-                    coor[2]*scale,
-                    coor[3]*scale
-                ),
-                (255, 255, 255)
-            )
-    return pix
+        fitz.Pixmap: pixmap of the box
+    """
+    if raster_cache is not None:
+        return raster_cache.get_pixmap(page, crop_box)
+
+    page.set_cropbox(crop_box)
+    mat = fitz.Matrix(IMAGE_SCALE, IMAGE_SCALE)
     
-def delete_white_coor(pix, coor, coor_main, scale):
-    """Set color of outer part that was not included in inner part to white
+    return page.get_pixmap(matrix=mat)
+
+# mime type of the formats supported by ImageEncoder
+IMAGE_FORMATS = {
+    "png": "image/png",
+    "webp": "image/webp",
+    "jpeg": "image/jpeg"
+}
+
+# white pixels (pix) kept around the content of a crop when its white margins are trimmed
+TRIM_PADDING = 2
+
+def trim_white_margins(pix, padding=TRIM_PADDING):
+    """Get the pixmap without the white rows and columns around its content
 
     Args:
-        pix (fitz.Pixmap): pix 
-        coor (list): coordinates of x0, y0, x1, and y1 of outer part
-        coor_main (list): coordinates of x0, y0, x1, and y1 of inner part
-        scale (int): scale number
+        pix (fitz.Pixmap): pixmap
+        padding (int, optional): white pixels kept around the content. Defaults to TRIM_PADDING.
+
     Returns:
-        pix: pix
+        fitz.Pixmap: trimmed pixmap, its origin moved by the trimmed margins. pix if it has no white margin or is all white
     """
-    
-    if len(coor) >= 3 and len(coor_main) >= 1:
-        pix.set_rect(
-            fitz.Rect(
-                (coor[0]*scale - coor_main[0]*scale),
-                (coor[1]*scale - coor_main[1]*scale),
-                (coor[2]*scale - coor_main[0]*scale),
-                (coor[3]*scale - coor_main[1]*scale)
-            ),
-            (255, 255, 255)
-        )
+    from PIL import Image, ImageChops
+    mode = "RGBA" if pix.alpha else "RGB"
+    image = Image.frombuffer(mode, (pix.width, pix.height), pix.samples, "raw", mode, pix.stride, 1)
+    # box of the pixels that are not white
+    content = ImageChops.difference(image, Image.new(mode, image.size, (255,) * len(mode))).getbbox()
+    if content is None:
+        return pix
+    box = (max(0, content[0] - padding), max(0, content[1] - padding),
+           min(pix.width, content[2] + padding), min(pix.height, content[3] + padding))
+    if box == (0, 0, pix.width, pix.height):
+        return pix
 
-    return pix    
+    trimmed = fitz.Pixmap(pix.colorspace, box[2] - box[0], box[3] - box[1], image.crop(box).tobytes(), pix.alpha)
+    trimmed.set_dpi(pix.xres, pix.yres)
+    trimmed.set_origin(pix.x + box[0], pix.y + box[1])
 
-def create_title_question(question, page):
-    """Get coordinate and create base 64 image of question title 
+    return trimmed
+
+def get_trimmed_box(crop_box, pix, trimmed, scale=IMAGE_SCALE):
+    """Get the box of page covered by a pixmap trimmed out of the pixmap of crop_box (see trim_white_margins)
 
     Args:
-        question (list): information of question
-        page (fitz.Page): information of page
+        crop_box (fitz.Rect): box rendered
+        pix (fitz.Pixmap): pixmap of crop_box
+        trimmed (fitz.Pixmap): trimmed pixmap
+        scale (float, optional): zoom factor of pix. Defaults to IMAGE_SCALE.
 
     Returns:
-        list: list containing base 64 image of question
+        list: coordinates of x0, y0, x1, and y1
     """
-    if len(question) == 6:
-        coor_title = question[5]
-        if len(coor_title) == 0:
-            return []
+    x0 = crop_box[0] + (trimmed.x - pix.x) / scale
+    y0 = crop_box[1] + (trimmed.y - pix.y) / scale
 
-        del coor_title[4:6]
-        return get_base64_title(page, coor_title)
-    
-    return []
+    return [x0, y0, min(crop_box[2], x0 + trimmed.width / scale), min(crop_box[3], y0 + trimmed.height / scale)]
+
+class ImageEncoder:
+    """Encode pixmaps into base 64 data URI images.
+
+    PNG without compress_level is encoded by MuPDF straight from the pixmap.
+    Other formats and options are encoded by Pillow from the pixmap's samples.
+    """
+
+    def __init__(self, image_format="png", compress_level=None, quality=None, trim_margins=False):
+        """
+        Args:
+            image_format (str, optional): "png", "webp" or "jpeg". Defaults to "png".
+            compress_level (int, optional): PNG compression level from 0 to 9. Defaults to None, MuPDF's PNG encoder.
+            quality (int, optional): quality of WebP and JPEG images from 0 to 100. Defaults to None, Pillow's default. WebP is lossless when quality is 100.
+            trim_margins (bool, optional): trim the white margins of crops (see trim_white_margins), images are smaller
+                and their coordinates are those of the trimmed box. Defaults to False.
+        """
+        if image_format not in IMAGE_FORMATS:
+            raise ValueError(f"unsupported image format: {image_format}")
+        self.image_format = image_format
+        self.compress_level = compress_level
+        self.quality = quality
+        self.trim_margins = trim_margins
+        self.prefix = f"data:{IMAGE_FORMATS[image_format]};base64,".encode()
+
+    def encode(self, pix):
+        """Get the bytes of the encoded image
+
+        Args:
+            pix (fitz.Pixmap): pixmap
+
+        Returns:
+            bytes: encoded image
+        """
+        if self.image_format == "png" and self.compress_level is None:
+            return pix.tobytes("png")
+
+        from PIL import Image
+        mode = "RGBA" if pix.alpha else "RGB"
+        image = Image.frombuffer(mode, (pix.width, pix.height), pix.samples, "raw", mode, pix.stride, 1)
+        options = {}
+        if self.image_format == "png":
+            options["compress_level"] = self.compress_level
+        elif self.quality is not None:
+            options["quality"] = self.quality
+            if self.image_format == "webp" and self.quality == 100:
+                options["lossless"] = True
+        buffer = io.BytesIO()
+        image.save(buffer, format=self.image_format, **options)
+        
+        return buffer.getvalue()
+
+    def to_data_uri(self, pix):
+        """Get the base 64 data URI of the encoded image
+
+        Args:
+            pix (fitz.Pixmap): pixmap
+
+        Returns:
+            str: base 64 data URI
+        """
+        return (self.prefix + base64.b64encode(self.encode(pix))).decode("ascii")
+
+class CropRenderer:
+    """Render crops of a document's pages and encode them as base 64 images
+    """
+
+    def __init__(self, image_encoder=None, scale=IMAGE_SCALE, render_images=True):
+        """
+        Args:
+            image_encoder (ImageEncoder, optional): encoder of images. Defaults to None, PNG.
+            scale (float, optional): zoom factor of images. Defaults to IMAGE_SCALE.
+            render_images (bool, optional): create images of crops. Defaults to True. If False, only coordinates are kept and the image is left empty.
+        """
+        self.scale = scale
+        self.render_images = render_images
+        self.image_encoder = image_encoder if image_encoder is not None else ImageEncoder()
+        self.raster_cache = PageRasterCache(scale)
+
+    def get_pixmap(self, page, crop_box):
+        """Get the pixmap of the given box of page
+
+        Args:
+            page (fitz.Page): information of page
+            crop_box (fitz.Rect): box to render
+
+        Returns:
+            fitz.Pixmap: pixmap of the box
+        """
+        with measure("rasterize", page=page.number):
+            return get_crop_pixmap(page, crop_box, self.raster_cache)
+
+    def encode(self, pix):
+        """Get the base 64 image of pixmap
+
+        Args:
+            pix (fitz.Pixmap): pixmap
+
+        Returns:
+            str: base 64 data URI
+        """
+        metrics = current_metrics.get()
+        trace = current_trace.get()
+        if metrics is None and trace is None:
+            return self.image_encoder.to_data_uri(pix)
+
+        start = time.perf_counter()
+        data = self.image_encoder.to_data_uri(pix)
+        end = time.perf_counter()
+        size = get_data_uri_size(data)
+        if metrics is not None:
+            metrics.add_phase_time("encoding", end - start)
+            metrics.count("crops_rendered")
+            metrics.count("bytes_encoded", size)
+        if trace is not None:
+            trace.add_span("encoding", start, end, {"width": pix.width, "height": pix.height, "bytes": size})
+
+        return data
+
+    def clean(self, pix, white_rects=()):
+        """Set the given boxes of pixmap to white then trim its white margins if the encoder trims them
+
+        Args:
+            pix (fitz.Pixmap): pixmap of a crop
+            white_rects (list, optional): boxes of the image set to white (exp: question's title). Defaults to ().
+
+        Returns:
+            fitz.Pixmap: pixmap to encode
+        """
+        for white_rect in white_rects:
+            pix.set_rect(fitz.Rect(white_rect), (255, 255, 255))
+        if self.image_encoder.trim_margins:
+            pix = trim_white_margins(pix)
+
+        return pix
+
+    def render(self, page, crop_box, white_rects=()):
+        """Get the base 64 image of the given box of page
+
+        Args:
+            page (fitz.Page): information of page
+            crop_box (fitz.Rect): box to render
+            white_rects (list, optional): boxes of the image set to white. Defaults to ().
+
+        Returns:
+            tuple: base 64 data URI, and box of page covered by the image if its white margins were trimmed else None
+        """
+        start = time.perf_counter()
+        pix = self.get_pixmap(page, crop_box)
+        cleaned = self.clean(pix, white_rects)
+        data = self.encode(cleaned)
+        image_box = None if cleaned is pix else get_trimmed_box(crop_box, pix, cleaned, self.scale)
+
+        metrics = current_metrics.get()
+        if metrics is not None:
+            metrics.add_page_time(page.number, "render", time.perf_counter() - start)
+
+        return data, image_box
+
+    def release(self):
+        """Release the cached page
+        """
+        self.raster_cache.release()
+
+# prefix of the placeholders returned by DeferredCropRenderer, followed by the index of the crop
+DEFERRED_IMAGE_PREFIX = "deferred:"
+
+class DeferredCropRenderer(CropRenderer):
+    """Collect the crops instead of rendering them, so that they can be rendered later by page in worker processes.
+    render returns a placeholder that fill_deferred_images replaces with the image (and its box if it was trimmed).
+    """
+
+    def __init__(self, image_encoder=None, scale=IMAGE_SCALE):
+        """
+        Args:
+            image_encoder (ImageEncoder, optional): encoder of images. Defaults to None, PNG.
+            scale (float, optional): zoom factor of images. Defaults to IMAGE_SCALE.
+        """
+        super().__init__(image_encoder, scale)
+        self.crops = []
+
+    def render(self, page, crop_box, white_rects=()):
+        self.crops.append((page.number, tuple(crop_box), [tuple(white_rect) for white_rect in white_rects]))
+
+        return f"{DEFERRED_IMAGE_PREFIX}{len(self.crops) - 1}", None
+
+def render_crops(crops, image_encoder=None, scale=IMAGE_SCALE):
+    """Render crops collected by DeferredCropRenderer. Run by worker processes, on the document opened by open_worker_pdf
 
-def check_column_and_get_answer_cover_three_options(answers, page, key, arr_key_title, n_page, question):
-    """Case where there are three answer options. Get the number of column and get the coordinate of box covering all answers options and list of answer options. 
     Args:
-        answers (list): list of answer option's coordinates
-        page (fitz.Page): information of page
-        key (str): question's number (for example: question_1)
-        arr_key_title (list): list of answer option title's coordinates
-        n_page (int): page's number
+        crops (list): list of page's number, box and boxes set to white of crops
+        image_encoder (ImageEncoder, optional): encoder of images. Defaults to None, PNG.
+        scale (float, optional): zoom factor of images. Defaults to IMAGE_SCALE.
 
     Returns:
-        list: List containing coordinate of box covering all answers options and list of answer options. 
+        list: base 64 images of crops and their boxes if trimmed (see CropRenderer.render)
     """
-    # only 1 column answer has case of three options
-    return get_ans_coor_three_options_one_column(answers, page, key, arr_key_title, n_page, question)
+    renderer = CropRenderer(image_encoder, scale)
+    images = [renderer.render(worker_doc[n_page], fitz.Rect(crop_box), white_rects) for n_page, crop_box, white_rects in crops]
+    renderer.release()
+
+    return images
+
+def split_crops_by_page(crops, n_chunks):
+    """Split crops in chunks of whole pages with about the same number of crops
 
-    
-def check_column_and_get_answer_cover_two_options(answers, page, key, arr_key_title, n_page, question):
-    """Case where there are two answer options. Get the number of column and get the coordinate of box covering all answers options and list of answer options. 
     Args:
-        answers (list): list of answer option's coordinates
-        page (fitz.Page): information of page
-        key (str): question's number (for example: question_1)
-        arr_key_title (list): list of answer option title's coordinates
-        n_page (int): page's number
+        crops (list): crops collected by DeferredCropRenderer
+        n_chunks (int): maximum number of chunks
 
     Returns:
-        list: List containing coordinate of box covering all answers options and list of answer options. 
+        list: chunks, each one a list of crop's indexes
     """
-    column_answer = check_column_answers_two_options(arr_key_title)
-    if column_answer == 2:
-        return get_ans_coor_two_options_two_column(answers, page, key, arr_key_title, n_page, question)
-    else:
-        return get_ans_coor_one_and_two_options_one_column(answers, page, key, arr_key_title, n_page, question)
+    pages = defaultdict(list)
+    for i, crop in enumerate(crops):
+        pages[crop[0]].append(i)
+
+    chunk_size = len(crops) / max(1, min(n_chunks, len(pages)))
+    chunks = [[]]
+    for n_page in sorted(pages):
+        if len(chunks[-1]) >= chunk_size:
+            chunks.append([])
+        chunks[-1] += pages[n_page]
+
+    return [chunk for chunk in chunks if chunk]
+
+def render_deferred_crops(file, crops, image_encoder=None, scale=IMAGE_SCALE, workers=None):
+    """Render crops collected by DeferredCropRenderer on a pool of worker processes, split by page
 
-def get_ans_coor_one_and_two_options_one_column(answers, page, key, arr_key_title, n_page, question):
-    """Case where there 1 answer or 2 answer options in one column. Get the number of column and get the coordinate of box covering all answers options and list of answer options. 
     Args:
-        answers (list): list of answer option's coordinates
-        page (fitz.Page): information of page
-        key (str): question's number (for example: question_1)
-        arr_key_title (list): list of answer option title's coordinates
-        n_page (int): page's number
+        file (str or bytes): link to the file or content of the pdf
+        crops (list): crops collected by DeferredCropRenderer
+        image_encoder (ImageEncoder, optional): encoder of images. Defaults to None, PNG.
+        scale (float, optional): zoom factor of images. Defaults to IMAGE_SCALE.
+        workers (int, optional): number of worker processes. Defaults to None, the number of cpus.
 
     Returns:
-        list: List containing coordinate of box covering all answers options and list of answer options. 
+        list: base 64 images of crops and their boxes if trimmed, in the order of crops
     """
-    data = get_coor_answers(answers, arr_key_title, question, key)
-    coor_answers = data[0]
-    coor_answers_cover = data[1]
-    coor_answers = smooth_one_column_answers_two_options(
-        coor_answers, coor_answers_cover, arr_key_title)
-    options = create_image_answers(page, arr_key_title, coor_answers, n_page, key, question)
-    
-    return [coor_answers_cover, options]
+    images = [('', None)] * len(crops)
+    if len(crops) == 0:
+        return images
+
+    workers = workers or os.cpu_count() or 1
+    # a few chunks per worker keeps workers busy when pages have different numbers of crops
+    chunks = split_crops_by_page(crops, workers * 4)
+    with ProcessPoolExecutor(min(workers, len(chunks)), initializer=open_worker_pdf, initargs=(file,)) as executor:
+        futures = [executor.submit(render_crops, [crops[i] for i in chunk], image_encoder, scale) for chunk in chunks]
+        for chunk, future in zip(chunks, futures):
+            for i, image in zip(chunk, future.result()):
+                images[i] = image
+
+    return images
+
+def fill_deferred_images(data, images):
+    """Replace the placeholders of DeferredCropRenderer with their images
+
+    Args:
+        data (dict, list or str): result of extraction
+        images (list): base 64 images of crops and their boxes if trimmed
+
+    Returns:
+        dict, list or str: data with images
+    """
+    if isinstance(data, dict):
+        return {key: fill_deferred_images(value, images) for key, value in data.items()}
+    if isinstance(data, list):
+        values = [fill_deferred_images(value, images) for value in data]
+        # the box of a trimmed image replaces the 4 coordinates before it (see get_base64_title)
+        for i, value in enumerate(data):
+            image_box = get_deferred_image(value, images)[1] if is_deferred_image(value) else None
+            if image_box is not None:
+                values[i - 4:i] = image_box
+        return values
+    if is_deferred_image(data):
+        return get_deferred_image(data, images)[0]
+
+    return data
+
+def is_deferred_image(data):
+    return isinstance(data, str) and data.startswith(DEFERRED_IMAGE_PREFIX)
+
+def get_deferred_image(placeholder, images):
+    return images[int(placeholder[len(DEFERRED_IMAGE_PREFIX):])]
+
+def get_base64_title(page, coors, renderer=None, white_boxes=()):
+    """Get coordinates and base 64 image
 
-def get_ans_coor_three_options_one_column(answers, page, key, arr_key_title, n_page, question):
-    """Case where there are three answer options in one column.Get the coordinate of box covering all answers options and list of answer options. 
     Args:
-        answers (list): list of answer option's coordinates
         page (fitz.Page): information of page
-        key (str): question's number (for example: question_1)
-        arr_key_title (list): list of answer option title's coordinates
-        n_page (int): page's number
+        coors (list or Box): coordinates of x0, y0, x1, and y1
+        renderer (CropRenderer, optional): renderer of crops. Defaults to None.
+        white_boxes (list, optional): boxes of page set to white in the image (see get_white_boxes). Defaults to ().
 
     Returns:
-        list: List containing coordinate of box covering all answers options and list of answer options. 
+        list: list containing coordinates and base 64 image
     """
-    data = get_coor_answers(answers, arr_key_title, question, key)
-    coor_answers = data[0]
-    coor_answers_cover = data[1]
-    
-    coor_answers = smooth_one_column_answers_three_options(
-        coor_answers, coor_answers_cover, arr_key_title)
-    
-    options = create_image_answers(
-        page, arr_key_title, coor_answers, n_page, key, question)
-    
-    return [coor_answers_cover, options]
+    data = ''
+    if renderer is None:
+        renderer = CropRenderer()
+    # check coordinates are within page mediabox
+    coors = [coors[0], coors[1], min(coors[2], page.mediabox[2]), min(coors[3], page.mediabox[3])]
 
+    crop_box = fitz.Rect(coors)
+    if renderer.render_images and crop_box.is_empty == False and crop_box.is_infinite == False:
+        data, image_box = renderer.render(page, crop_box, [get_white_rect(box, coors, renderer.scale) for box in white_boxes])
+        # the image's white margins were trimmed (see ImageEncoder)
+        if image_box is not None:
+            coors = image_box
 
-def smooth_one_column_answers_two_options(coor, coor_cover, arr_key_title):
-    """Adjust coordinates of answer options to cover the content of answer options
+    return coors + [data]
+
+def render_crop(doc, page, rect, scale=IMAGE_SCALE, image_encoder=None, white_boxes=()):
+    """Create base 64 image of a box of page. Used to render lazily the crops of extract_pdf(..., render_images=False),
+    the white boxes of questions are given with them ("white_boxes") so that their images match the ones rendered by extract_pdf
 
     Args:
-        coor (list): list of answer option coordinates
-        coor_cover (list): list of box covering answer options
-        arr_key_title (list): list of answer options' titles' coordinates
+        doc (fitz.Document): information of doc
+        page (int): page's number
+        rect (list): coordinates of x0, y0, x1, and y1
+        scale (float, optional): zoom factor of image. Defaults to IMAGE_SCALE.
+        image_encoder (ImageEncoder, optional): encoder of image. Defaults to None, PNG.
+        white_boxes (list, optional): boxes of page set to white in the image. Defaults to ().
 
     Returns:
-        list: list containing the coordinates of answer options' content
+        str: base 64 image, empty if the box is empty
     """
-    len_coor = len(coor)
-    if len_coor == 3 and coor[1][3] > coor[2][1]:
-        coor[1][3] = coor[2][1] 
-        coor[2][2] = coor_cover[2]
-    if len_coor >= 2 and coor[0][3] > coor[1][1]:
-        coor[0][3] = coor[1][1] 
-        coor[1][2] = coor_cover[2]
-    coor[0][2] = coor_cover[2]
+    renderer = CropRenderer(image_encoder, scale)
     
-    return get_answer_content(coor, arr_key_title)
+    return get_base64_title(doc[page], list(rect[:4]), renderer, white_boxes)[4]
+
+def ToDataBase64Image(fitz_pix, image_encoder=None):
+    """Get the base 64 image of pixmap
 
-def get_ans_coor_two_options_two_column(answers, page, key, arr_key_title, n_page, question):
-    """Case where there are two answer options in two column. Get the coordinate of box covering all answers options and list of answer options. 
     Args:
-        answers (list): list of answer option's coordinates
-        page (fitz.Page): information of page
-        key (str): question's number (for example: question_1)
-        arr_key_title (list): list of answer option title's coordinates
-        n_page (int): page's number
+        fitz_pix (fitz.Pixmap): pixmap
+        image_encoder (ImageEncoder, optional): encoder of image. Defaults to None, PNG.
 
     Returns:
-        list: List containing coordinate of box covering all answers options and list of answer options. 
+        str: base 64 data URI
     """
-    data = get_coor_answers(answers, arr_key_title, question, key)
-    coor_answers = data[0]
-    coor_answers_cover = data[1]
+    if image_encoder is None:
+        image_encoder = ImageEncoder()
+    return image_encoder.to_data_uri(fitz_pix)
 
-    coor_answers = smooth_two_column_answers_two_options(
-        coor_answers, coor_answers_cover, arr_key_title)
-    options = create_image_answers(
-        page, arr_key_title, coor_answers, n_page, key, question)
-    
-    return [coor_answers_cover, options]
+def get_base64_question(page, coors, coor_answer_cover, data_title, renderer=None):
+    """Get base 64 image of question. Set answer and question's title to white 
 
-def check_column_and_get_answer_cover_four_options(answers, page, key, arr_key_title, n_page, question):
-    """Case where there are four answer options. Get the number of column and get the coordinate of box covering all answers options and list of answer options. 
     Args:
-        answers (list): list of answer option's coordinates
         page (fitz.Page): information of page
-        key (str): question's number (for example: question_1)
-        arr_key_title (list): list of answer option title's coordinates
-        n_page (int): page's number
+        coors (Box): box of entire questions
+        coor_answer_cover (list, optional): list containing the smallest x0 and y0, and largest x1 and y1 of answers. 
+        data_title (list, optional): list containing the coordinates of question title. 
+        renderer (CropRenderer, optional): renderer of crops. Defaults to None.
 
     Returns:
-        list: List containing coordinate of box covering all answers options and list of answer options. 
-    """
-    column_answer = check_column_answers_four_options(arr_key_title)
-    coor_answer_cover = []
-    if column_answer == 4:
-        coor_answer_cover = get_ans_coor_four_options_four_column(
-            answers, page, key, arr_key_title, n_page, question)
-    elif column_answer == 2:
-        coor_answer_cover = get_ans_coor_four_options_two_column(
-            answers, page, key, arr_key_title, n_page, question)
-    elif column_answer == 1:
-        coor_answer_cover = get_ans_coor_four_options_one_column(
-            answers, page, key, arr_key_title, n_page, question)
-    
-    return coor_answer_cover
+        list: list containing coordinates and base 64 image of question
+    """ 
+    # guarantee coordinates are within page mediabox
+    coors = [coors[0], coors[1], min(coors[2], page.mediabox[2]), min(coors[3], page.mediabox[3])]
+
+    return get_base64_title(page, coors, renderer, get_white_boxes(coors, coor_answer_cover, data_title))
+
+def get_question_image(page, coors, coor_answer_cover, data_title, renderer):
+    """Get the page and base 64 image of question. Without images, the boxes set to white are kept to render it later (see render_crop)
 
-def get_ans_coor_four_options_one_column(answers, page, key, arr_key_title, n_page, question):
-    """Case where there are four answer options in one column.Get the coordinate of box covering all answers options and list of answer options. 
     Args:
-        answers (list): list of answer option's coordinates
         page (fitz.Page): information of page
-        key (str): question's number (for example: question_1)
-        arr_key_title (list): list of answer option title's coordinates
-        n_page (int): page's number
+        coors (Box): box of entire questions
+        coor_answer_cover (list): list containing the smallest x0 and y0, and largest x1 and y1 of answers.
+        data_title (list): list containing the coordinates of question title.
+        renderer (CropRenderer): renderer of crops.
 
     Returns:
-        list: List containing coordinate of box covering all answers options and list of answer options. 
+        dict: page's number, coordinates and base 64 image of question
     """
-    data = get_coor_answers(answers, arr_key_title, question, key)
-    coor_answers = data[0]
-    coor_answers_cover = data[1]
-    
-    coor_answers = smooth_one_column_answers(
-        coor_answers, coor_answers_cover, arr_key_title)
-    options = create_image_answers(
-        page, arr_key_title, coor_answers, n_page, key, question)
-    return [coor_answers_cover, options]
+    data = {"page": page.number, "coor": get_base64_question(page, coors, coor_answer_cover, data_title, renderer)}
+    if not renderer.render_images:
+        data["white_boxes"] = get_white_boxes(data["coor"][:4], coor_answer_cover, data_title)
+
+    return data
+
+def get_white_boxes(coors, coor_answer_cover, data_title):
+    """Get the boxes of page set to white in the image of question
 
-def get_ans_coor_four_options_four_column(answers, page, key, arr_key_title, n_page, question):
-    """Case where there are four answer options in four column.Get the coordinate of box covering all answers options and list of answer options. 
     Args:
-        answers (list): list of answer option's coordinates
+        coors (list): coordinates of x0, y0, x1, and y1 of question
+        coor_answer_cover (list): list containing the smallest x0 and y0, and largest x1 and y1 of answers.
+        data_title (list): list containing the coordinates of question title.
+
+    Returns:
+        list: boxes of page
+    """
+    white_boxes = []
+    # case question 1: A. 
+    # delete all question, the box goes past the bottom right of the image (as the image's box counted from its top left)
+    if len(coor_answer_cover) > 0 and coor_answer_cover[1] == coors[1]:
+        white_boxes.append([coors[0], coors[1], coors[0] + coors[2], coors[1] + coors[3]])
+
+    # set question title to white
+    if len(data_title) >= 4:
+        white_boxes.append(list(data_title[:4]))
+
+    return white_boxes
+
+def get_white_rect(coor, coor_main, scale):
+    """Get the box of pix covering outer part that was not included in inner part
+
+    Args:
+        coor (list): coordinates of x0, y0, x1, and y1 of outer part
+        coor_main (list): coordinates of x0, y0, x1, and y1 of inner part
+        scale (int): scale number
+    Returns:
+        fitz.Rect: box of pix
+    """
+    return fitz.Rect(
+            (coor[0]*scale - coor_main[0]*scale),
+            (coor[1]*scale - coor_main[1]*scale),
+            (coor[2]*scale - coor_main[0]*scale),
+            (coor[3]*scale - coor_main[1]*scale)
+        )
+
+def create_title_question(question, page, renderer=None):
+    """Get coordinate and create base 64 image of question title 
+
+    Args:
+        question (Box): box of question
         page (fitz.Page): information of page
-        key (str): question's number (for example: question_1)
+        renderer (CropRenderer, optional): renderer of crops. Defaults to None.
+
+    Returns:
+        list: list containing coordinates and base 64 image of question's title, empty if the question has no title
+    """
+    if question.title is None:
+        return []
+
+    return get_base64_title(page, question.title, renderer)
+
+def check_option_titles(arr_key_title):
+    """Check the titles of answer options before laying them out
+
+    Args:
         arr_key_title (list): list of answer option title's coordinates
-        n_page (int): page's number
 
     Returns:
-        list: List containing coordinate of box covering all answers options and list of answer options. 
+        bool: True if the options can be laid out
     """
-    data = get_coor_answers(answers, arr_key_title, question, key)
-    coor_answers = data[0]
-    coor_answers_cover = data[1]
-    coor_c = copy.deepcopy(arr_key_title)
-    
-    coor_answers = smooth_four_column_answers(
-        coor_answers, coor_answers_cover, coor_c)
-    
-    options = create_image_answers(
-        page, arr_key_title, coor_answers, n_page, key, question)
-    
-    return [coor_answers_cover, options]
+    total_option = len(arr_key_title)
+    if total_option > len(OPTION_LETTERS):
+        return False
+    # Case total_option < 4: answer options can be on two pages (exp: C, D on the next page)
+    # otherwise the last option is the total_option-th letter (exp: D of 4 options)
+    return total_option < 4 or re.search(r"^(\s+)?" + OPTION_LETTERS[total_option - 1], arr_key_title[-1].text) is not None
 
+@traced
+def get_answer_layout(answers, page, key, arr_key_title, n_page, question, renderer=None):
+    """Get the coordinate of box covering all answers options and list of answer options, for 1 to 6 options (A. to F.)
+    in one column, one row or a grid (see OptionLayout)
 
-def get_ans_coor_four_options_two_column(answers, page, key, arr_key_title, n_page, question):
-    """Case where there are four answer options in two column.Get the coordinate of box covering all answers options and list of answer options. 
     Args:
         answers (list): list of answer option's coordinates
         page (fitz.Page): information of page
         key (str): question's number (for example: question_1)
         arr_key_title (list): list of answer option title's coordinates
         n_page (int): page's number
+        question (dict): information of questions's coordinates
+        renderer (CropRenderer, optional): renderer of crops. Defaults to None.
 
     Returns:
-        list: List containing coordinate of box covering all answers options and list of answer options. 
+        list: List containing coordinate of box covering all answers options and list of answer options.
+        Empty if the options can not be laid out.
     """
-    # -- case: 2 column --
-    coor_answers_cover = [[2000, 2000, 0, 0], [2000, 2000, 0, 0]]
-    coor_answers = []
-
-    # case: value read before answer title
-    if answers[0][0][0] == answers[0][1][0]:
-        coor_answers_cover = [[2000, 2000, page.mediabox[2], 0], [2000, 2000, page.mediabox[2], 0]]
+    if not check_option_titles(arr_key_title):
+        #if can not find answer option, set answer option to [] to avoid getting value from previous option
+        return []
 
-    for i in range(0, len(answers)):
-        answer = answers[i]
-        # -- delete item title --
-        answer.pop(0)
-        # -- option value -----
-        if len(answer) > 0:
-            coor_answers.append(answer[0])
-            if 0 <= i <= 1:
-                coor_answers_cover[0] = compare_coors(
-                    coor_answers_cover[0], answer[0])
-            else:
-                coor_answers_cover[1] = compare_coors(
-                    coor_answers_cover[1], answer[0])
-                
-    coor_answers = smooth_two_column_answers(
-        coor_answers, coor_answers_cover, arr_key_title, question, key)
+    # answer[1] = coordinates of the lines read after the option's title
+    contents = [answer[1] for answer in answers]
+    coor_answers_cover, coor_answers = layout_options(arr_key_title, contents, question[key], page.mediabox[2])
+    options = create_image_answers(page, arr_key_title, coor_answers, n_page, key, question, renderer)
 
-    options = create_image_answers(
-        page, arr_key_title, coor_answers, n_page, key, question)
-    
-    return [compare_coors(coor_answers_cover[0], coor_answers_cover[1]), options]
+    return [coor_answers_cover, options]
 
-def create_image_answers(page, arr_key_title, coor_answers, n_page, key, question = None):
+@traced
+def create_image_answers(page, arr_key_title, coor_answers, n_page, key, question = None, renderer=None):
     """Create base 64 image of answer option's title and content
 
     Args:
@@ -871,6 +1265,7 @@ def create_image_answers(page, arr_key_title, coor_answers, n_page, key, questio
         arr_key_title (list): list of answer option title's coordinates
         coor_answers (list): list of answer option's coordinates
         n_page (int): page's number
+        renderer (CropRenderer, optional): renderer of crops. Defaults to None.
         key (str): question's number
 
     Returns:
@@ -878,302 +1273,346 @@ def create_image_answers(page, arr_key_title, coor_answers, n_page, key, questio
     """
     options = []
     for i in range(0, len(arr_key_title)):
-        text_op = re.sub(r"[\s|\.]", "", arr_key_title[i][4])
+        text_op = re.sub(r"[\s|\.]", "", arr_key_title[i].text)
         if len(text_op) > 1:
             arr_key_title[i][2] = arr_key_title[i][0] + 16
             coor_answers[i][0] = arr_key_title[i][2]
-        title_option = get_base64_title(page, arr_key_title[i])
-        total = len(title_option)
-        del title_option[total - 5:total-1]
+        title_option = get_base64_title(page, arr_key_title[i], renderer)
 
         if (coor_answers[i][0] == coor_answers[i][2]):
             coor_answers[i][2] = question[key][2]
 
-        # delete answer option content
-        if len(coor_answers[i]) == 5:
-            del coor_answers[i][-1]
-
         options.append(title_option + get_base64_title(page,
-                       coor_answers[i]) + [n_page])
+                       coor_answers[i], renderer) + [n_page])
             
     return options
 
+# span's fields of PyMuPDF's text dict that are read while extracting questions
+SPAN_FIELDS = ("text", "flags", "ascender", "color")
+# flags of page.get_text("dict") without images: MuPDF doesn't copy (or convert to png) the data of the images
+DICT_FLAGS = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
 
-def get_coor_answers(answers, arr_key_title, question, key):
-    """Get coordinates of answer option and box covering all answer option
+def get_block_layout(block):
+    """Get the fields used by the extraction of a block of PyMuPDF's text dict
 
     Args:
-        answers (list): list of question coordinates
-        arr_key_title (list): list of answer options' titles' coordinates
+        block (dict): block of page.get_text("dict")
 
     Returns:
-        list: list containing coordinates of answer option and box covering all answer option
+        dict: block with its type and bbox, and its lines of spans for a block of text
     """
-    coor_answers_cover = [2000, 2000, 0, 0]
-    coor_answers = []
+    block_layout = {"type": block["type"], "bbox": list(block["bbox"])}
+    if "lines" in block:
+        lines = []
+        for line in block['lines']:
+            spans = []
+            for span in line['spans']:
+                span_layout = {field: span[field] for field in SPAN_FIELDS}
+                span_layout['bbox'] = list(span["bbox"])
+                spans.append(span_layout)
+            lines.append({"bbox": list(line["bbox"]), "spans": spans})
+        block_layout['lines'] = lines
+    return block_layout
 
-    for i in range(len(answers)):
-        answer = answers[i]
-        # -- delete item title --
-        answer.pop(0)
-        # -- option value -----
-        if len(answer) > 0:
-            coor_answers.append(answer[0])
-            # case Question 1: A => Needs to compare the x0 of answer title 
-            coor_answers_cover = compare_coors(coor_answers_cover, [arr_key_title[i][0], answer[0][1], answer[0][2], answer[0][3]])
-        else:
-            coor_answers.append(arr_key_title[i])
-    
-    # check if question overlaps next question
-    if coor_answers_cover[3] > question[key][3]:
-        coor_answers_cover[3] = question[key][3]
-    
-    return [coor_answers, coor_answers_cover]
+def get_page_layout(page, image_payload=False):
+    """Get page's blocks from PyMuPDF's native dict output, keeping only the fields used by the extraction
 
-def compare_coors(coor, coor_m):
-    """Get the smallest x0, y0 and largest x1,y1 between two lists
+    The blocks of text are read without images, the image blocks are read with page.get_image_info (the box of the images,
+    not their data) and put back at their place among the blocks, in the order the page is drawn. Only pages with images
+    in their resources are read for images, inline images are not read. Without images MuPDF doesn't start a new block
+    after an image drawn in the middle of a block: the text drawn before and after the image stays in one block.
 
     Args:
-        coor (list): given list
-        coor_m (list): given list
+        page (fitz.Page): information of page
+        image_payload (bool, optional): read the image blocks with their data (base 64) from page.get_text("dict"). Defaults to False, only image's coordinates are kept.
+
+    Returns:
+        list: list containing blocks with the same structure as page.get_text("json")
+    """
+    if image_payload:
+        blocks = []
+        for block in page.get_text("dict")['blocks']:
+            block_layout = get_block_layout(block)
+            if block["type"] == 1:
+                block_layout['image'] = base64.b64encode(block['image']).decode()
+            # release image's data as soon as the block is read
+            block.clear()
+            blocks.append(block_layout)
+        return blocks
+
+    text_blocks = [get_block_layout(block) for block in page.get_text("dict", flags=DICT_FLAGS)['blocks']]
+    if not page.get_images():
+        return text_blocks
+    blocks = []
+    i_text = 0
+    # number: index of the image's block among the blocks read with images
+    for image in sorted(page.get_image_info(), key=lambda image: image['number']):
+        while len(blocks) < image['number'] and i_text < len(text_blocks):
+            blocks.append(text_blocks[i_text])
+            i_text += 1
+        blocks.append({"type": 1, "bbox": list(image['bbox'])})
+    blocks.extend(text_blocks[i_text:])
 
-    Returns:
-        list: list containing the smallest x0, y0 and largest x1,y1 between two lists
-    """
-    coor_new = copy.deepcopy(coor)
-    # get smallest x0, y0
-    coor_new[0] = min(coor[0], coor_m[0])
-    coor_new[1] = min(coor[1], coor_m[1])
-    # get largest x1, y1
-    coor_new[2] = max(coor[2], coor_m[2])
-    coor_new[3] = max(coor[3], coor_m[3])
-    
-    return coor_new
+    return blocks
+
+# text of rawdict without images, like the text searched by page.search_for (which also dehyphenates)
+RAWDICT_FLAGS = fitz.TEXT_PRESERVE_LIGATURES | fitz.TEXT_PRESERVE_WHITESPACE | fitz.TEXT_MEDIABOX_CLIP
+# a box of text found ends at a gap wider than HIT_HFUZZ or a shift higher than HIT_VFUZZ (times the font size), as in MuPDF
+HIT_HFUZZ = 0.2
+HIT_VFUZZ = 0.1
+
+def canon_char(c):
+    """Get the character compared by PageChars.search_for: white spaces are spaces, ascii letters are lower case (as MuPDF)
+    """
+    if c in "\xa0\u2028\u2029\r\n\t":
+        return " "
+    if "A" <= c <= "Z":
+        return c.lower()
+    return c
+
+class PageChars:
+    """Characters of a page and their boxes, read once from rawdict.
+
+    search_for finds the same boxes as fitz.Page.search_for, which reads the whole page again at every call.
+    """
+
+    def __init__(self, page):
+        """
+        Args:
+            page (fitz.Page): information of page
+        """
+        # lines of (box of line, [(character, x0, y0, x1, y1, font size), ...])
+        self.lines = []
+        for block in page.get_text("rawdict", flags=RAWDICT_FLAGS)["blocks"]:
+            for line in block.get("lines", []):
+                chars = [(canon_char(char["c"]),) + tuple(char["bbox"]) + (span["size"],) for span in line["spans"] for char in span["chars"]]
+                self.lines.append((line["bbox"], chars))
+
+    def get_chars(self, clip):
+        """Get the characters inside clip, in the order of the page. Lines end with a space without box
+
+        Args:
+            clip (list): coordinates x0, y0, x1, y1
+
+        Returns:
+            list: characters
+        """
+        x0, y0, x1, y1 = clip[:4]
+        chars = []
+        for bbox, line_chars in self.lines:
+            if bbox[2] < x0 or bbox[0] > x1 or bbox[3] < y0 or bbox[1] > y1:
+                continue
+            chars += [char for char in line_chars if x0 <= char[1] and y0 <= char[2] and char[3] <= x1 and char[4] <= y1]
+            chars.append((" ", None, None, None, None, 0))
+
+        return chars
+
+    def search_for(self, needle, clip):
+        """Search text inside clip like page.search_for: ascii letters in any case, a run of spaces matches any run of white spaces
+
+        Args:
+            needle (str): text to search
+            clip (list): coordinates x0, y0, x1, y1
+
+        Returns:
+            list: boxes (fitz.Rect) of the text found, one per run of adjacent characters
+        """
+        chars = self.get_chars(clip)
+        needle = [canon_char(c) for c in needle]
+        boxes = []
+        start = 0
+        while start < len(chars):
+            # match the needle from start, runs of spaces match runs of spaces
+            i = start
+            j = 0
+            end = None
+            while i < len(chars) and j < len(needle) and chars[i][0] == needle[j]:
+                end = i
+                i += 1
+                if chars[end][0] == " ":
+                    while i < len(chars) and chars[i][0] == " ":
+                        i += 1
+                j += 1
+                if needle[j - 1] == " ":
+                    while j < len(needle) and needle[j] == " ":
+                        j += 1
+            if j < len(needle) or end is None:
+                start += 1
+                continue
+            # a box goes from the left side of its first character to the right side of its last one (a quad in MuPDF)
+            first = last = None
+            for char in chars[start:end + 1]:
+                if char[1] is None:
+                    continue
+                size = char[5]
+                if last is not None and not (abs(char[1] - last[3]) < HIT_HFUZZ * size and abs(char[4] - last[4]) < HIT_VFUZZ * size
+                                             and abs(char[2] - last[2]) < HIT_VFUZZ * size):
+                    boxes.append(get_hit_box(first, last))
+                    first = None
+                if first is None:
+                    first = char
+                last = char
+            if first is not None:
+                boxes.append(get_hit_box(first, last))
+            start = end + 1
 
-def check_column_answers_two_options(coor_answers):
-    """Get column when there are two answer options
+        return boxes
 
-    Args:
-        coor_answers (list): list of answer options' coordinates
+def get_hit_box(first, last):
+    return fitz.Rect(min(first[1], last[3]), min(first[2], last[2]), max(first[1], last[3]), max(first[4], last[4]))
 
-    Returns:
-        int: number of column
-    """
-    y_average_B = (coor_answers[1][1] + coor_answers[1][3])/2
-    if y_average_B < coor_answers[0][3]:
-        return 2
-    return 1
+# characters of the pages being read, released with their fitz.Page
+page_chars_cache = weakref.WeakKeyDictionary()
 
-def check_column_answers_three_options(coor_answers):
-    """Get column when there are three answer options
+def get_page_chars(page):
+    """Get the characters of page, read at the first call for a page
 
     Args:
-        coor_answers (list): list of answer options' coordinates
+        page (fitz.Page): information of page
 
     Returns:
-        int: number of column
+        PageChars: characters of page
     """
-    y_average_B = (coor_answers[1][1] + coor_answers[1][3])/2
-    if y_average_B < coor_answers[0][3]:
-        return 4
-    
-    return 1 
-    
-def check_column_answers_four_options(coor_answers):
-    """Get column when there are four answer options
+    page_chars = page_chars_cache.get(page)
+    if page_chars is None:
+        page_chars = page_chars_cache[page] = PageChars(page)
+
+    return page_chars
+
+def get_json_page(page, type_flag, flag_first_page=False, layout=None, header_footer=None):
+    """Get page's blocks after deleting header and footer
 
     Args:
-        coor_answers (list): list of answer options' coordinates
+        page (fitz.page): information of page
+        flag_first_page (bool, optional): check if page is first page. Defaults to False.
+        layout (list, optional): blocks of page already read (see LayoutSession). Defaults to None, the page is read.
+        header_footer (HeaderFooterIndex, optional): headers and footers of the document. Defaults to None.
 
     Returns:
-        int: number of column
+        list: list containing blocks
     """
-    y_average_D = (coor_answers[3][1] + coor_answers[3][3])/2
-    if y_average_D < coor_answers[0][3]:
-        return 4
-    if y_average_D < coor_answers[2][3]:
-        return 2
+    if layout is None:
+        with measure("text_parsing"):
+            layout = get_page_layout(page)
+    block_main = get_block_main(layout, type_flag, flag_first_page, header_footer)
     
-    return 1
+    return block_main
 
-def smooth_four_column_answers(coor, coor_cover, arr_key_title):
-    """Adjust coordinates of answer options to cover the content of answer options
+def tag_page_layout(blocks, header_footer=None):
+    """Tag every line of page's blocks with LineClassifier. The tags are kept in the line and reused by LineClassifier.classify
 
     Args:
-        coor (list): list of answer option coordinates
-        coor_cover (list): list of box covering answer options
-        arr_key_title (list): list of answer options' titles' coordinates
+        blocks (list): blocks of page
+        header_footer (HeaderFooterIndex, optional): headers and footers of the document, their lines are not tagged. Defaults to None.
 
     Returns:
-        list: list containing the coordinates of answer options' content
+        list: blocks
     """
-    coor_c = copy.deepcopy(arr_key_title)
-    
-    # set vertical starting point (y0) of four option to y0 of coor cover
-    coor[0][1] = coor[1][1] = coor[2][1] = coor[3][1] = coor_cover[1]
-    # set vertical ending point (y1) of four option to y1 of coor cover
-    coor[0][3] = coor[1][3] = coor[2][3] = coor[3][3] = coor_cover[3]
-    # set horizontal ending point (x1) of fourth option to x1 of coor cover
-    coor[3][2] = coor_cover[2]
-    
-    # set horizontal ending point (x1) of current option to horizontal starting point (x0) of next question's title
-    coor[0][2] = coor_c[1][0]
-    coor[1][2] = coor_c[2][0]
-    coor[2][2] = coor_c[3][0]
-    
-    return get_answer_content(coor, coor_c)
+    for block in blocks:
+        if header_footer is not None and header_footer.is_header_footer(block):
+            continue
+        for line in block.get("lines", []):
+            text_spans = get_text_spans(line)
+            line["tags"] = (text_spans, line_classifier.classify(text_spans, line))
 
+    return blocks
 
-def smooth_two_column_answers(coor, coor_cover, arr_key_title, question, key):
-    """Adjust coordinates of answer options to cover the content of answer options
+def scan_pages(n_pages, header_footer=None):
+    """Read the layout of pages and tag their lines. Run by worker processes, on the document opened by open_worker_pdf
 
     Args:
-        coor (list): list of answer option coordinates
-        coor_cover (list): list of box covering answer options
-        arr_key_title (list): list of answer options' titles' coordinates
+        n_pages (list): numbers of pages
+        header_footer (HeaderFooterIndex, optional): headers and footers of the document. Defaults to None.
 
     Returns:
-        list: list containing the coordinates of answer options' content
+        list: blocks of every page
     """
-    #check if question overlaps next question
-    if coor_cover[1][3] > question[key][3] and coor_cover[1][1] < question[key][3] :
-        coor_cover[1][3] = question[key][3]
+    return [tag_page_layout(get_page_layout(worker_doc[i_page]), header_footer) for i_page in n_pages]
 
-    if coor_cover[0][3] > coor_cover[1][1]:
-        coor_cover[0][3] = coor_cover[1][1] - 1
-    
-    # get the widest length of answers by comparing length of coor_cover and length of question
-    # because some answers do not cover the full width
-    if coor_cover[1][2] < question[key][2] or coor_cover[0][2] < question[key][2]:
-        coor_cover[1][2] = question[key][2]
-        coor_cover[0][2] = question[key][2]
-
-    # set vertical starting point (y0) of options to y0 of cover
-    coor[0][1] = coor[1][1] = coor_cover[0][1]
-    coor[2][1] = coor[3][1] = coor_cover[1][1]
-    
-    # set vertical ending point (y1) of options to y1 of cover
-    coor[0][3] = coor[1][3] = coor_cover[0][3]
-    coor[2][3] = coor[3][3] = coor_cover[1][3]
-    
-    # set horizontal ending point (x1) of second and fourth option to max width
-    coor[1][2] = coor[3][2] = coor_cover[0][2] if coor_cover[0][2] >= coor_cover[1][2] else coor_cover[1][2]
-    
-    # set horizontal ending point (x1) of current question to horizontal starting point (x0) of next question title
-    coor[0][2] = arr_key_title[1][0]
-    coor[2][2] = arr_key_title[3][0]
-    
-    coor = get_answer_content(coor, arr_key_title)
-    
-    return coor
-
-def smooth_one_column_answers(coor, coor_cover, arr_key_title):
-    """Adjust coordinates of answer options to cover the content of answer options
+def scan_page_layouts(file, n_page, workers, header_footer=None):
+    """Read the layout of all pages and tag their lines on a pool of worker processes
 
     Args:
-        coor (list): list of answer option coordinates
-        coor_cover (list): list of box covering answer options
-        arr_key_title (list): list of answer options' titles' coordinates
+        file (str or bytes): link to the file or content of the pdf
+        n_page (int): number of pages
+        workers (int): number of worker processes
+        header_footer (HeaderFooterIndex, optional): headers and footers of the document. Defaults to None.
 
     Returns:
-        list: list containing the coordinates of answer options' content
+        list: blocks of every page, in the order of pages
     """
-    # set vertical ending point (y1) of third option to vertical starting point (y0) of fourth option
-    coor[2][3] = min(coor[2][3], coor[3][1])
-    # set vertical ending point (y1) of second option to vertical starting point (y0) of third option
-    coor[1][3] = min(coor[1][3], coor[2][1])
-    # set vertical ending point (y1) of first option to vertical starting point (y0) of second option
-    coor[0][3] = min(coor[0][3], coor[1][1])
-    # set horizontal ending point (x1) of four options to x1 of coor over
-    coor[0][2] = coor[1][2] = coor[2][2] = coor[3][2] = coor_cover[2]
-    # check if question overlaps next question
-    coor[3][3] = min(coor[3][3], coor_cover[3])
- 
-    return get_answer_content(coor, arr_key_title)
+    # contiguous chunks of pages, a few per worker
+    n_chunks = max(1, min(n_page, workers * 4))
+    chunks = [list(range(i * n_page // n_chunks, (i + 1) * n_page // n_chunks)) for i in range(n_chunks)]
+    layouts = [None] * n_page
+    with ProcessPoolExecutor(min(workers, n_chunks), initializer=open_worker_pdf, initargs=(file,)) as executor:
+        for chunk, chunk_layouts in zip(chunks, executor.map(scan_pages, chunks, [header_footer] * n_chunks)):
+            for i_page, layout in zip(chunk, chunk_layouts):
+                layouts[i_page] = layout
 
-def smooth_two_column_answers_two_options(coor, coor_cover, arr_key_title):
-    """Adjust coordinates of answer options to cover the content of answer options
+    return layouts
 
-    Args:
-        coor (list): list of answer option coordinates
-        coor_cover (list): list of box covering answer options
-        arr_key_title (list): list of answer options' titles' coordinates
+class LayoutSession:
+    """Layouts of the pages of a document (see get_page_layout), read once and shared by the passes over the document
+    (exp: headers and footers, first question, 1st phase).
 
-    Returns:
-        list: list containing the coordinates of answer options' content
+    A page is read at the first get, or its layout is added when it was read before (exp: by scan_page_layouts), and kept
+    until it is released by the last pass, so that only the pages still needed are kept in memory.
     """
-    # set vertical starting point (y0) of both options to y0 of coor over 
-    coor[0][1] = coor[1][1] = coor_cover[1]
-    # set ending vertical point (y1) of both options to y1 of coor over 
-    coor[0][3] = coor[1][3] = coor_cover[3]
-    # set horizontal ending point (x1) of second options to x1 of coor over 
-    coor[1][2] = coor_cover[2] 
-    # set horizontal ending point (x1) of fist options to horizontal starting point (x0) of second option's title
-    coor[0][2] = arr_key_title[1][0]
-        
-    return get_answer_content(coor, arr_key_title)
 
+    def __init__(self, doc):
+        """
+        Args:
+            doc (fitz.Document): opened pdf
+        """
+        self.doc = doc
+        self.layouts = {}
 
-def smooth_one_column_answers_three_options(coor, coor_cover, arr_key_title):
-    """Adjust coordinates of answer options to cover the content of answer options
+    def get(self, i_page):
+        """Get the layout of a page, read at the first call
 
-    Args:
-        coor (list): list of answer option coordinates
-        coor_cover (list): list of box covering answer options
-        arr_key_title (list): list of answer options' titles' coordinates
+        Args:
+            i_page (int): page's number
 
-    Returns:
-        list: list containing the coordinates of answer options' content
-    """
-    # set vertical ending point (y1) of current question to vertical starting point (y0) of next option 
-    coor[1][3] = min(coor[2][1], coor[1][3])
-    coor[0][3] = min(coor[1][1], coor[0][3])
-    
-    # set horizontal ending point (x1) of three options to x1 of coor over
-    coor[0][2] = coor[1][2] = coor[2][2] = coor_cover[2]
-    
-    return get_answer_content(coor, arr_key_title)
+        Returns:
+            list: blocks of page
+        """
+        layout = self.layouts.get(i_page)
+        if layout is None:
+            with measure("text_parsing"):
+                layout = self.layouts[i_page] = get_page_layout(self.doc[i_page])
 
+        return layout
 
-def get_answer_content(coor, arr_key_title):
-    """Set starting coordinates of answer options' content
+    def add_layouts(self, layouts):
+        """Add layouts read elsewhere, they replace the layouts already read
 
-    Args:
-        coor (list): list of answer options' coordinates
-        arr_key_title (list): list of answer options' titles' coordinates
+        Args:
+            layouts (iterable): pairs of page's number and blocks of page
+        """
+        self.layouts.update(layouts)
 
-    Returns:
-        list: list containing answer options' content' coordinates
-    """
-    # set the starting x0 of option's content to the end of the option's title
-    coor[0][0] = arr_key_title[0][2]
-    if len(coor) > 1:
-        coor[1][0] = arr_key_title[1][2]
-    if len(coor) > 2:
-        coor[2][0] = arr_key_title[2][2]
-    if len(coor) > 3:
-        coor[3][0] = arr_key_title[3][2]
-    
-    return coor
+    def release(self, i_page):
+        """Release the layout of a page, it is read again if needed
+
+        Args:
+            i_page (int): page's number
+        """
+        self.layouts.pop(i_page, None)
 
-def get_json_page(page, type_flag, flag_first_page=False):
-    """Get page's jason after deleting header and footer
+@traced
+def get_question_0(page, header_footer=None, layout=None):
+    """Collect the answer options of the first questions, used to find the style of the answer option's titles
 
     Args:
-        page (fitz.page): information of page
-        flag_first_page (bool, optional): check if page is first page. Defaults to False.
+        page (fitz.Page): first page
+        header_footer (HeaderFooterIndex, optional): headers and footers of the document. Defaults to None.
+        layout (list, optional): blocks of page already read (see LayoutSession). Defaults to None, the page is read.
 
     Returns:
-        list: list containing blocks
+        dict: answer options of the first questions
     """
-    blocks = page.get_text("json")
-    blocks_json = json.loads(blocks)
-    block_main = get_block_main(blocks_json['blocks'], type_flag, flag_first_page)
-    
-    return block_main
-
-def get_question_0(page):
-    blocks = get_json_page(page, 0, True)
+    blocks = get_json_page(page, 0, True, layout, header_footer)
     answers_options = {}
     num_q = 1
     append_reading = False
@@ -1184,20 +1623,21 @@ def get_question_0(page):
         if "lines" in block:
             for line in block['lines']:
                 text_spans = get_text_spans(line)
+                line_tags = line_classifier.classify(text_spans, line)
                 # -------- check title questions ------------------------
-                if check_question_title(text_spans, line):
+                if line_tags & LINE_QUESTION_TITLE:
                     if append_reading:
                         num_q -= 1
                         append_reading = False
                     
-                    if check_reading_passage(text_spans):
+                    if line_tags & LINE_READING_PASSAGE:
                         append_reading = True
                     
                     num_q += 1
                     
                 # --------------------- OPTION ANSWERS ---------------------------------------
                 answers_options = check_answer_option(page,
-                    num_q, False, line, text_spans, answers_options)
+                    num_q, False, line, text_spans, answers_options, line_tags)
 
     return answers_options
 
@@ -1214,10 +1654,10 @@ def check_question_contain_title_answer(answers_options, text_spans, line, num_q
         list: list containing answer options' coordinates and boolean value to start lookign for answer options
     """
     if re.search(r"^(\s+)?(Question)+\s+[0-9]+(\:|\.)?(\s+)?(A\.)(\s+)?", text_spans):
-        bbox = page.search_for("A.", clip = fitz.Rect(line["bbox"][0],line["bbox"][1],line["bbox"][2],line["bbox"][3]))
+        bbox = get_page_chars(page).search_for("A.", line["bbox"])
         answers_options[f'question_{num_q}'] = [[
-            [bbox[0].x0, bbox[0].y0, bbox[0].x1, bbox[0].y1, "A.", line['spans'][0]['ascender'], line['spans'][0]['color'], line['spans'][0]['flags']],
-            [bbox[0].x1, line["bbox"][1], line["bbox"][2], line["bbox"][3]]
+            Span(bbox[0], "A.", line['spans'][0]['ascender'], line['spans'][0]['color'], line['spans'][0]['flags']),
+            Box([bbox[0].x1, line["bbox"][1], line["bbox"][2], line["bbox"][3]])
         ]]
 
     return answers_options
@@ -1248,17 +1688,18 @@ def check_mediabox_height(block, page_height):
 def process_answer_titles_less_than_4(answers_option, ascender_descender_option):
     
     if ascender_descender_option[2] >= 16:  # flags
-        index_negative = [i for i, item in enumerate(answers_option) if item[0][7] < 16]
+        index_negative = [i for i, item in enumerate(answers_option) if item[0].flags < 16]
     elif ascender_descender_option[1] > 0:  # color
-        index_negative = [i for i, item in enumerate(answers_option) if item[0][6] == ascender_descender_option[1]]
+        index_negative = [i for i, item in enumerate(answers_option) if item[0].color == ascender_descender_option[1]]
     else: # ascender
-        index_negative = [i for i, item in enumerate(answers_option) if item[0][5] == ascender_descender_option[0]]
+        index_negative = [i for i, item in enumerate(answers_option) if item[0].ascender == ascender_descender_option[0]]
     
     for i in sorted(index_negative, reverse=True):
         answers_option.pop(i)
     
     return answers_option
 
+@traced
 def process_answer_titles(answers_option, ascender_descender_option):
     """Test the eligibility of answers' options
 
@@ -1270,11 +1711,11 @@ def process_answer_titles(answers_option, ascender_descender_option):
         list: Answer's options after being processed
     """
     if ascender_descender_option[2] >= 16:  # flags
-        index_negative = [i for i, item in enumerate(answers_option) if item[0][7] < 16]
+        index_negative = [i for i, item in enumerate(answers_option) if item[0].flags < 16]
     elif ascender_descender_option[1] > 0:  # color
-        index_negative = [i for i, item in enumerate(answers_option) if item[0][6] != ascender_descender_option[1]]
+        index_negative = [i for i, item in enumerate(answers_option) if item[0].color != ascender_descender_option[1]]
     else: # ascender
-        index_negative = [i for i, item in enumerate(answers_option) if item[0][5] != ascender_descender_option[0]]
+        index_negative = [i for i, item in enumerate(answers_option) if item[0].ascender != ascender_descender_option[0]]
     
     # if len(answers_option) - len(index_negative) == 4:
     index_first = 0
@@ -1287,12 +1728,12 @@ def process_answer_titles(answers_option, ascender_descender_option):
         # make sure merged content belongs to current question
         if index > index_first and answers_option[index - 1][1][3] < answers_option[index][1][1]:
             # merge content of removed index to answer option
-            answers_option[index - 1][1] = compare_coors(answers_option[index - 1][1], answers_option[index][1])
+            answers_option[index - 1][1].merge(answers_option[index][1])
         answers_option.pop(index)
     
     return answers_option
 
-def check_answer_option(page, num_q, flag_explain_in_question, line, text_spans, answers_options):
+def check_answer_option(page, num_q, flag_explain_in_question, line, text_spans, answers_options, line_tags=None):
     """ Check if answer's option starts at current line
 
     Args:
@@ -1303,26 +1744,28 @@ def check_answer_option(page, num_q, flag_explain_in_question, line, text_spans,
         line (dict): information of line
         text_spans (str): content of line
         answers_options (dict): information of answers' options
+        line_tags (int, optional): tags of line given by LineClassifier. Defaults to None.
 
     Returns:
         list: list containg information of answers' options and boolean value to check if line is searching for answer's options
     """
+    if line_tags is None:
+        line_tags = line_classifier.classify(text_spans, line)
     if flag_explain_in_question == False:
-        if re.search(r"(\.)?((\s+)?[A-D]{1}(\s+)?\.(\s+)?)|^(\.)?((\s+)?[A-D]{1}(\s+)?(\.)?(\s+)?)", text_spans):
-            r2 = re.compile("(\.)?((\s+)?[A-D]{1}(\s+)?(\.)?(\s+)?)")
+        if line_tags & LINE_ANSWER_OPTION:
+            r2 = re.compile("(\.)?((\s+)?" + OPTION_LETTER + "(\s+)?(\.)?(\s+)?)")
             data = r2.findall(text_spans)
             if len(data) <= 1 or len(line["spans"]) == 1:
                 for item in line["spans"]:
-                    if re.search("^(\.)?((\s+)?[A-D]{1}(\s+)?(\.)?(\s+)?)$|^((\s+)?[A-D]{1}(\s+)?\.(\s+)?)|^((\s+)?[A-D]{1}(\s)(\s+)?)", item['text']):
-                        if len(data) == 4:
-                            if re.search(r"^[A-D\s]*$", item["text"]): #text only contains A B C D
+                    if re.search("^(\.)?((\s+)?" + OPTION_LETTER + "(\s+)?(\.)?(\s+)?)$|^((\s+)?" + OPTION_LETTER + "(\s+)?\.(\s+)?)|^((\s+)?" + OPTION_LETTER + "(\s)(\s+)?)", item['text']):
+                        if 4 <= len(data) <= len(OPTION_LETTERS):
+                            if re.search(r"^[A-F\s]*$", item["text"]): #text only contains option letters (exp: A B C D)
                                 answers_options = get_answers_options_without_value(answers_options, item, flag_explain_in_question, num_q, line)
                             else:
                                 answers_options = get_answers_options_multiple(len(data), page, item, answers_options, flag_explain_in_question, num_q, line, text_spans)
                                 break
 
-                        answers_options = add_option_answer(
-                        item['bbox'] + [item['text'], item['ascender'], item['color'], item['flags']], answers_options, num_q)
+                        answers_options = add_option_answer(Span.from_span(item), answers_options, num_q)
                         answers_options = get_answers_options(flag_explain_in_question, answers_options, num_q, line)
                         break
             else:
@@ -1332,25 +1775,25 @@ def check_answer_option(page, num_q, flag_explain_in_question, line, text_spans,
     # add text to answer
     if f"question_{num_q - 1}" in answers_options and len(answers_options[f"question_{num_q - 1}"]) > 0:
          # only add when option does not have text and not add next title value (exp: B C D)
-        if len(answers_options[f"question_{num_q - 1}"][-1][1]) < 5 and not re.search("^[A-D](\.){0,1}$", text_spans.replace(" ", "")):
+        if answers_options[f"question_{num_q - 1}"][-1][1].text is None and not re.search("^[A-F](\.){0,1}$", text_spans.replace(" ", "")):
             # find number of extra option. Exp: A B C => B C are the extra options
-            r2 = re.compile("\s{1,}?((\s+)?[A-D]{1}(\s+)?(\.)?(\s+)?)")  
+            r2 = re.compile("\s{1,}?((\s+)?" + OPTION_LETTER + "(\s+)?(\.)?(\s+)?)")  
             data = r2.findall(text_spans)
 
             # find option 
-            r3 = re.compile("(\.)?((\s+)?[A-D]{1}(\s+)?(\.)?(\s+)?)") 
+            r3 = re.compile("(\.)?((\s+)?" + OPTION_LETTER + "(\s+)?(\.)?(\s+)?)") 
             data_1 = r3.findall(text_spans)
 
             len_ans = len(answers_options[f"question_{num_q - 1}"])
             if len(data) < 1 or len(data_1) == 1: # text line does not contain extra options
-                if len(answers_options[f"question_{num_q - 1}"][-1][1]) < 5: # only need to add text to option the first time
-                    answers_options[f"question_{num_q - 1}"][-1][1].append(text_spans)
+                if answers_options[f"question_{num_q - 1}"][-1][1].text is None: # only need to add text to option the first time
+                    answers_options[f"question_{num_q - 1}"][-1][1].text = text_spans
             else:
                 # case: A. 12 B.4 => A needs to be marked as "Have Text"
                 for i in range(len(data)):
-                    if len_ans-2-i >= 0 and len(answers_options[f"question_{num_q - 1}"][len_ans-2-i][1]) < 5:
-                        answers_options[f"question_{num_q - 1}"][len_ans-2-i][1].append("Have Text")
-                answers_options[f"question_{num_q - 1}"][-1][1].append(text_spans)
+                    if len_ans-2-i >= 0 and answers_options[f"question_{num_q - 1}"][len_ans-2-i][1].text is None:
+                        answers_options[f"question_{num_q - 1}"][len_ans-2-i][1].text = "Have Text"
+                answers_options[f"question_{num_q - 1}"][-1][1].text = text_spans
 
     return answers_options
 
@@ -1364,14 +1807,14 @@ def check_answer_without_value(answer):
         boolean: return True if answer options do not context
     """
     count = 0
-    r2 = re.compile("[A-D](\.)?(\s+)")
+    r2 = re.compile(OPTION_LETTER + "(\.)?(\s+)")
 
     for option in answer:        
         # check title contains multiple question titles: text A B C
-        if len(answer) < 4 and len(option[1]) > 4 and len(r2.findall(option[0][4])) >= 2:
+        if len(answer) < 4 and option[1].text is not None and len(r2.findall(option[0].text)) >= 2:
             return True
 
-        if len(option[1]) <= 4: # answers without content
+        if option[1].text is None: # answers without content
             count += 1
 
     return count >= 2
@@ -1391,7 +1834,7 @@ def get_answers_options_without_value(answers_options, item, flag_explain_in_que
         _type_: _description_
     """
     answers_options = add_option_answer(
-                [item["bbox"][0], item["bbox"][1], item["bbox"][2], item["bbox"][1]] + [item["text"], item['ascender'], item['color'], item['flags']], answers_options, num_q) 
+                Span.from_span(item, [item["bbox"][0], item["bbox"][1], item["bbox"][2], item["bbox"][1]]), answers_options, num_q)
     answers_options = get_answers_options(flag_explain_in_question, answers_options, num_q, line)
     
     return answers_options         
@@ -1412,13 +1855,13 @@ def get_answers_options_multiple(len_options, page, item, answers_options, flag_
     Returns:
         dict: information of answers' options after being processed
     """
-    options = ["A.", "B.", "C.", "D."]
+    options = [f"{letter}." for letter in OPTION_LETTERS]
 
     for i in range(len_options):
-        bbox = page.search_for(options[i], clip = fitz.Rect(item["bbox"][0],item["bbox"][1],item["bbox"][2],item["bbox"][3]))
+        bbox = get_page_chars(page).search_for(options[i], item["bbox"])
         if len(bbox) > 0:
             answers_options = add_option_answer(
-                [bbox[0].x0, bbox[0].y0, bbox[0].x1, bbox[0].y1] + [options[i], item['ascender'], item['color'], item['flags']], answers_options, num_q)                
+                Span(bbox[0], options[i], item['ascender'], item['color'], item['flags']), answers_options, num_q)
             answers_options = get_answers_options(flag_explain_in_question, answers_options, num_q, line)
     return answers_options 
 
@@ -1433,11 +1876,9 @@ def get_title_answer_plural(line, answers_options, num_q, text_spans, page):
         dict: information of answers_options after being processed
     """      
     for item in line["spans"]:
-        if re.search("^(\.)?((\s+)?[A-D]{1}(\s+)?(\.)?(\s+)?)$|^((\s+)?[A-D]{1}(\s+)?\.(\s+)?)", item['text']):
+        if re.search("^(\.)?((\s+)?" + OPTION_LETTER + "(\s+)?(\.)?(\s+)?)$|^((\s+)?" + OPTION_LETTER + "(\s+)?\.(\s+)?)", item['text']):
             # -- True: title standard --
-            span = item['bbox'] + [item['text'],
-                                   item['ascender'], item['color'], item['flags']]
-            answers_options = add_option_answer(span, answers_options, num_q)
+            answers_options = add_option_answer(Span.from_span(item), answers_options, num_q)
         else:
             answers_options = get_answers_options(
                 False, answers_options, num_q, {'bbox': item['bbox']})
@@ -1467,19 +1908,21 @@ def search_text_coor(page, coor, text_spans):
     Returns:
         _type_: _description_
     """
-    # find full first question title (exp: Question 1:)
+    # find full first question title (exp: Question 1:), or the number of the question (exp: 1.)
     title_list = re.search(r"(Câu|Cau|Bài|Question)(\s+)?(\d+)(\s+)?(\:|\.)?", text_spans) 
+    if title_list is None:
+        title_list = re.search(r"()()(\d+)(\s+)?(\:|\.)?", text_spans)
     title = title_list.group(1) if title_list is not None else ""
     num_first = title_list.group(3) if title_list is not None else 1
     extra = title_list.group(5) if title_list.group(5) is not None else ""
     # the space between question title "Question" and question number"1". 
     # in some case, there can be multiple spaces between "Question" and "1" (exp: Question    1:)
-    white_space_1 = title_list.group(2) if title_list.group(2) is not None else " "
+    white_space_1 = title_list.group(2) if title_list.group(2) is not None else (" " if title else "")
     # the space between question number "1" and extra character like ":". 
     # in some case, there can be multiple spaces between "1" and ":" (exp: Question 1    :)
     white_space_2 = title_list.group(4) if title_list.group(4) is not None else ""
     full_title = title + white_space_1 + str(num_first) + white_space_2 + extra 
-    bbox = page.search_for(full_title, clip = fitz.Rect(coor[0], coor[1], coor[2], coor[3]))
+    bbox = get_page_chars(page).search_for(full_title, coor)
     
     return bbox
 
@@ -1490,27 +1933,25 @@ def get_title_question(line, page):
         line (dict): information of line
         page (fitz.Page, optional): information of page.
     Returns:
-        list: list containing question's coordinates
+        Box: box of question's title, None if the line has no span
     """
     text_spans = ''
-    coor = []
+    coor = None
     for item in line["spans"]:
         text_spans += item['text']
-        if len(coor) == 0:
-            coor = item['bbox']
+        if coor is None:
+            coor = Box(item['bbox'])
         else:
-            coor = compare_coors(coor, item['bbox'])
+            coor.merge(item['bbox'])
         if re.search(r"^(\s+)?(Câu|Cau|Bài|Question)+(\s|s\+)+[0-9]+(\:|\.)?(\s+)?$", text_spans):
             # -- True: title standard --
-            coor += [text_spans]
+            coor.text = text_spans
             break
         elif re.search(r"^(\s+)?(Câu|Cau|Bài|Question)+(\s|s\+)+[0-9]+(.*)?(\:|\.)?(\s+)?", text_spans):
-            coor = check_question_width(page, line, text_spans)
-            coor += [text_spans]
+            coor = Box(check_question_width(page, line, text_spans), text_spans)
             break
         elif re.search(r"^[0-9]+(\:|\.)?\s", text_spans.strip()):
-            coor = check_question_width(page, line, text_spans)
-            coor += [text_spans]
+            coor = Box(check_question_width(page, line, text_spans), text_spans)
     
     return coor
 
@@ -1518,14 +1959,14 @@ def add_option_answer(span, answers_options, num_q):
     """Add option coordinates to list answers_options
 
     Args:
-        span (list): list of span's coordinates
+        span (Span): box of option's title
         answers_options (dict): information of answers
         num_q (int): question's number
     Returns:
         dict: dictionary of answers after adding the option
     """
     # -- add option answers --
-    data_op = [span, [span[0], span[1], span[2], span[3]]]
+    data_op = [span, Box(span)]
     if f'question_{num_q - 1}' in answers_options:
         answers_options[f'question_{num_q - 1}'].append(data_op)
     else:
@@ -1550,52 +1991,108 @@ def get_answers_options(flag_explain_in_question, answers_options, num_q, line):
     if f'question_{num_q - 1}' in answers_options and flag_explain_in_question == False:
         if line['bbox'][3] > answers_options[f'question_{num_q - 1}'][-1][0][1]:
             if len(answers_options[f'question_{num_q - 1}'][-1]) == 2:
-                answers_options[f'question_{num_q - 1}'][-1][1] = compare_coors(
-                    answers_options[f'question_{num_q - 1}'][-1][1], line['bbox'])
+                answers_options[f'question_{num_q - 1}'][-1][1].merge(line['bbox'])
             else:
                 answers_options[f'question_{num_q - 1}'][-1].append(
                     line['bbox'])
     
     return answers_options
 
-def remove_item_in_blocks(blocks, block, line, keep_line = False):
-    """Remove previous blocks starting from given block
-
-    Args:
-        blocks (list): list of page's blocks
-        block (list): information of block
-        line (dict): information of line
-
-    Returns:
-        list: list of blocks after removing previous blocks starting from given block
-    """
-    # -- delete previous block --
-    index = blocks.index(block)
-    del blocks[:index]
-    # -- delete line used --
-    if keep_line == False:
-        index = blocks[0]['lines'].index(line)
-        del blocks[0]['lines'][:index+1]
-        if len(blocks[0]['lines']) == 0 or get_text_lines(blocks[0]) == "":
-            del blocks[0]
-    
-    return blocks
-
-def process_correct_answer(blocks):
+class BlockCursor:
+    """Position (block, line) in the blocks of a page where the traversal of the page goes on.
+
+    The blocks of the page are not modified: instead of deleting the blocks and lines already read, the traversal hands a
+    new cursor to the next step (exp: from the questions to the correct answers). The first block is seen without the
+    lines before the cursor.
+    """
+    __slots__ = ("blocks", "i_block", "i_line")
+
+    def __init__(self, blocks, i_block=0, i_line=0):
+        """
+        Args:
+            blocks (list): list of page's blocks
+            i_block (int, optional): index of the first block. Defaults to 0.
+            i_line (int, optional): index of the first line in the first block. Defaults to 0.
+        """
+        self.blocks = blocks
+        self.i_block = i_block
+        self.i_line = i_line
+
+    def __len__(self):
+        return max(0, len(self.blocks) - self.i_block)
+
+    def __iter__(self):
+        for _, block in self.enumerate():
+            yield block
+
+    def enumerate(self):
+        """Iterate the blocks from the cursor with their index in the page
+
+        Yields:
+            tuple: index and block
+        """
+        for i_block in range(self.i_block, len(self.blocks)):
+            yield i_block, self.get_block(i_block)
+
+    def get_block(self, i_block):
+        block = self.blocks[i_block]
+        if i_block == self.i_block and self.i_line > 0:
+            return dict(block, lines=block['lines'][self.i_line:])
+        return block
+
+    def first(self):
+        """Get the block at the cursor
+
+        Returns:
+            dict: block, None if there is no block left
+        """
+        return self.get_block(self.i_block) if len(self) > 0 else None
+
+    def next_block(self):
+        """Get the cursor at the start of the next block
+
+        Returns:
+            BlockCursor: cursor after the block at the cursor
+        """
+        return BlockCursor(self.blocks, self.i_block + 1)
+
+    def move_to(self, i_block, i_line, keep_line=False):
+        """Get the cursor going on from a line met while iterating this cursor
+
+        Args:
+            i_block (int): index of the block in the page (see enumerate)
+            i_line (int): index of the line in the block as iterated
+            keep_line (bool, optional): go on from the start of the block. Defaults to False, go on after the line
+                (the block is skipped when no text is left in it).
+
+        Returns:
+            BlockCursor: new cursor
+        """
+        first_line = self.i_line if i_block == self.i_block else 0
+        if keep_line:
+            return BlockCursor(self.blocks, i_block, first_line)
+
+        cursor = BlockCursor(self.blocks, i_block, first_line + i_line + 1)
+        block = cursor.first()
+        if len(block['lines']) == 0 or get_text_lines(block) == "":
+            return cursor.next_block()
+        return cursor
+
+@traced
+def process_correct_answer(cursor):
     """Process correct answers
 
     Args:
-        blocks (list): list of page's blocks
+        cursor (BlockCursor): position of the correct answers in page's blocks
 
     Returns:
         list: list containing returning type, correct answers and question's number
     """
-    text_spans = get_text_lines(blocks[0])
-    if check_correct_answer_text(text_spans):
-        del blocks[0]
+    if len(cursor) > 0 and check_correct_answer_text(get_text_lines(cursor.first())):
+        cursor = cursor.next_block()
 
     # -- check format user for the correct answers --
-    for block in blocks:
+    for i_block, block in cursor.enumerate():
         # -- check lines in block --
         if "lines" in block:
             text_spans = get_text_lines(block)
@@ -1608,7 +2105,7 @@ def process_correct_answer(blocks):
             
             # test has no correct answer and only explain
             if check_explain_text(text_spans):
-                return process_explain(blocks, 1)
+                return process_explain(cursor, 1)
                 
             if len(block['lines']) == 1:
                 break
@@ -1617,15 +2114,15 @@ def process_correct_answer(blocks):
             text_span_1 = block['lines'][0]['spans'][0]['text'].strip()
             text_span_2 = block['lines'][1]['spans'][0]['text'].strip()
             if check_correct_answer_type_1(text_span_1):
-                return get_correct_answer_type_1(blocks)
+                return get_correct_answer_type_1(cursor)
             elif re.search(r"^[A-F]{1}$", text_span_2):
-                return get_correct_answer_type_2(blocks)
+                return get_correct_answer_type_2(cursor)
             elif re.search(r"^[0-9]$", text_span_1) or re.search(r"^[0-9]$", text_span_2):
-                return get_correct_answer_type(blocks)
+                return get_correct_answer_type(cursor)
             break
-        else:
-            index = blocks.index(block)
-            del blocks[index]
+        elif i_block == cursor.i_block:
+            # skip images before the correct answers
+            cursor = cursor.next_block()
     
     return [{}, {}, {}, {}, -1, 99]
 
@@ -1655,6 +2152,81 @@ def check_answer_option_title(text_span):
         return True
     return False
 
+# -- markers of exam's lines --
+EXAM_MULTIPLE_PATTERN = re.compile(r"^Mã đề|Đề")
+CORRECT_ANSWER_PATTERN = re.compile(r"^(Đáp án|ĐÁP ÁN|BẢNG ĐÁP ÁN|HƯỚNG DẪN GIẢI – ĐÁP ÁN)")
+EXPLAIN_PATTERN = re.compile(r"^HƯỚNG DẪN GIẢI|HƯỚNG DẪN GIẢI|Hướng dẫn giải|Lời giải")
+# text does not include trac nghiem part
+NOT_MULTIPLE_CHOICE_PATTERN = re.compile(r"^(?!.*(trac nghiem|trắc nghiệm)).*")
+ESSAY_PATTERN = re.compile(r"^(([A-F]{1})?(\s+)?(\:|\.)?(\s+)?(Phần|PHẦN|[A-F]{1}|PHẦN CÂU HỎI)?(\s+)?(I|II|III)?(\s+)?(\:|\.|\–|\-|\—)??(\s+)?(\.*?)?)?(\s+)?(Tự luận|TỰ LUẬN)|tự luận|PHẦN TỰ LUẬN")
+END_PATTERN = re.compile(r"^((((–|—|-|_|\…|\.)(\s+)?)+)?(\s)?(HẾT|Hết|Het|HET|THE END))")
+READING_PASSAGE_PATTERN = re.compile(r"^Mark the|^Read the|Đọc văn bản")
+QUESTION_TITLE_PATTERN = re.compile(r"^(\s+)?(Câu|Cau|Bài|Question)+(\s)+[0-9]+(.*)?(\:|\.)?(\s+)?|^Mark the|^Read the|Đọc văn bản")
+# question title without title word (exp: 12.), only accepted when the text is bold
+QUESTION_NUMBER_PATTERN = re.compile(r"^[0-9]+(\:|\.)\s")
+# letter of an answer option's title (A to F), E and F only when a dot follows: more words start with them (exp: Flexibility)
+OPTION_LETTER = r"(?:[A-D]|[EF](?=\s*\.))"
+# answer option title (exp: A.), searched in the line's text without stripping
+ANSWER_OPTION_PATTERN = re.compile(r"(\.)?((\s+)?" + OPTION_LETTER + r"(\s+)?\.(\s+)?)|^(\.)?((\s+)?" + OPTION_LETTER + r"(\s+)?(\.)?(\s+)?)")
+
+# -- tags returned by LineClassifier --
+LINE_END = 1
+LINE_CORRECT_ANSWER = 2
+LINE_QUESTION_TITLE = 4
+LINE_READING_PASSAGE = 8
+LINE_ESSAY = 16
+LINE_EXPLAIN = 32
+LINE_EXAM_MULTIPLE = 64
+LINE_ANSWER_OPTION = 128
+
+class LineClassifier:
+    """Classify the text of a line against all markers of exam at once.
+
+    The result is an int combining the LINE_* tags, for example:
+    tags & LINE_QUESTION_TITLE is true when the line starts a question.
+    """
+
+    def classify(self, text_spans, line=None):
+        """Get the tags of a line
+
+        Args:
+            text_spans (str): content of line
+            line (dict, optional): information of line. Needed to accept a question title without title word (exp: 12.). Defaults to None.
+                The tags found by tag_page_layout are reused when the text is the same.
+
+        Returns:
+            int: tags of the line
+        """
+        if line is not None and "tags" in line and line["tags"][0] == text_spans:
+            return line["tags"][1]
+
+        metrics = current_metrics.get()
+        if metrics is not None:
+            metrics.count("line_classifications")
+
+        text = text_spans.strip()
+        tags = 0
+        if END_PATTERN.search(text):
+            tags |= LINE_END
+        if CORRECT_ANSWER_PATTERN.search(text):
+            tags |= LINE_CORRECT_ANSWER
+        if READING_PASSAGE_PATTERN.search(text):
+            tags |= LINE_READING_PASSAGE
+        if QUESTION_TITLE_PATTERN.search(text) or line is not None and QUESTION_NUMBER_PATTERN.search(text) and line["spans"][0]["flags"] >= 16:
+            tags |= LINE_QUESTION_TITLE
+        if NOT_MULTIPLE_CHOICE_PATTERN.search(text) and ESSAY_PATTERN.search(text):
+            tags |= LINE_ESSAY
+        if EXPLAIN_PATTERN.search(text):
+            tags |= LINE_EXPLAIN
+        if EXAM_MULTIPLE_PATTERN.search(text):
+            tags |= LINE_EXAM_MULTIPLE
+        if ANSWER_OPTION_PATTERN.search(text_spans):
+            tags |= LINE_ANSWER_OPTION
+        
+        return tags
+
+line_classifier = LineClassifier()
+
 def check_exam_multiple(text_spans):
     """Check if there are multiple exams in one pdf
 
@@ -1664,9 +2236,7 @@ def check_exam_multiple(text_spans):
     Returns:
         bool: Return true if given text contains "Mã đề"
     """
-    if re.search(r"^Mã đề|Đề", text_spans.strip()):
-        return True
-    return False
+    return EXAM_MULTIPLE_PATTERN.search(text_spans.strip()) is not None
 
 def check_correct_answer_text(text_spans):
     """Check if given text contains start of correct answers 
@@ -1677,9 +2247,7 @@ def check_correct_answer_text(text_spans):
     Returns:
         bool: Return true if given text contains start of correct answers
     """
-    if re.search(r"^(Đáp án|ĐÁP ÁN|BẢNG ĐÁP ÁN|HƯỚNG DẪN GIẢI – ĐÁP ÁN)", text_spans.strip()):
-        return True
-    return False
+    return CORRECT_ANSWER_PATTERN.search(text_spans.strip()) is not None
 
 def check_explain_text(text_spans):
     """Check if given text contains explanation 
@@ -1690,9 +2258,7 @@ def check_explain_text(text_spans):
     Returns:
         bool: Return true if given text contains explanation
     """
-    if re.search(r"^HƯỚNG DẪN GIẢI|HƯỚNG DẪN GIẢI|Hướng dẫn giải|Lời giải", text_spans.strip()):
-        return True
-    return False
+    return EXPLAIN_PATTERN.search(text_spans.strip()) is not None
     
 def check_essay_text(text_spans):
     """Check if given text contains essays 
@@ -1703,10 +2269,8 @@ def check_essay_text(text_spans):
     Returns:
         bool: Return true if given text contains essays
     """
-    # text does not include trac nghiem part 
-    if re.search(r"^(?!.*(trac nghiem|trắc nghiệm)).*", text_spans.strip()) and re.search(r"^(([A-F]{1})?(\s+)?(\:|\.)?(\s+)?(Phần|PHẦN|[A-F]{1}|PHẦN CÂU HỎI)?(\s+)?(I|II|III)?(\s+)?(\:|\.|\–|\-|\—)??(\s+)?(\.*?)?)?(\s+)?(Tự luận|TỰ LUẬN)|tự luận|PHẦN TỰ LUẬN", text_spans.strip()):
-        return True
-    return False
+    text = text_spans.strip()
+    return NOT_MULTIPLE_CHOICE_PATTERN.search(text) is not None and ESSAY_PATTERN.search(text) is not None
 
 def check_end_text(text_spans):
     """Check if given text contains the end of document 
@@ -1717,9 +2281,7 @@ def check_end_text(text_spans):
     Returns:
         bool: Return true if given text contains the end of document 
     """
-    if re.search(r"^((((–|—|-|_|\…|\.)(\s+)?)+)?(\s)?(HẾT|Hết|Het|HET|THE END))", text_spans.strip()):   
-        return True
-    return False
+    return END_PATTERN.search(text_spans.strip()) is not None
 
 def check_reading_passage(text_spans):
     """Check if given text contains beginning of English vocabularies 
@@ -1730,9 +2292,7 @@ def check_reading_passage(text_spans):
     Returns:
         bool: Return true if given text contains beginning of English vocabularies 
     """
-    if re.search(r"^Mark the|^Read the|Đọc văn bản", text_spans.strip()):
-        return True
-    return False
+    return READING_PASSAGE_PATTERN.search(text_spans.strip()) is not None
 
 def check_question_title(text_spans, line):
     """Check if given text contains beginning of question title
@@ -1743,66 +2303,64 @@ def check_question_title(text_spans, line):
     Returns:
         bool: Return true if given text contains question title
     """
-    if re.search(r"^(\s+)?(Câu|Cau|Bài|Question)+(\s)+[0-9]+(.*)?(\:|\.)?(\s+)?|^Mark the|^Read the|Đọc văn bản", text_spans.strip()) or re.search(r"^[0-9]+(\:|\.)\s", text_spans.strip()) and line["spans"][0]["flags"] >= 16:
-        return True
-    return False
+    text = text_spans.strip()
+    return QUESTION_TITLE_PATTERN.search(text) is not None or QUESTION_NUMBER_PATTERN.search(text) is not None and line["spans"][0]["flags"] >= 16
 
-def process_explain_in_correct_answer(blocks, correct_answers):
+def process_explain_in_correct_answer(cursor, correct_answers):
     """Process explains when there are explanation and correct answers 
 
     Args:
-        blocks (list): list of page's blocks
+        cursor (BlockCursor): position of the explanation in page's blocks
 
     Returns:
         list: list containing return type, coordinates of explains and number of questions
     """
-    data = process_explain(blocks, 1)
+    data = process_explain(cursor, 1)
     data[3] = correct_answers
     
     return data
 
 # -- case correct answer format: 1.C
-def get_correct_answer_type_1(blocks):
+def get_correct_answer_type_1(cursor):
     """Process correct answers when one span includes both number and letter of correct answers
 
     Args:
-        blocks (list): list of page's blocks
+        cursor (BlockCursor): position of the correct answers in page's blocks
     Returns:
         list: list of return type, correct answers and question number
     """
     correct_answers = {}
-    for block in blocks:
+    for i_block, block in cursor.enumerate():
         # -- check lines in block --
         if "lines" in block:
-            for line in block['lines']:
+            for i_line, line in enumerate(block['lines']):
                 text_spans = get_text_spans(line).strip()
                 if check_correct_answer_type_1(text_spans):
                     arr_correct = re.split(r"[-.]", text_spans)
                     if len(arr_correct) > 1:
                         correct_answers[f'question_{arr_correct[0]}'] = arr_correct[1]
                 elif check_explain_text(text_spans):
-                    return process_explain_in_correct_answer(remove_item_in_blocks(blocks, block, line, True), correct_answers)
+                    return process_explain_in_correct_answer(cursor.move_to(i_block, i_line, True), correct_answers)
                 elif check_question_title(text_spans, line):
-                    return process_explain_in_correct_answer(remove_item_in_blocks(blocks, block, line, True), correct_answers)
+                    return process_explain_in_correct_answer(cursor.move_to(i_block, i_line, True), correct_answers)
     
     return [{}, {}, {}, correct_answers, -1, 99]
 
 # -- case correct answer format: span 1: "1" and span 2: "C"
-def get_correct_answer_type_2(blocks):
+def get_correct_answer_type_2(cursor):
     """Process correct answers when one span includes the number and the next span includes the letter
 
     Args:
-        blocks (list): list of page's blocks
+        cursor (BlockCursor): position of the correct answers in page's blocks
     Returns:
         list: list of return type, correct answers and question number
     """
     correct_answers = {}
     num_correct = 1
-    for block in blocks:
+    for i_block, block in cursor.enumerate():
         # -- check lines in block --
         if "lines" in block:
-            # for i in range(0, len_line):
-            for line in block['lines']:
+            for i_line, line in enumerate(block['lines']):
                 for span in line['spans']:
                     text_span = re.sub(r"\s+|\.|\-", "", span['text'])
                     if text_span.isnumeric():
@@ -1811,17 +2369,17 @@ def get_correct_answer_type_2(blocks):
                     elif check_answer_option_title(text_span):
                         correct_answers[f'question_{num_correct}'] = text_span
                     elif check_explain_text(text_span):
-                        return process_explain_in_correct_answer(remove_item_in_blocks(blocks, block, line), correct_answers)
+                        return process_explain_in_correct_answer(cursor.move_to(i_block, i_line), correct_answers)
                     elif check_question_title(text_span, line) or check_question_title(text_span, line):
-                        return process_explain_in_correct_answer(remove_item_in_blocks(blocks, block, line, True), correct_answers)
+                        return process_explain_in_correct_answer(cursor.move_to(i_block, i_line, True), correct_answers)
     
     return [{}, {}, {}, correct_answers, -1, 99]
 
-def get_correct_answer_type(blocks):
+def get_correct_answer_type(cursor):
     """Check what type of correct answers is
 
     Args:
-        blocks (list): list of page's blocks
+        cursor (BlockCursor): position of the correct answers in page's blocks
 
     Returns:
         list: list containing returning type, correct answers and question's number
@@ -1829,51 +2387,52 @@ def get_correct_answer_type(blocks):
     correct_answers = {}
     num_title = 1
     
-    for block in blocks:
+    for i_block, block in cursor.enumerate():
         # -- check lines in block --
         if "lines" in block:
-            for line in block['lines']:
+            for i_line, line in enumerate(block['lines']):
                 for span in line['spans']:
                     text_span = span['text'].strip()
                     if re.search(r"^[A-F]{1}$", text_span):
                         correct_answers[f'question_{num_title}'] = text_span
                         num_title +=1
                     elif check_explain_text(text_span):
-                        return process_explain_in_correct_answer(remove_item_in_blocks(blocks, block, line), correct_answers)
+                        return process_explain_in_correct_answer(cursor.move_to(i_block, i_line), correct_answers)
                     elif check_question_title(text_span, line):
-                        return process_explain_in_correct_answer(blocks, correct_answers)
+                        return process_explain_in_correct_answer(cursor, correct_answers)
                           
     return [{}, {}, {}, correct_answers, -1, 99]
 
+@traced
 def process_explain(blocks, num_q):
     """Process explanation
 
     Args:
-        blocks (list): list of page's blocks
+        blocks (list or BlockCursor): page's blocks
         num_q (int): question's number
 
     Returns:
         list: list containing returning type, explanation and question's number
     """
-    explains = {}
+    explains = BoxIndex()
     for block in blocks:
         # -- check lines in block --
         if "lines" in block:
             text_spans = ''
             for line in block['lines']:
                 text_spans = get_text_spans(line)
+                line_tags = line_classifier.classify(text_spans, line)
                 
-                if check_explain_text(text_spans):
+                if line_tags & LINE_EXPLAIN:
                     continue
                 
-                if check_question_title(text_spans, line):
+                if line_tags & LINE_QUESTION_TITLE:
                     # -- The case explain question number is not order
                     # -- get first question number
                     g_num_q = re.search(r'\d+', text_spans)
                     if g_num_q:
                         num_q = int(g_num_q.group())
-                    explains[f'question_{num_q}'] = line['bbox'] + \
-                        [text_spans]
+                    explains[f'question_{num_q}'] = Box(line['bbox'], text_spans)
                     num_q += 1
                     continue
                 
@@ -1897,51 +2456,47 @@ def process_line_image(questions, num_q, block):
         questions: update question' coordinate after processing image
     """
     if f'question_{num_q - 1}' not in questions:
-        questions[f'question_{num_q - 1}'] = block['bbox'] + [""]
+        questions[f'question_{num_q - 1}'] = Box(block['bbox'], "")
     elif f'question_{num_q - 1}' in questions and block['bbox'][3] >= questions[f'question_{num_q - 1}'][3]:
-        questions[f'question_{num_q - 1}'] = compare_coors_with_text(
-            questions[f'question_{num_q - 1}'], block['bbox'] + ['image'])
+        questions.merge(f'question_{num_q - 1}', block['bbox'], 'image')
     else:
-        questions = compare_image_outside(questions, block, block['image'])
+        questions = compare_image_outside(questions, block, 'image')
     
     return questions
 
-def process_stop_questions(blocks):
+def process_stop_questions(cursor):
     """Process data when the end of document is found
 
     Args:
-        blocks (list): list of page's blocks
-        questions (dict): information of questions's coordinates and questions title's coordinates
+        cursor (BlockCursor): position of the end of questions in page's blocks
 
     Returns:
         list: list containing returning type, questions and question's number 
     """
-    text_spans = get_text_lines(blocks[0])
-    if check_end_text(text_spans):
-        del blocks[0]
-    for block in blocks:
+    if len(cursor) > 0 and line_classifier.classify(get_text_lines(cursor.first())) & LINE_END:
+        cursor = cursor.next_block()
+    for i_block, block in cursor.enumerate():
         # -- check lines in block --
         if "lines" in block:
-            for line in block['lines']:
-                text_spans = ''
+            for i_line, line in enumerate(block['lines']):
                 text_spans = get_text_spans(line)
-                if check_correct_answer_text(text_spans.strip()):
-                    data_answer = process_correct_answer(
-                        remove_item_in_blocks(blocks, block, line))
+                line_tags = line_classifier.classify(text_spans, line)
+                if line_tags & LINE_CORRECT_ANSWER:
+                    data_answer = process_correct_answer(cursor.move_to(i_block, i_line))
                     return data_answer
-                elif check_explain_text(text_spans):
-                    return process_explain(remove_item_in_blocks(blocks, block, line), 1)
+                elif line_tags & LINE_EXPLAIN:
+                    return process_explain(cursor.move_to(i_block, i_line), 1)
                 else:
                     if len(block['lines']) == 1:
                         continue
                     text_span_1 = block['lines'][0]['spans'][0]['text'].strip()
                     text_span_2 = block['lines'][1]['spans'][0]['text'].strip()
                     if re.search(r"^[0-9]+(\s+)?(\:|\.)(\s+)?[A-F]{1}$", text_span_1):
-                        return get_correct_answer_type_1(blocks)
+                        return get_correct_answer_type_1(cursor)
                     elif re.search(r"^[A-F]{1}$", text_span_2):
-                        return get_correct_answer_type_2(blocks)
+                        return get_correct_answer_type_2(cursor)
                     elif re.search(r"^[A-F]{1}$", text_span_1) or re.search(r"^[A-F]{1}$", text_span_2):
-                        return get_correct_answer_type(blocks)
+                        return get_correct_answer_type(cursor)
     
     return [{}, {}, {}, {}, 1, 99]
 
@@ -1958,8 +2513,7 @@ def process_line_image_with_answer_in_questions(num_q, block, object_1, object_2
         list: list containing new coordinates of questions and explanation after finding what question the image belongs to
     """
     if f'question_{num_q - 1}' in object_1 and block['bbox'][3] >= object_1[f'question_{num_q - 1}'][3]:
-        object_1[f'question_{num_q - 1}'] = compare_coors_with_text(
-            object_1[f'question_{num_q - 1}'], block['bbox'] + ['image'])
+        object_1.merge(f'question_{num_q - 1}', block['bbox'], 'image')
     else:
         return compare_image_outside_two_object(object_1, object_2, block, 'image')
     return [object_1, object_2]
@@ -1980,17 +2534,13 @@ def compare_image_outside_two_object(object_1, object_2, line, text_spans):
     key_2 = get_object_match_image(object_2, line)
     if key_1 != "" and key_2 != "":
         if object_1[key_1][3] < object_2[key_2][3]:
-            object_1[key_1] = compare_coors_with_text(
-                object_1[key_1], line['bbox'] + [text_spans])
+            object_1.merge(key_1, line['bbox'], text_spans)
         else:
-            object_2[key_2] = compare_coors_with_text(
-                object_2[key_2], line['bbox'] + [text_spans])
+            object_2.merge(key_2, line['bbox'], text_spans)
     elif key_1 != "":
-        object_1[key_1] = compare_coors_with_text(
-            object_1[key_1], line['bbox'] + [text_spans])
+        object_1.merge(key_1, line['bbox'], text_spans)
     elif key_2 != "":
-        object_2[key_2] = compare_coors_with_text(
-            object_2[key_2], line['bbox'] + [text_spans])
+        object_2.merge(key_2, line['bbox'], text_spans)
 
     return [object_1, object_2]
 
@@ -1998,39 +2548,31 @@ def get_object_match_image(obj, line):
     """Return which question the line belongs to
 
     Args:
-        obj (list): information of questions/explanations
+        obj (BoxIndex): information of questions/explanations
         line (dict): information of line
     Returns:
-        int: question's number
+        str: question's key, "" if no question matches
     """
-    key_first = list(obj.keys())[0]
-    for key in obj:
-        # if the line is inside the the current key 
-        # or the current key is the first question and position of line is covered by the end of key
-        if obj[key][1] < (line['bbox'][3] + line['bbox'][1])/2 < obj[key][3] or (key_first == key and (line['bbox'][3] + line['bbox'][1])/2 < obj[key][3]):
-            return key
+    # the line is inside a question or is covered by the end of the first question
+    key = obj.find((line['bbox'][3] + line['bbox'][1])/2, True)
 
-    return ""
+    return "" if key is None else key
 
 
 def compare_image_outside(questions, line, text_spans):
     """Check if the image belongs to previous question
 
     Args:
-        questions (dict): information of questions's coordinates and questions title's coordinates
+        questions (BoxIndex): information of questions's coordinates and questions title's coordinates
         line (dict): information of line
         text_spans (str): content of line
 
     Returns:
-        dict: Updated questions's coordinaet to cover image
+        BoxIndex: Updated questions's coordinaet to cover image
     """
-    key_first = list(questions.keys())[0]
-
-    for key in questions:
-        if questions[key][1] < (line['bbox'][3] + line['bbox'][1])/2 < questions[key][3] or (key_first == key and (line['bbox'][3] + line['bbox'][1])/2 < questions[key][3]):
-            questions[key] = compare_coors_with_text(
-                questions[key], line['bbox'] + [text_spans])
-            break
+    key = questions.find((line['bbox'][3] + line['bbox'][1])/2, True)
+    if key is not None:
+        questions.merge(key, line['bbox'], text_spans)
 
     return questions
 
@@ -2057,15 +2599,13 @@ def merge_question(line, questions, num_q, text_spans, answers_options = {}):
             # make sure line within answer option
             if line['bbox'][0] > answers_options[f'question_{num_q - 1}'][-1][1][2] or answers_options[f'question_{num_q - 1}'][-1][1][1] < line['bbox'][3]:
                 # add coordinate of line to answers_options
-                answers_options[f'question_{num_q - 1}'][-1][1] = compare_coors(
-                answers_options[f'question_{num_q - 1}'][-1][1], line['bbox'])
+                answers_options[f'question_{num_q - 1}'][-1][1].merge(line['bbox'])
 
     if f'question_{num_q - 1}' not in questions:
-        questions[f'question_{num_q - 1}'] = line['bbox'] + [text_spans]
+        questions[f'question_{num_q - 1}'] = Box(line['bbox'], text_spans)
     else:
         if line['bbox'][3] > questions[f'question_{num_q - 1}'][1]:
-            questions[f'question_{num_q - 1}'] = compare_coors_with_text(
-                questions[f'question_{num_q - 1}'], line['bbox'] + [text_spans]) 
+            questions.merge(f'question_{num_q - 1}', line['bbox'], text_spans)
         elif text_spans.strip() != "":
             # the current text does not belong to current question
             # have to find which question the text belongs to
@@ -2079,82 +2619,152 @@ def compare_question_outside(questions, line, text_spans, answers_options = {}):
 
     Args:
         line (dict): information of line
-        questions (dict): information of questions's coordinates and questions title's coordinates
+        questions (BoxIndex): information of questions's coordinates and questions title's coordinates
         num_q (int): question's number
         text_spans (str): content of line
         answers_options (dict):information of answers
 
     Returns:
-        dict: Updated question's coordinates to cover the coordinates of answer options
+        BoxIndex: Updated question's coordinates to cover the coordinates of answer options
     """    
-    for key in questions:
-        # find what question the text belongs to 
-        if questions[key][1] < (line['bbox'][1] + line['bbox'][3])/2 < questions[key][3]:
-            questions[key] = compare_coors_with_text(questions[key], line['bbox'] + [text_spans])
-            # -- case the text in answers options --
-            if len(answers_options) > 0 and key in answers_options and len(answers_options[key]) > 0 and (answers_options[key][0][0][1] < line['bbox'][1] or answers_options[key][0][0][1] < line['bbox'][3]):
-                len_answer = len(answers_options[key])
-                arr_i = []
-                for i in range(1, len_answer):
-                    if answers_options[key][i][0][1] < (line['bbox'][1] + line['bbox'][3])/2 < answers_options[key][i][0][3]:
-                        arr_i.append(i)
-                for i in arr_i:
-                    if answers_options[key][i][0][2] < line['bbox'][2]:
-                        if len(answers_options[key][i]) == 2:
-                            answers_options[key][i][1] = compare_coors(
-                                answers_options[key][i][1], line['bbox'])
-                        else:
-                            answers_options[key][i].append(line['bbox'])
-            break
+    # find what question the text belongs to 
+    key = questions.find((line['bbox'][1] + line['bbox'][3])/2)
+    if key is not None:
+        questions.merge(key, line['bbox'], text_spans)
+        # -- case the text in answers options --
+        if len(answers_options) > 0 and key in answers_options and len(answers_options[key]) > 0 and (answers_options[key][0][0][1] < line['bbox'][1] or answers_options[key][0][0][1] < line['bbox'][3]):
+            len_answer = len(answers_options[key])
+            arr_i = []
+            for i in range(1, len_answer):
+                if answers_options[key][i][0][1] < (line['bbox'][1] + line['bbox'][3])/2 < answers_options[key][i][0][3]:
+                    arr_i.append(i)
+            for i in arr_i:
+                if answers_options[key][i][0][2] < line['bbox'][2]:
+                    if len(answers_options[key][i]) == 2:
+                        answers_options[key][i][1].merge(line['bbox'])
+                    else:
+                        answers_options[key][i].append(line['bbox'])
     
     return questions
 
-def compare_coors_with_text(coor, coor_m):
-    """Get the smallest x0, y0 and largest x1,y1 between two lists
-
-    Args:
-        coor (list): given list
-        coor_m (list): given list
-
-    Returns:
-        list: list containing the smallest x0, y0 and largest x1,y1 between two lists
-    """
-    coor_new = copy.deepcopy(coor)
-    # get smallest x0, y0
-    coor_new[0] = min(coor[0], coor_m[0])
-    coor_new[1] = min(coor[1], coor_m[1])
-    # get largest x1, y1 
-    coor_new[2] = max(coor[2], coor_m[2])
-    coor_new[3] = max(coor[3], coor_m[3])
-    #append text
-    coor_new[4] = coor[4] + coor_m[4]
-    
-    return coor_new
-
-def get_block_main(blocks, type_flag, flag_first_page):
-    """Delete header and footer
+def get_block_main(blocks, type_flag, flag_first_page, header_footer=None):
+    """Get the blocks of page without header and footer, blocks is not changed
 
     Args:
         blocks (list):list of blocks
         flag_first_page (bool): check if page is first page
+        header_footer (HeaderFooterIndex, optional): headers and footers of the document. Defaults to None,
+            headers and footers are guessed from the first three blocks and the last one, or from those left at the top
+            (bottom) of the page when no repeated header (footer) was removed.
 
     Returns:
         list: list containing blocks
     """
     if len(blocks) < 3:
         return []
-    if get_text_in_block(blocks[0], type_flag, True) == True:
-        del blocks[0]
-    elif get_text_in_block(blocks[1], type_flag) == True:
-        del blocks[0:2]
-    elif get_text_in_block(blocks[2], type_flag) == True:
-        del blocks[0:3]
-    elif get_text_in_block(blocks[len(blocks) - 1], type_flag, True):
-        del blocks[-1:]
-    if get_text_lines(blocks[0]).strip() == "" or (flag_first_page == True and blocks[0]['type'] == 1):
-        del blocks[0]
-    
-    return blocks
+    removed_bands = set()
+    if header_footer is not None:
+        main_blocks = []
+        for block in blocks:
+            # the exam code is kept in the answer key (see get_text_in_block)
+            if header_footer.is_header_footer(block) and not (type_flag == 99 and re.search(r"Mã đề", get_text_lines(block))):
+                removed_bands.add(header_footer.get_band(block))
+            else:
+                main_blocks.append(block)
+        blocks = main_blocks
+    start, end = 0, len(blocks)
+    # headers or footers not repeated in the document (exp: first pages of an exam followed by its explanations)
+    if "top" not in removed_bands and len(blocks) >= 3:
+        if get_text_in_block(blocks[0], type_flag, True) == True:
+            start = 1
+        elif get_text_in_block(blocks[1], type_flag) == True:
+            start = 2
+        elif get_text_in_block(blocks[2], type_flag) == True:
+            start = 3
+    if start == 0 and "bottom" not in removed_bands and end > 0 and get_text_in_block(blocks[end - 1], type_flag, True):
+        end -= 1
+    if start < end and (get_text_lines(blocks[start]).strip() == "" or (flag_first_page == True and blocks[start]['type'] == 1)):
+        start += 1
+    
+    return blocks[start:end]
+
+# number of pages sampled to find the headers and footers of a document, and share of them a header or footer is repeated on
+HEADER_FOOTER_SAMPLE_PAGES = 16
+HEADER_FOOTER_MIN_SHARE = 0.2
+# share of the page height at its top and bottom where headers and footers are looked for
+HEADER_FOOTER_MARGIN = 0.08
+
+def sample_pages(n_page, n_samples=HEADER_FOOTER_SAMPLE_PAGES):
+    """Get the numbers of pages spread evenly over the document
+
+    Args:
+        n_page (int): number of pages
+        n_samples (int, optional): maximum number of pages. Defaults to HEADER_FOOTER_SAMPLE_PAGES.
+
+    Returns:
+        list: numbers of pages
+    """
+    if n_page <= n_samples:
+        return list(range(n_page))
+
+    return sorted({round(i * (n_page - 1) / (n_samples - 1)) for i in range(n_samples)})
+
+class HeaderFooterIndex:
+    """Headers and footers repeated in a document (exp: "Trang 7/25 - WordToan" at the bottom of pages).
+
+    Blocks are known by signatures of their text, digits replaced by "#" as page numbers change from page to page,
+    and their position: top, bottom and left side, or top, bottom and right side (page numbers change the width of blocks,
+    odd and even pages may have headers on different sides). Only blocks in the margins of the page (HEADER_FOOTER_MARGIN of
+    its height at the top and at the bottom) are signed, content repeated in the body of pages (exp: "Lời giải") is kept.
+    The signatures of text blocks repeated on at least HEADER_FOOTER_MIN_SHARE of the sampled pages (2 pages at least)
+    are headers or footers, any page can then look its blocks up.
+    """
+
+    def __init__(self, layouts, page_height):
+        """
+        Args:
+            layouts (iterable): blocks of the sampled pages (see get_page_layout)
+            page_height (float): height of the pages
+        """
+        self.page_height = page_height
+        pages = defaultdict(int)
+        n_layouts = 0
+        for blocks in layouts:
+            n_layouts += 1
+            signatures = set()
+            for block in blocks:
+                signatures.update(self.get_signatures(block))
+            for signature in signatures:
+                pages[signature] += 1
+        min_pages = max(2, math.ceil(n_layouts * HEADER_FOOTER_MIN_SHARE))
+        self.signatures = {signature for signature, count in pages.items() if count >= min_pages}
+
+    def get_band(self, block):
+        """Get the margin of the page the block is in
+
+        Returns:
+            str: "top", "bottom" or None
+        """
+        margin = self.page_height * HEADER_FOOTER_MARGIN
+        if block["bbox"][3] <= margin:
+            return "top"
+        if block["bbox"][1] >= self.page_height - margin:
+            return "bottom"
+        return None
+
+    def get_signatures(self, block):
+        if block["type"] != 0 or self.get_band(block) is None:
+            return ()
+        text = re.sub(r"[0-9]+", "#", get_text_lines(block).strip())
+        x0, y0, x1, y1 = (round(value) for value in block["bbox"])
+
+        return ((text, y0, y1, "left", x0), (text, y0, y1, "right", x1))
+
+    def is_header_footer(self, block):
+        return any(signature in self.signatures for signature in self.get_signatures(block))
+
+    def __len__(self):
+        return len(self.signatures)
 
 def write_file(data, jsonName="data.json"):
     if os.path.exists(jsonName):
@@ -2163,21 +2773,28 @@ def write_file(data, jsonName="data.json"):
     with open(jsonName, 'w', encoding='utf-8') as f:
         json.dump(data, f, ensure_ascii=False, indent=4)
 
-def process_explain_base64(explains, coor_x, doc, path_root_output = ""):
+def process_explain_base64(explains, coor_x, doc, path_root_output = "", image_encoder=None, render_images=True, renderer=None):
     """Create image of explanation
 
     Args:
         explains (list): list of explanation's coordinates
         coor_x (list): list of explanation's max width
         path_root_output (str): link to the output's file
+        image_encoder (ImageEncoder, optional): encoder of images. Defaults to None, PNG.
+        render_images (bool, optional): create images. Defaults to True.
+        renderer (CropRenderer, optional): renderer of crops. Defaults to None, a renderer is created from image_encoder and render_images.
     """
     coor_explains_result = defaultdict(list)
+    if renderer is None:
+        renderer = CropRenderer(image_encoder, render_images=render_images)
     for explain in explains:
         for key in explain[1]:
             coor_x[0] = min(explain[1][f"{key}"][0], coor_x[0])
             coor = [coor_x[0], explain[1][f"{key}"][1], explain[1][f"{key}"][2], explain[1][f"{key}"][3]]
             if key not in coor_explains_result:
-                coor_explains_result[key] = [get_base64_title(doc[explain[0]], coor)]
+                coor_explains_result[key] = [get_base64_title(doc[explain[0]], coor, renderer)]
             else:
-                coor_explains_result[key].append(get_base64_title(doc[explain[0]], coor))
+                coor_explains_result[key].append(get_base64_title(doc[explain[0]], coor, renderer))
+    renderer.release()
+    
     return coor_explains_result
@@ -0,0 +1,181 @@
+"""Boxes collected by the 1st phase of extract_pdf (questions, explanations and answer options).
+
+Coordinates of a box are read and written by index like PyMuPDF's bbox lists (box[0] is x0, box[1] y0, box[2] x1 and
+box[3] y1), so that a box and a bbox can be compared or merged by the same code. Boxes only live inside the extraction:
+the returned json has lists [x0, y0, x1, y1, image] made from them.
+
+The boxes of questions and explanations of a page are kept in a BoxIndex, which finds the box a line or an image read
+out of order belongs to without going through all boxes of the page.
+"""
+import math
+
+class Box:
+    """Box of a question, an explanation or the content of an answer option
+
+    Attributes:
+        text (str): text read in the box, None if no text was read. Merging boxes keeps the first non-empty text,
+            "" means the box only covers lines without text.
+        title (Box): box of the question's title, None if it has none
+    """
+    __slots__ = ("x0", "y0", "x1", "y1", "text", "title")
+
+    COORDINATES = ("x0", "y0", "x1", "y1")
+
+    def __init__(self, bbox, text=None, title=None):
+        self.x0, self.y0, self.x1, self.y1 = bbox[0], bbox[1], bbox[2], bbox[3]
+        self.text = text
+        self.title = title
+
+    def __getitem__(self, index):
+        return getattr(self, self.COORDINATES[index])
+
+    def __setitem__(self, index, value):
+        setattr(self, self.COORDINATES[index], value)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_list()}, {self.text!r})"
+
+    def merge(self, bbox, text=None):
+        """Grow the box to cover bbox
+
+        Args:
+            bbox (list or Box): coordinates of x0, y0, x1, and y1
+            text (str, optional): text read in bbox. Defaults to None.
+        """
+        self.x0 = min(self.x0, bbox[0])
+        self.y0 = min(self.y0, bbox[1])
+        self.x1 = max(self.x1, bbox[2])
+        self.y1 = max(self.y1, bbox[3])
+        if text is not None and not self.text:
+            self.text = text
+
+    def to_list(self):
+        """Get the coordinates of the box as in the returned json
+
+        Returns:
+            list: coordinates of x0, y0, x1, and y1
+        """
+        return [self.x0, self.y0, self.x1, self.y1]
+
+class Span(Box):
+    """Box of an answer option's title, with the style of its span used to tell real titles from the other ones
+
+    Attributes:
+        ascender (float): ascender of the span's font
+        color (int): color of the span
+        flags (int): flags of the span's font (exp: bold)
+    """
+    __slots__ = ("ascender", "color", "flags")
+
+    def __init__(self, bbox, text, ascender, color, flags):
+        super().__init__(bbox, text)
+        self.ascender = ascender
+        self.color = color
+        self.flags = flags
+
+    @classmethod
+    def from_span(cls, span, bbox=None):
+        """Get the box of a span of PyMuPDF's text dict
+
+        Args:
+            span (dict): span of a line
+            bbox (list, optional): coordinates of the box. Defaults to None, the span's bbox.
+
+        Returns:
+            Span: box of the span
+        """
+        return cls(span["bbox"] if bbox is None else bbox, span["text"], span["ascender"], span["color"], span["flags"])
+
+class BoxIndex(dict):
+    """Boxes of a page by key (exp: question_1) in the order they were added, indexed by horizontal bands of the page
+
+    A box is listed in every band it covers, a lookup only checks the boxes of the band of the point. Boxes only grow while
+    a page is traversed: the bands of a box are updated when it is set (boxes[key] = box) or grown with BoxIndex.merge.
+    Coordinates changed in another way are not seen by the index (exp: 2nd phase of extract_pdf, when it is not used).
+    """
+    __slots__ = ("bands", "band_ranges", "ranks", "n_added")
+
+    # height of a band (pt), a few lines
+    BAND_HEIGHT = 32
+
+    def __init__(self, boxes=()):
+        super().__init__()
+        self.bands = {}
+        self.band_ranges = {}
+        # order of keys, kept when the box of a key is replaced
+        self.ranks = {}
+        self.n_added = 0
+        self.update(boxes)
+
+    def __setitem__(self, key, box):
+        super().__setitem__(key, box)
+        if key not in self.ranks:
+            self.ranks[key] = self.n_added
+            self.n_added += 1
+        self.add_bands(key)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        # the key is left in its bands, lookups skip it
+        del self.ranks[key]
+        del self.band_ranges[key]
+
+    def pop(self, key, *default):
+        if key not in self:
+            return super().pop(key, *default)
+        box = self[key]
+        del self[key]
+        return box
+
+    def update(self, boxes=(), **kwargs):
+        for key, box in dict(boxes, **kwargs).items():
+            self[key] = box
+
+    def add_bands(self, key):
+        """List the box of key in the bands it covers and not listed yet
+
+        Args:
+            key (str): key of the box
+        """
+        box = self[key]
+        first, last = math.floor(box[1] / self.BAND_HEIGHT), math.floor(box[3] / self.BAND_HEIGHT)
+        listed = self.band_ranges.get(key)
+        for band in range(first, last + 1):
+            if listed is None or not listed[0] <= band <= listed[1]:
+                self.bands.setdefault(band, []).append(key)
+        self.band_ranges[key] = (first, last) if listed is None else (min(first, listed[0]), max(last, listed[1]))
+
+    def merge(self, key, bbox, text=None):
+        """Grow the box of key to cover bbox (see Box.merge)
+
+        Args:
+            key (str): key of the box
+            bbox (list or Box): coordinates of x0, y0, x1, and y1
+            text (str, optional): text read in bbox. Defaults to None.
+        """
+        self[key].merge(bbox, text)
+        self.add_bands(key)
+
+    def find(self, y, above_first=False):
+        """Get the first box (in the order of keys) containing y between its top and bottom
+
+        Args:
+            y (float): vertical coordinate
+            above_first (bool, optional): the first box also contains y above its top. Defaults to False.
+
+        Returns:
+            str: key of the box, None if no box contains y
+        """
+        if len(self) == 0:
+            return None
+        key_first = next(iter(self))
+        if above_first and y < self[key_first][3]:
+            return key_first
+
+        found = None
+        for key in self.bands.get(math.floor(y / self.BAND_HEIGHT), ()):
+            box = self.get(key)
+            if box is not None and box[1] < y < box[3] and (found is None or self.ranks[key] < self.ranks[found]):
+                found = key
+
+        return found
@@ -0,0 +1,163 @@
+"""Metrics and trace of an extraction (see extract_pdf(..., metrics=True, trace=...)).
+
+The metrics and trace of the running extraction are kept in context variables, so that any function can record into them
+without new parameters. Without metrics and trace, measure, trace_span and traced only cost a lookup.
+"""
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+class ExtractionMetrics:
+    """Wall time and counts of the work of an extraction, returned by extract_pdf(..., metrics=True).
+
+    Phases (s): open, question_0, scan_workers, phase_1, explains, questions_and_answers and render_workers follow each other,
+    text_parsing (get_page_layout), rasterize and encoding are the parts of them spent reading pages, rendering crops and encoding images.
+    Pages (s): phase_1 and render time of every page. Work done in worker processes is only timed as a whole.
+    Counts: crops_rendered, bytes_encoded (size of the encoded images) and line_classifications.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = defaultdict(float)
+        self.pages = defaultdict(lambda: defaultdict(float))
+        self.counts = defaultdict(int)
+
+    def add_phase_time(self, name, seconds):
+        self.phases[name] += seconds
+
+    def add_page_time(self, n_page, name, seconds):
+        self.pages[n_page][name] += seconds
+
+    def count(self, name, n=1):
+        self.counts[name] += n
+
+    def to_dict(self):
+        return {
+            "total": time.perf_counter() - self.start,
+            "phases": dict(self.phases),
+            "pages": [dict(self.pages[n_page], page=n_page) for n_page in sorted(self.pages)],
+            "counts": {name: self.counts.get(name, 0) for name in ("crops_rendered", "bytes_encoded", "line_classifications")}
+        }
+
+class ExtractionTrace:
+    """Spans of an extraction, written as a Chrome trace-event json file (open it in chrome://tracing or ui.perfetto.dev).
+
+    There are spans for the phases (see ExtractionMetrics), every page of the 1st phase, every question of the 2nd phase,
+    the functions laying out answer options (see traced), every crop rasterized and every image encoded.
+    Work done in worker processes is a single span.
+    """
+
+    def __init__(self, name="extract_pdf"):
+        """
+        Args:
+            name (str, optional): name of the traced process (exp: link to the file). Defaults to "extract_pdf".
+        """
+        self.name = name
+        self.start = time.perf_counter()
+        self.pid = os.getpid()
+        self.events = []
+
+    def add_span(self, name, start, end, args=None):
+        """Add a span
+
+        Args:
+            name (str): name of the span
+            start (float): time.perf_counter() at the start of the span
+            end (float): time.perf_counter() at the end of the span
+            args (dict, optional): information shown with the span. Defaults to None.
+        """
+        self.events.append({
+            "name": name,
+            "cat": "extract_pdf",
+            "ph": "X",
+            "ts": (start - self.start) * 1e6,
+            "dur": (end - start) * 1e6,
+            "pid": self.pid,
+            "tid": threading.get_ident(),
+            "args": args or {}
+        })
+
+    @contextmanager
+    def span(self, name, **args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_span(name, start, time.perf_counter(), args)
+
+    def to_dict(self):
+        metadata = {"name": "process_name", "ph": "M", "pid": self.pid, "args": {"name": self.name}}
+
+        return {"traceEvents": [metadata] + self.events, "displayTimeUnit": "ms"}
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+
+# metrics and trace of the extraction running in this context, None when extract_pdf is called without them
+current_metrics = contextvars.ContextVar("current_metrics", default=None)
+current_trace = contextvars.ContextVar("current_trace", default=None)
+
+@contextmanager
+def measure_phase(name, metrics, trace, args):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        if metrics is not None:
+            metrics.add_phase_time(name, end - start)
+        if trace is not None:
+            trace.add_span(name, start, end, args)
+
+def measure(name, **args):
+    """Time a phase of the current extraction and record its span. Does nothing without metrics and trace
+
+    Args:
+        name (str): name of the phase
+        **args: information shown with the span
+
+    Returns:
+        context manager: timer of the phase
+    """
+    metrics = current_metrics.get()
+    trace = current_trace.get()
+    if metrics is None and trace is None:
+        return nullcontext()
+
+    return measure_phase(name, metrics, trace, args)
+
+def trace_span(name, **args):
+    """Record a span in the trace of the current extraction. Does nothing without trace
+
+    Args:
+        name (str): name of the span
+        **args: information shown with the span
+
+    Returns:
+        context manager: span
+    """
+    trace = current_trace.get()
+    if trace is None:
+        return nullcontext()
+
+    return trace.span(name, **args)
+
+def traced(function):
+    """Decorator recording a span for every call of function in the trace of the current extraction
+    """
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        trace = current_trace.get()
+        if trace is None:
+            return function(*args, **kwargs)
+
+        with trace.span(function.__name__):
+            return function(*args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,186 @@
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from extractPDF import ExtractPDF
+from extractPDF.ResultCache import ResultCache
+
+# -- status of jobs --
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+class QueueFullError(Exception):
+    """Raised when the queue already holds its maximum number of unfinished jobs"""
+
+def extract_to_cache(file, key, options, cache_directory, cache_max_bytes):
+    """Extract a pdf in a worker process and store the result in the result cache
+
+    Args:
+        file (str or bytes): link to the file or content of the pdf
+        key (str): key of the result in the cache
+        options (dict): options given to extract_pdf
+        cache_directory (str): folder of the result cache
+        cache_max_bytes (int): maximum size of the result cache
+
+    Returns:
+        str: key of the result
+    """
+    data = ExtractPDF.extract_pdf(file, "", **options)
+    ResultCache(cache_directory, cache_max_bytes).set(key, data)
+
+    return key
+
+class JobQueue:
+    """Run jobs on a local pool of worker processes.
+
+    At most max_jobs jobs can be queued or running, submit raises QueueFullError beyond.
+    The status of the last max_finished finished jobs is kept.
+    When a worker process dies (exp: out of memory), the jobs of the pool fail and the next job starts a new pool.
+    """
+
+    def __init__(self, max_workers=2, max_jobs=16, max_finished=1000):
+        """
+        Args:
+            max_workers (int, optional): number of worker processes. Defaults to 2.
+            max_jobs (int, optional): maximum number of queued and running jobs. Defaults to 16.
+            max_finished (int, optional): number of finished jobs whose status is kept. Defaults to 1000.
+        """
+        self.max_workers = max_workers
+        self.max_jobs = max_jobs
+        self.max_finished = max_finished
+        self.executor = None
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+
+    def submit(self, fn, *args, **info):
+        """Queue a job
+
+        Args:
+            fn (function): function run by a worker process, it must be importable by the workers
+            *args: arguments of fn
+            **info: information returned with the status of the job
+
+        Raises:
+            QueueFullError: the queue already holds max_jobs unfinished jobs
+
+        Returns:
+            str: id of the job
+        """
+        with self.lock:
+            if self.count_unfinished() >= self.max_jobs:
+                raise QueueFullError(f"{self.max_jobs} jobs are already queued")
+            job_id = uuid.uuid4().hex
+            try:
+                self.jobs[job_id] = {"future": self.submit_to_executor(fn, *args), "info": info}
+            except BrokenProcessPool as e:
+                self.jobs[job_id] = {"error": str(e) or "worker process died", "info": info}
+            self.forget_finished()
+
+        return job_id
+
+    def submit_to_executor(self, fn, *args):
+        """Submit a function to the pool, a new pool replaces a broken one
+
+        Raises:
+            BrokenProcessPool: the new pool is broken too
+
+        Returns:
+            Future: future of the function
+        """
+        for attempt in range(2):
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(self.max_workers)
+            try:
+                return self.executor.submit(fn, *args)
+            except BrokenProcessPool:
+                # a worker process died, the pool accepts no more jobs
+                self.executor.shutdown(wait=False)
+                self.executor = None
+                if attempt == 1:
+                    raise
+
+    def add_done(self, result, **info):
+        """Record a job that is already finished (exp: result served from a cache)
+
+        Args:
+            result: result of the job
+            **info: information returned with the status of the job
+
+        Returns:
+            str: id of the job
+        """
+        with self.lock:
+            job_id = uuid.uuid4().hex
+            self.jobs[job_id] = {"result": result, "info": info}
+            self.forget_finished()
+
+        return job_id
+
+    def status(self, job_id):
+        """Get the status of a job
+
+        Args:
+            job_id (str): id of the job
+
+        Returns:
+            dict: status, error and information of the job, None if the job is unknown
+        """
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+
+        data = {"job_id": job_id, "status": JOB_DONE}
+        data.update(job["info"])
+        future = job.get("future")
+        if "error" in job:
+            data["status"] = JOB_FAILED
+            data["error"] = job["error"]
+        elif future is not None:
+            if not future.done():
+                data["status"] = JOB_RUNNING if future.running() else JOB_QUEUED
+            elif future.exception() is not None:
+                data["status"] = JOB_FAILED
+                data["error"] = str(future.exception())
+
+        return data
+
+    def result(self, job_id):
+        """Get the result of a finished job
+
+        Args:
+            job_id (str): id of the job
+
+        Returns:
+            object: result of the job, None if the job is unknown, not finished or failed
+        """
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        if "result" in job:
+            return job["result"]
+        if "error" in job:
+            return None
+        future = job["future"]
+        if not future.done() or future.exception() is not None:
+            return None
+
+        return future.result()
+
+    def count_unfinished(self):
+        return sum(1 for job in self.jobs.values() if "future" in job and not job["future"].done())
+
+    def forget_finished(self):
+        """Drop the oldest finished jobs over max_finished
+        """
+        finished = [job_id for job_id, job in self.jobs.items() if "future" not in job or job["future"].done()]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self.jobs[job_id]
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
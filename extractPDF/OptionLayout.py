@@ -0,0 +1,171 @@
+"""Layout of the answer options of a question (see ExtractPDF.get_answer_layout).
+
+The titles of the options (A., B., ...) are clustered into rows: an option starting above the bottom of the first title of
+the current row is on that row. Every option's content box is then computed from its row and column in one pass, whatever
+the number of options:
+- one column (every row has one option): the content of an option ends where the next option starts, all options are as
+  wide as the box covering them.
+- one row: all options are as high as the box covering them, an option ends where the next option's title starts.
+- grid (exp: A B / C D): every row is as high as the box covering its options, rows do not overlap and the last option of
+  a row ends at the right of the widest row.
+"""
+
+# titles of answer options, in order
+OPTION_LETTERS = "ABCDEF"
+
+# box covering nothing, every box is smaller and larger than it
+EMPTY_COVER = [2000, 2000, 0, 0]
+
+LAYOUT_COLUMN = "column"
+LAYOUT_ROW = "row"
+LAYOUT_GRID = "grid"
+
+def compare_coors(coor, coor_m):
+    """Get the smallest x0, y0 and largest x1,y1 between two boxes
+
+    Args:
+        coor (list): given box
+        coor_m (list): given box
+
+    Returns:
+        list: box containing the smallest x0, y0 and largest x1,y1 between two boxes
+    """
+    return [min(coor[0], coor_m[0]), min(coor[1], coor_m[1]), max(coor[2], coor_m[2]), max(coor[3], coor_m[3])]
+
+def get_option_rows(titles):
+    """Cluster answer options into rows
+
+    Args:
+        titles (list): list of answer option title's coordinates, in the order of the options
+
+    Returns:
+        list: list of rows, a row is the list of its options' indexes
+    """
+    rows = []
+    for i, title in enumerate(titles):
+        # the middle of the title is above the bottom of the row's first title
+        if len(rows) > 0 and (title[1] + title[3]) / 2 < titles[rows[-1][0]][3]:
+            rows[-1].append(i)
+        else:
+            rows.append([i])
+
+    return rows
+
+def get_layout_type(rows):
+    """Get the type of layout of answer options
+
+    Args:
+        rows (list): list of rows of options (see get_option_rows)
+
+    Returns:
+        str: LAYOUT_COLUMN, LAYOUT_ROW or LAYOUT_GRID
+    """
+    if all(len(row) == 1 for row in rows):
+        return LAYOUT_COLUMN
+    if len(rows) == 1:
+        return LAYOUT_ROW
+
+    return LAYOUT_GRID
+
+def get_options_cover(titles, contents, question_box):
+    """Get the box covering the answer options, from the left of their titles to the bottom of their contents
+
+    Args:
+        titles (list): list of answer option title's coordinates
+        contents (list): list of answer option content's coordinates
+        question_box (list): coordinates of the question
+
+    Returns:
+        list: coordinates of the box covering the answer options
+    """
+    cover = list(EMPTY_COVER)
+    for title, content in zip(titles, contents):
+        # case Question 1: A => Needs to compare the x0 of answer title
+        cover = compare_coors(cover, [title[0], content[1], content[2], content[3]])
+    # check if options overlap next question
+    cover[3] = min(cover[3], question_box[3])
+
+    return cover
+
+def get_row_covers(rows, titles, contents, question_box, page_width):
+    """Get the boxes covering every row of answer options of a grid, rows do not overlap and have the same right
+
+    Args:
+        rows (list): list of rows of options (see get_option_rows)
+        titles (list): list of answer option title's coordinates
+        contents (list): list of answer option content's coordinates
+        question_box (list): coordinates of the question
+        page_width (float): width of the page
+
+    Returns:
+        list: list of the coordinates of the box covering every row
+    """
+    start = list(EMPTY_COVER)
+    # case: value read before answer title
+    if titles[0][0] == contents[0][0]:
+        start[2] = page_width
+
+    covers = []
+    for row in rows:
+        cover = start
+        for i in row:
+            cover = compare_coors(cover, contents[i])
+        covers.append(cover)
+
+    # check if the last row overlaps next question
+    if covers[-1][1] < question_box[3] < covers[-1][3]:
+        covers[-1][3] = question_box[3]
+    for cover, cover_next in zip(covers, covers[1:]):
+        if cover[3] > cover_next[1]:
+            cover[3] = cover_next[1] - 1
+    # some options do not cover the full width of the question
+    if any(cover[2] < question_box[2] for cover in covers):
+        for cover in covers:
+            cover[2] = question_box[2]
+
+    return covers
+
+def layout_options(titles, contents, question_box, page_width):
+    """Get the coordinates of the content of every answer option
+
+    Args:
+        titles (list): list of answer option title's coordinates, in the order of the options
+        contents (list): list of answer option content's coordinates (lines read after the title)
+        question_box (list): coordinates of the question
+        page_width (float): width of the page
+
+    Returns:
+        list: coordinates of the box covering all answer options and list of answer option content's coordinates
+    """
+    rows = get_option_rows(titles)
+    layout = get_layout_type(rows)
+
+    if layout == LAYOUT_GRID:
+        row_covers = get_row_covers(rows, titles, contents, question_box, page_width)
+        right = max(cover[2] for cover in row_covers)
+        cover = list(EMPTY_COVER)
+        for row_cover in row_covers:
+            cover = compare_coors(cover, row_cover)
+    else:
+        cover = get_options_cover(titles, contents, question_box)
+
+    boxes = [None] * len(titles)
+    for n_row, row in enumerate(rows):
+        for n_column, i in enumerate(row):
+            # content starts at the end of the option's title
+            x0 = titles[i][2]
+            if layout == LAYOUT_COLUMN:
+                # content ends where the next option starts
+                y1 = min(contents[i][3], contents[i + 1][1]) if i + 1 < len(titles) else min(contents[i][3], cover[3])
+                boxes[i] = [x0, contents[i][1], cover[2], y1]
+                continue
+
+            y0, y1 = (row_covers[n_row][1], row_covers[n_row][3]) if layout == LAYOUT_GRID else (cover[1], cover[3])
+            if n_column + 1 < len(row):
+                # content ends where the next option's title starts
+                x1 = titles[row[n_column + 1]][0]
+            else:
+                x1 = right if layout == LAYOUT_GRID else cover[2]
+            boxes[i] = [x0, y0, x1, y1]
+
+    return [cover, boxes]
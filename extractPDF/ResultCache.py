@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import threading
+
+def hash_bytes(content):
+    """Get the sha256 of a pdf held in memory
+
+    Args:
+        content (bytes): content of the pdf
+
+    Returns:
+        str: hexadecimal sha256 of content
+    """
+    return hashlib.sha256(content).hexdigest()
+
+def make_key(pdf_hash, version, options=None):
+    """Get the key of an extraction's result
+
+    Args:
+        pdf_hash (str): sha256 of the pdf
+        version (str): version of the extractor
+        options (dict, optional): options given to the extractor. Defaults to None.
+
+    Returns:
+        str: key of the result
+    """
+    data = json.dumps([pdf_hash, version, options or {}], sort_keys=True)
+
+    return hashlib.sha256(data.encode()).hexdigest()
+
+def evict_files(directory, max_bytes, suffix=".json"):
+    """Delete the least recently modified files of a folder until they fit in max_bytes
+
+    Args:
+        directory (str): folder
+        max_bytes (int): maximum size of the files
+        suffix (str, optional): end of the names of the files counted. Defaults to ".json".
+    """
+    entries = []
+    total = 0
+    for entry in os.scandir(directory):
+        if not entry.name.endswith(suffix):
+            continue
+        try:
+            stat = entry.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total += stat.st_size
+
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+
+class ResultCache:
+    """Disk-backed store of extraction's results with a bounded size.
+
+    Every result is a json file named by its key. The modification time of a file is its last use:
+    when the store grows over max_bytes, the least recently used results are deleted first.
+    """
+
+    def __init__(self, directory, max_bytes=1 << 30):
+        """
+        Args:
+            directory (str): folder of the store
+            max_bytes (int, optional): maximum size of the store. Defaults to 1 GB.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def get_path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def contains(self, key):
+        """Check if a result is in the store without reading it
+
+        Args:
+            key (str): key of the result
+
+        Returns:
+            bool: True if the key is in the store
+        """
+        return os.path.isfile(self.get_path(key))
+
+    def get(self, key):
+        """Get a result and mark it as recently used
+
+        Args:
+            key (str): key of the result
+
+        Returns:
+            dict: result, None if the key is not in the store
+        """
+        path = self.get_path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+
+        return data
+
+    def set(self, key, data):
+        """Store a result then evict the least recently used results over max_bytes
+
+        Args:
+            key (str): key of the result
+            data (dict): result
+        """
+        path = self.get_path(key)
+        path_tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(path_tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(path_tmp, path)
+        self.evict()
+
+    def evict(self):
+        """Delete the least recently used results until the store fits in max_bytes
+        """
+        with self.lock:
+            evict_files(self.directory, self.max_bytes)
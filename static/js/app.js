@@ -1,5 +1,50 @@
+// interval between two polls of a job's status, in ms
+const POLL_INTERVAL = 1000;
 
-function submit_click() {
+function submit_click(event) {
+  event.preventDefault();
+  const form = event.target;
   document.getElementById('display-content').innerHTML = "";
-  document.querySelector('#loading').classList.toggle('active');
+  set_status("");
+  document.querySelector('#loading').classList.add('active');
+
+  // ?trace=1 in the page's url asks for the trace of the extraction
+  fetch('/jobs' + window.location.search, { method: 'POST', body: new FormData(form) })
+    .then(response => response.json().then(data => ({ response: response, data: data })))
+    .then(({ response, data }) => {
+      if (response.status == 429) {
+        throw new Error("The server is busy, please try again later");
+      }
+      if (!response.ok) {
+        throw new Error(data.error || "Upload failed");
+      }
+      poll_job(data.job_id);
+    })
+    .catch(show_error);
+
+  return false;
+}
+
+function poll_job(job_id) {
+  fetch('/jobs/' + job_id)
+    .then(response => response.json())
+    .then(data => {
+      if (data.status == 'done') {
+        window.location = '/jobs/' + job_id + '/view';
+      } else if (data.status == 'failed') {
+        throw new Error("Extraction failed: " + data.error);
+      } else {
+        setTimeout(() => poll_job(job_id), POLL_INTERVAL);
+      }
+    })
+    .catch(show_error);
+}
+
+function show_error(error) {
+  document.querySelector('#loading').classList.remove('active');
+  set_status(error.message);
+}
+
+function set_status(message) {
+  document.getElementById('job-status').textContent = message;
 }
@@ -0,0 +1,46 @@
+from extractPDF.Geometry import Box, BoxIndex
+
+def make_index():
+    return BoxIndex({"question_1": Box([0, 0, 100, 100]), "question_2": Box([0, 50, 100, 150])})
+
+def test_find_first_box_in_order_of_keys():
+    boxes = make_index()
+
+    assert boxes.find(75) == "question_1"
+    assert boxes.find(125) == "question_2"
+    assert boxes.find(200) is None
+
+def test_find_above_first_box():
+    boxes = BoxIndex({"question_1": Box([0, 300, 100, 400]), "question_2": Box([0, 0, 100, 100])})
+
+    assert boxes.find(50) == "question_2"
+    assert boxes.find(50, above_first=True) == "question_1"
+
+def test_find_keeps_order_after_replace():
+    boxes = make_index()
+    boxes["question_1"] = Box([0, 100, 100, 300])
+
+    # the old box of question_1 is no longer found, the new one still comes before question_2
+    assert boxes.find(75) == "question_2"
+    assert boxes.find(125) == "question_1"
+    assert boxes.find(250) == "question_1"
+    assert list(boxes) == ["question_1", "question_2"]
+
+def test_find_after_merge():
+    boxes = make_index()
+    boxes.merge("question_2", [0, 140, 100, 400])
+
+    assert boxes.find(350) == "question_2"
+
+def test_find_skips_popped_key():
+    boxes = make_index()
+    box = boxes.pop("question_1")
+
+    assert box.to_list() == [0, 0, 100, 100]
+    assert boxes.find(75) == "question_2"
+    assert boxes.find(25) is None
+    assert boxes.pop("question_1", None) is None
+
+    # a key added again comes after the others
+    boxes["question_1"] = Box([0, 50, 100, 150])
+    assert boxes.find(75) == "question_2"
@@ -0,0 +1,59 @@
+from extractPDF.ExtractPDF import HeaderFooterIndex, get_block_main, get_text_lines
+
+PAGE_HEIGHT = 842
+
+def make_block(text, bbox):
+    return {"type": 0, "bbox": bbox, "lines": [{"bbox": bbox, "spans": [{"text": text, "bbox": bbox}]}]}
+
+def make_page(n_page, body=()):
+    blocks = [make_block(f"Trang {n_page}/20", [250, 32, 330, 42])]
+    blocks += [make_block(text, bbox) for text, bbox in body]
+    blocks += [make_block(f"Câu {n_page}. Question of page {n_page}", [50, 200, 400, 212]),
+               make_block("A. 1", [50, 220, 80, 232]),
+               make_block("Mã đề 101", [400, 810, 500, 822])]
+    return blocks
+
+def make_index(pages):
+    return HeaderFooterIndex(pages, PAGE_HEIGHT)
+
+def test_repeated_margins_are_headers_and_footers():
+    pages = [make_page(n_page) for n_page in range(1, 21)]
+    index = make_index(pages)
+
+    assert index.is_header_footer(pages[0][0])
+    assert index.is_header_footer(make_block("Trang 125/200", [250, 32, 330, 42]))
+    assert index.is_header_footer(pages[0][-1])
+    assert index.get_band(pages[0][0]) == "top"
+    assert index.get_band(pages[0][-1]) == "bottom"
+
+def test_repeated_content_is_kept():
+    # "Lời giải" and option "A. 1" are repeated at the same place on every page, in the body of the page
+    body = [("Lời giải", [50, 86, 100, 99])]
+    pages = [make_page(n_page, body) for n_page in range(1, 21)]
+    index = make_index(pages)
+
+    assert not any(index.is_header_footer(block) for block in pages[0][1:-1])
+    assert [get_text_lines(block) for block in get_block_main(pages[0], 0, False, index)] == \
+        ["Lời giải", "Câu 1. Question of page 1", "A. 1"]
+
+def test_not_repeated_is_not_indexed():
+    pages = [make_page(1)] + [make_page(n_page)[1:] for n_page in range(2, 21)]
+    index = make_index(pages)
+
+    assert not index.is_header_footer(pages[0][0])
+
+def test_exam_code_kept_in_answer_key():
+    pages = [make_page(n_page) for n_page in range(1, 21)]
+    index = make_index(pages)
+
+    assert "Mã đề 101" not in [get_text_lines(block) for block in get_block_main(pages[0], 0, False, index)]
+    assert "Mã đề 101" in [get_text_lines(block) for block in get_block_main(pages[0], 99, False, index)]
+
+def test_footer_not_repeated_removed_by_fallback():
+    # the header is repeated, the footer only on this page
+    pages = [make_page(n_page)[:-1] for n_page in range(1, 21)]
+    index = make_index(pages)
+    blocks = pages[0] + [make_block("Page 1", [300, 810, 340, 822])]
+
+    assert [get_text_lines(block) for block in get_block_main(blocks, 0, False, index)] == \
+        ["Câu 1. Question of page 1", "A. 1"]
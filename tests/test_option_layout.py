@@ -0,0 +1,83 @@
+import fitz
+import pytest
+
+from extractPDF import ExtractPDF
+from extractPDF.OptionLayout import LAYOUT_COLUMN, LAYOUT_GRID, LAYOUT_ROW, OPTION_LETTERS, get_layout_type, get_option_rows, layout_options
+
+QUESTION_BOX = [40, 90, 500, 200]
+PAGE_WIDTH = 600
+
+def test_column():
+    titles = [[50, 100 + 20 * i, 64, 112 + 20 * i] for i in range(4)]
+    contents = [[64, 100 + 20 * i, 300 + 10 * i, 112 + 20 * i] for i in range(4)]
+
+    assert get_layout_type(get_option_rows(titles)) == LAYOUT_COLUMN
+    cover, boxes = layout_options(titles, contents, QUESTION_BOX, PAGE_WIDTH)
+    assert cover == [50, 100, 330, 172]
+    # every option is as wide as the cover and ends where the next one starts
+    assert boxes == [[64, 100, 330, 112], [64, 120, 330, 132], [64, 140, 330, 152], [64, 160, 330, 172]]
+
+def test_row():
+    titles = [[50 + 100 * i, 100, 64 + 100 * i, 112] for i in range(4)]
+    contents = [[64 + 100 * i, 100, 120 + 100 * i, 112] for i in range(4)]
+
+    assert get_layout_type(get_option_rows(titles)) == LAYOUT_ROW
+    cover, boxes = layout_options(titles, contents, QUESTION_BOX, PAGE_WIDTH)
+    assert cover == [50, 100, 420, 112]
+    # every option ends where the next option's title starts
+    assert boxes == [[64, 100, 150, 112], [164, 100, 250, 112], [264, 100, 350, 112], [364, 100, 420, 112]]
+
+def test_grid():
+    titles = [[50, 100, 64, 112], [250, 100, 264, 112], [50, 130, 64, 142], [250, 130, 264, 142]]
+    contents = [[64, 100, 200, 112], [264, 100, 400, 112], [64, 130, 210, 142], [264, 130, 420, 142]]
+
+    assert get_option_rows(titles) == [[0, 1], [2, 3]]
+    assert get_layout_type(get_option_rows(titles)) == LAYOUT_GRID
+    cover, boxes = layout_options(titles, contents, QUESTION_BOX, PAGE_WIDTH)
+    assert cover == [64, 100, 500, 142]
+    # rows are as high as their options, the last option of a row ends at the right of the question
+    assert boxes == [[64, 100, 250, 112], [264, 100, 500, 112], [64, 130, 250, 142], [264, 130, 500, 142]]
+
+def test_grid_rows_do_not_overlap():
+    titles = [[50, 100, 64, 112], [250, 100, 264, 112], [50, 130, 64, 142], [250, 130, 264, 142]]
+    contents = [[64, 100, 200, 135], [264, 100, 400, 112], [64, 130, 210, 142], [264, 130, 420, 142]]
+
+    _, boxes = layout_options(titles, contents, QUESTION_BOX, PAGE_WIDTH)
+    assert boxes[0][3] == boxes[1][3] == 129
+    assert boxes[2][1] == 130
+
+def test_grid_of_six_options():
+    titles = [[50 + 200 * (i % 2), 100 + 30 * (i // 2), 64 + 200 * (i % 2), 112 + 30 * (i // 2)] for i in range(6)]
+    contents = [[64 + 200 * (i % 2), 100 + 30 * (i // 2), 180 + 200 * (i % 2) + 5 * i, 112 + 30 * (i // 2)] for i in range(6)]
+
+    assert get_option_rows(titles) == [[0, 1], [2, 3], [4, 5]]
+    cover, boxes = layout_options(titles, contents, QUESTION_BOX, PAGE_WIDTH)
+    assert cover == [64, 100, 500, 172]
+    assert boxes[4:] == [[64, 160, 250, 172], [264, 160, 500, 172]]
+
+def make_exam(columns):
+    """Get a pdf of three questions of six options (A. to F.) on columns columns"""
+    doc = fitz.open()
+    page = doc.new_page()
+    y = 80
+    for num_q in range(1, 4):
+        page.insert_text((50, y), f"Question {num_q}: Which of these is the right answer to the question?", fontsize=11)
+        y += 18
+        for i, letter in enumerate(OPTION_LETTERS):
+            # option's text starting with E or F is not an option's title
+            page.insert_text((60 + (i % columns) * 240, y), f"{letter}. Fine example {letter.lower()}", fontsize=11)
+            if i % columns == columns - 1:
+                y += 16
+        y += 10
+
+    return doc.tobytes()
+
+@pytest.mark.parametrize("columns", [1, 2])
+def test_extract_options_e_and_f(columns):
+    data = ExtractPDF.extract_pdf(make_exam(columns), "", render_images=False)
+
+    assert len(data["answers"]) == 3
+    for answer in data["answers"].values():
+        titles = [option[:4] for option in answer["options"]]
+        assert len(titles) == 6
+        assert get_layout_type(get_option_rows(titles)) == (LAYOUT_COLUMN if columns == 1 else LAYOUT_GRID)
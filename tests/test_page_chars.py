@@ -0,0 +1,30 @@
+import fitz
+import pytest
+
+from extractPDF.ExtractPDF import PageChars
+
+LINES = [
+    "Câu 1. What is 2 + 2?",
+    "A. 3    B. 4    C. 5    D. 6",
+    "Question 2. Choose the word. A. cat B. dog",
+    "c. lower case option  d.  two spaces",
+]
+
+@pytest.fixture(scope="module")
+def page():
+    doc = fitz.open()
+    page = doc.new_page()
+    for n, line in enumerate(LINES):
+        page.insert_text((50, 100 + 30 * n), line, fontname="helv", fontsize=11)
+    yield page
+    doc.close()
+
+def get_boxes(rects):
+    return [tuple(round(value, 3) for value in rect) for rect in rects]
+
+@pytest.mark.parametrize("needle", ["Câu 1", "A.", "B. 4", "d.", "D. 6", "question 2", "C. LOWER", "d. two", "two  spaces", "none"])
+@pytest.mark.parametrize("clip", [None, [40, 80, 600, 112], [150, 100, 600, 200]])
+def test_search_for_as_page(page, needle, clip):
+    clip = page.rect if clip is None else fitz.Rect(clip)
+
+    assert get_boxes(PageChars(page).search_for(needle, list(clip))) == get_boxes(page.search_for(needle, clip=clip))
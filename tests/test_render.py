@@ -0,0 +1,34 @@
+import base64
+import os
+
+import fitz
+import pytest
+
+from extractPDF import ExtractPDF
+
+FILE = os.path.join(os.path.dirname(__file__), '..', 'pdf-example', 'Physics Test.pdf')
+
+@pytest.fixture(scope="module")
+def results():
+    return ExtractPDF.extract_pdf(FILE, ""), ExtractPDF.extract_pdf(FILE, "", render_images=False)
+
+def test_render_crop_as_extract_pdf(results):
+    data, lazy = results
+    doc = fitz.open(FILE)
+    for key, questions in lazy["questions"].items():
+        for question, rendered in zip(questions, data["questions"][key]):
+            image = ExtractPDF.render_crop(doc, question["page"], question["coor"], white_boxes=question["white_boxes"])
+            assert image == rendered["coor"][4], key
+    doc.close()
+
+def test_trimmed_images_cover_their_box(results):
+    data, _ = results
+    trimmed = ExtractPDF.extract_pdf(FILE, "", ExtractPDF.ImageEncoder(trim_margins=True))
+    scale = ExtractPDF.IMAGE_SCALE
+    for key, questions in trimmed["questions"].items():
+        for question, rendered in zip(questions, data["questions"][key]):
+            coor = question["coor"]
+            pix = fitz.Pixmap(base64.b64decode(coor[4].split(",", 1)[1]))
+            assert abs(pix.width - (coor[2] - coor[0]) * scale) <= 1, key
+            assert abs(pix.height - (coor[3] - coor[1]) * scale) <= 1, key
+            assert fitz.Rect(rendered["coor"][:4]).contains(fitz.Rect(coor[:4])), key
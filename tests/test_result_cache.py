@@ -0,0 +1,47 @@
+import os
+
+from extractPDF.ResultCache import ResultCache, evict_files
+
+def set_used(cache, key, time):
+    os.utime(cache.get_path(key), (time, time))
+
+def test_set_get(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    cache.set("a", {"questions": {}})
+
+    assert cache.contains("a")
+    assert not cache.contains("b")
+    assert cache.get("a") == {"questions": {}}
+    assert cache.get("b") is None
+
+def test_evict_least_recently_used(tmp_path):
+    data = {"data": "x" * 100}
+    cache = ResultCache(str(tmp_path), max_bytes=1000)
+    for n, key in enumerate(["a", "b", "c"]):
+        cache.set(key, data)
+        set_used(cache, key, 1000 + n)
+    size = os.path.getsize(cache.get_path("a"))
+
+    # "a" is used again, "b" is now the least recently used
+    cache.get("a")
+    cache.max_bytes = 3 * size
+    cache.set("d", data)
+
+    assert [key for key in "abcd" if cache.contains(key)] == ["a", "c", "d"]
+
+def test_evict_nothing_under_max_bytes(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=1 << 20)
+    for key in "abc":
+        cache.set(key, {"data": key})
+
+    assert all(cache.contains(key) for key in "abc")
+
+def test_evict_files_counts_suffix_only(tmp_path):
+    for n, name in enumerate(["1.json", "2.json", "other.txt"]):
+        path = tmp_path / name
+        path.write_bytes(b"x" * 100)
+        os.utime(path, (1000 + n, 1000 + n))
+
+    evict_files(str(tmp_path), 150)
+
+    assert sorted(os.listdir(tmp_path)) == ["2.json", "other.txt"]